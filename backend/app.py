@@ -3,6 +3,7 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 from werkzeug.middleware.proxy_fix import ProxyFix
+import threading
 
 load_dotenv()
 
@@ -16,7 +17,12 @@ from routes.speech_practice import speech_practice_bp
 from routes.report import report_bp
 from routes.daily_schedule import daily_schedule_bp
 from routes.ice_breaker import ice_breaker_bp
+from routes.analytics import analytics_bp
 from utils.decorators import requires_auth
+from services.ondemand_service import OnDemandService
+from config.database import db
+from models import ALL_MODELS, DailyScheduleSummary, ReportJob
+from controllers.report_controller import ReportController
 
 
 def create_app():
@@ -62,11 +68,61 @@ def create_app():
     app.register_blueprint(report_bp, url_prefix='/api/reports')
     app.register_blueprint(daily_schedule_bp, url_prefix='/api/daily-schedule')
     app.register_blueprint(ice_breaker_bp, url_prefix='/api/ondemand')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
     
+    # Create missing indexes; changed ones are rebuilt by `flask ensure-indexes`
+    if Config.MONGODB_ENSURE_INDEXES:
+        try:
+            summary = db.ensure_indexes(ALL_MODELS)
+            for collection, actions in summary.items():
+                for name in actions['outdated']:
+                    print(f"Index {collection}.{name} differs from its declaration; run `flask ensure-indexes`")
+        except Exception as e:
+            print(f"Index bootstrap failed: {str(e)}")
+    
+    # Background work runs in serving processes only, never in `flask` CLI commands
+    app.before_request(start_background_services)
+    
+    register_cli_commands(app)
+    
+    # Liveness only; the /health/* statistics expose internals and need a session
     @app.route('/health', methods=['GET'])
     def health_check():
         return jsonify(status='OK', message='Server is running'), 200
     
+    @app.route('/health/db', methods=['GET'])
+    @requires_auth
+    def database_health():
+        """MongoDB connection pool statistics for this worker process"""
+        return jsonify(status='OK', pool=db.pool_stats()), 200
+    
+    @app.route('/health/ondemand', methods=['GET'])
+    @requires_auth
+    def ondemand_health():
+        """OnDemand API client statistics for this worker process"""
+        return jsonify(
+            status='OK',
+            http=OnDemandService.http.stats(),
+            sessions=OnDemandService.sessions.stats(),
+            chat_cache=OnDemandService.chat_cache.stats(),
+            local_responder=OnDemandService.responder.stats(),
+            chat_hedge=OnDemandService.chat_hedge.stats(),
+            chat_memory=OnDemandService.memory.stats(),
+            breaker=OnDemandService.breaker.stats(),
+            bulkheads={purpose: bulkhead.stats() for purpose, bulkhead in OnDemandService.bulkheads.items()}
+        ), 200
+    
+    @app.route('/health/jobs', methods=['GET'])
+    @requires_auth
+    def jobs_health():
+        """Report job queue depth and this worker process's job statistics"""
+        return jsonify(
+            status='OK',
+            queue=ReportJob.counts(),
+            worker=ReportController.worker.stats(),
+            single_flight=ReportController.inflight.stats()
+        ), 200
+    
     @app.route('/api/protected', methods=['GET'])
     @requires_auth
     def protected():
@@ -93,13 +149,85 @@ def create_app():
                 'auth_me': '/api/auth/me',
                 'users_list': '/api/users/',
                 'users_profile': '/api/users/profile',
-                'user_by_id': '/api/users/<auth0_id>'
+                'user_by_id': '/api/users/<auth0_id>',
+                'child_analytics': '/api/analytics/child/<child_name>'
             }
         )
     
     return app
 
 
+_background_pid = None
+_background_lock = threading.Lock()
+
+
+def start_background_services():
+    """
+    Start this process's background work on its first request
+    
+    Each serving process (including forked server workers) starts it once;
+    processes that never serve a request, such as `flask` CLI commands, never do.
+    """
+    global _background_pid
+    if _background_pid == os.getpid():
+        return
+    with _background_lock:
+        if _background_pid == os.getpid():
+            return
+        _background_pid = os.getpid()
+        
+        # Open a few chat sessions ahead of the first messages
+        OnDemandService.prewarm_sessions()
+        
+        # Run queued report generation jobs in this process
+        if Config.REPORT_WORKERS > 0:
+            ReportController.worker.start()
+
+
+def register_cli_commands(app):
+    """Register maintenance commands for the `flask` CLI"""
+    import click
+    
+    @app.cli.command('ensure-indexes')
+    @click.option('--drop-stale', is_flag=True, help='Drop indexes no model declares')
+    def ensure_indexes_command(drop_stale):
+        """Create or rebuild the indexes declared by the models"""
+        summary = db.ensure_indexes(ALL_MODELS, drop_stale=drop_stale, rebuild=True)
+        failed = False
+        for collection, actions in summary.items():
+            for action, names in actions.items():
+                for name in names:
+                    click.echo(f"{collection}: {action} {name}")
+            failed = failed or bool(actions['errors'])
+        if failed:
+            raise SystemExit(1)
+        click.echo('Indexes are up to date')
+    
+    @app.cli.command('check-indexes')
+    def check_indexes_command():
+        """Fail when a declared model query, or a query the profiler saw, has no supporting index"""
+        uncovered = db.check_query_coverage(ALL_MODELS)
+        for query in uncovered:
+            click.echo(f"No index covers {query}")
+        
+        profiling, scans = db.collection_scans()
+        for scan in scans:
+            click.echo(f"Collection scan recorded by the profiler: {scan}")
+        if not profiling:
+            click.echo('Profiler is off; only declared query shapes were checked (enable it with db.setProfilingLevel(1))')
+        
+        if uncovered or scans:
+            raise SystemExit(1)
+        click.echo('All model queries are covered by an index')
+    
+    @app.cli.command('backfill-daily-summaries')
+    @click.option('--child', default=None, help='Only rebuild this child\'s rollups')
+    def backfill_daily_summaries_command(child):
+        """Rebuild daily schedule rollups from the raw activities"""
+        DailyScheduleSummary.backfill(child)
+        click.echo('Daily schedule summaries rebuilt')
+
+
 if __name__ == '__main__':
     app = create_app()
     print("Starting BrainWave Backend Server...")
@@ -14,6 +14,83 @@ class Config:
     
     # MongoDB
     MONGODB_URI = os.getenv('MONGODB_URI')
+    MONGODB_DATABASE = os.getenv('MONGODB_DATABASE', 'brainwave_db')
+    MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '50'))  # Per worker process
+    MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', '0'))
+    MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '300000'))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', '0'))  # 0 = wait for serverSelectionTimeoutMS
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+    MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '10000'))
+    MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '30000'))
+    MONGODB_COMPRESSORS = os.getenv('MONGODB_COMPRESSORS', 'zstd,snappy,zlib')  # Unavailable codecs are skipped
+    MONGODB_WRITE_CONCERN = os.getenv('MONGODB_WRITE_CONCERN')  # e.g. 'majority' or '1'; server default if unset
+    MONGODB_ENSURE_INDEXES = os.getenv('MONGODB_ENSURE_INDEXES', 'true').lower() == 'true'  # Reconcile indexes at startup
+    
+    # Analytics
+    ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', '300'))  # Seconds
+    ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', '1000'))
+    
+    # OnDemand API client
+    ONDEMAND_POOL_SIZE = int(os.getenv('ONDEMAND_POOL_SIZE', '20'))  # Match worker threads per process
+    ONDEMAND_CONNECT_TIMEOUT = float(os.getenv('ONDEMAND_CONNECT_TIMEOUT', '5'))  # Seconds
+    ONDEMAND_READ_TIMEOUT = float(os.getenv('ONDEMAND_READ_TIMEOUT', '30'))
+    ONDEMAND_CHAT_READ_TIMEOUT = float(os.getenv('ONDEMAND_CHAT_READ_TIMEOUT', '20'))
+    ONDEMAND_REPORT_READ_TIMEOUT = float(os.getenv('ONDEMAND_REPORT_READ_TIMEOUT', '120'))
+    ONDEMAND_CHAT_FIRST_TOKEN_BUDGET = float(os.getenv('ONDEMAND_CHAT_FIRST_TOKEN_BUDGET', '2.5'))  # Seconds before a streamed chat falls back
+    ONDEMAND_CHAT_HEDGE_BUDGET = float(os.getenv('ONDEMAND_CHAT_HEDGE_BUDGET', '3'))  # Seconds before a non-streamed chat answers locally (0 always waits)
+    ONDEMAND_CHAT_SLOW_SECONDS = float(os.getenv('ONDEMAND_CHAT_SLOW_SECONDS', '8'))  # Slower chat calls count against the breaker
+    ONDEMAND_SESSION_SLOW_SECONDS = float(os.getenv('ONDEMAND_SESSION_SLOW_SECONDS', '5'))
+    ONDEMAND_CHAT_CONCURRENCY = int(os.getenv('ONDEMAND_CHAT_CONCURRENCY', '8'))  # Upstream chat calls in flight per process
+    ONDEMAND_CHAT_QUEUE = int(os.getenv('ONDEMAND_CHAT_QUEUE', '8'))  # Chat calls waiting for a slot; more are refused at once
+    ONDEMAND_CHAT_QUEUE_WAIT = float(os.getenv('ONDEMAND_CHAT_QUEUE_WAIT', '1'))  # Seconds
+    ONDEMAND_REPORT_CONCURRENCY = int(os.getenv('ONDEMAND_REPORT_CONCURRENCY', '4'))  # Leaves request threads for cheap endpoints
+    ONDEMAND_REPORT_QUEUE = int(os.getenv('ONDEMAND_REPORT_QUEUE', '4'))
+    ONDEMAND_REPORT_QUEUE_WAIT = float(os.getenv('ONDEMAND_REPORT_QUEUE_WAIT', '10'))
+    BREAKER_WINDOW = int(os.getenv('BREAKER_WINDOW', '20'))  # Recent calls considered
+    BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', '5'))
+    BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', '0.5'))
+    BREAKER_SLOW_RATE = float(os.getenv('BREAKER_SLOW_RATE', '0.8'))
+    BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', '30'))  # Before a half-open probe
+    ONDEMAND_MAX_RETRIES = int(os.getenv('ONDEMAND_MAX_RETRIES', '2'))
+    ONDEMAND_BACKOFF_BASE = float(os.getenv('ONDEMAND_BACKOFF_BASE', '0.25'))
+    ONDEMAND_BACKOFF_MAX = float(os.getenv('ONDEMAND_BACKOFF_MAX', '2'))
+    ONDEMAND_EXTERNAL_USER_PREFIX = os.getenv('ONDEMAND_EXTERNAL_USER_PREFIX', 'brainwave')
+    ONDEMAND_SESSION_TTL = int(os.getenv('ONDEMAND_SESSION_TTL', '1800'))  # Seconds a session is reused
+    ONDEMAND_SESSION_MAX_USES = int(os.getenv('ONDEMAND_SESSION_MAX_USES', '25'))
+    ONDEMAND_SESSION_MAX_IDLE = int(os.getenv('ONDEMAND_SESSION_MAX_IDLE', '8'))  # Per purpose/conversation
+    ONDEMAND_SESSION_MAX_KEYS = int(os.getenv('ONDEMAND_SESSION_MAX_KEYS', '1000'))
+    ONDEMAND_SESSION_PREWARM = int(os.getenv('ONDEMAND_SESSION_PREWARM', '2'))  # Unused ice-breaker sessions kept per serving process
+    ONDEMAND_REPORT_SESSION_PREWARM = int(os.getenv('ONDEMAND_REPORT_SESSION_PREWARM', '2'))  # Unused report sessions kept per serving process
+    
+    # Ice Breaker chat reply cache
+    CHAT_CACHE_SIZE = int(os.getenv('CHAT_CACHE_SIZE', '2000'))  # Distinct messages per process
+    CHAT_CACHE_TTL = int(os.getenv('CHAT_CACHE_TTL', '86400'))  # Seconds
+    CHAT_CACHE_VARIANTS = int(os.getenv('CHAT_CACHE_VARIANTS', '3'))  # Answers collected before serving from cache
+    CHAT_CACHE_MAX_MESSAGE_LENGTH = int(os.getenv('CHAT_CACHE_MAX_MESSAGE_LENGTH', '120'))
+    
+    # Ice Breaker local replies (used when the OnDemand API is unavailable or slow)
+    CHAT_INTENTS_FILE = os.getenv('CHAT_INTENTS_FILE')  # Optional JSON catalog extending the built-in intents
+    CHAT_FALLBACK_MIN_SIMILARITY = float(os.getenv('CHAT_FALLBACK_MIN_SIMILARITY', '0.3'))
+    
+    # Ice Breaker conversation memory (recent turns sent upstream as context)
+    CHAT_MEMORY_STORE = os.getenv('CHAT_MEMORY_STORE', 'memory')  # 'memory' (per process) or 'mongo' (shared)
+    CHAT_MEMORY_CONVERSATIONS = int(os.getenv('CHAT_MEMORY_CONVERSATIONS', '5000'))  # Kept per process
+    CHAT_MEMORY_TURNS = int(os.getenv('CHAT_MEMORY_TURNS', '12'))  # Kept per conversation
+    CHAT_MEMORY_TOKEN_BUDGET = int(os.getenv('CHAT_MEMORY_TOKEN_BUDGET', '400'))  # History sent with a message
+    CHAT_MEMORY_MAX_TURN_CHARS = int(os.getenv('CHAT_MEMORY_MAX_TURN_CHARS', '400'))
+    CHAT_MEMORY_TTL = int(os.getenv('CHAT_MEMORY_TTL', '3600'))  # Seconds after the last turn
+    
+    # Reports
+    REPORT_PROMPT_MODE = os.getenv('REPORT_PROMPT_MODE', 'compact')  # 'compact' (local scoring) or 'full'
+    REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '2'))  # Generation threads per process (0 disables)
+    REPORT_JOB_POLL_INTERVAL = float(os.getenv('REPORT_JOB_POLL_INTERVAL', '1'))  # Seconds
+    REPORT_JOB_LEASE_SECONDS = int(os.getenv('REPORT_JOB_LEASE_SECONDS', '300'))  # Renewed every third while a job runs
+    REPORT_JOB_MAX_ATTEMPTS = int(os.getenv('REPORT_JOB_MAX_ATTEMPTS', '3'))
+    REPORT_JOB_MAX_QUEUED = int(os.getenv('REPORT_JOB_MAX_QUEUED', '50'))  # New jobs are refused with 503 beyond this depth
+    REPORT_JOB_RETENTION_DAYS = int(os.getenv('REPORT_JOB_RETENTION_DAYS', '7'))
+    REPORT_JOB_MAX_WAIT = int(os.getenv('REPORT_JOB_MAX_WAIT', '25'))  # Longest ?wait= on job polling
+    REPORT_LEASE_SECONDS = int(os.getenv('REPORT_LEASE_SECONDS', str(REPORT_JOB_LEASE_SECONDS)))  # Same renewal scheme as job leases
+    REPORT_LEASE_WAIT = int(os.getenv('REPORT_LEASE_WAIT', '180'))  # How long to wait on another worker's generation
     
     # URLs
     BACKEND_URL = os.getenv('BACKEND_URL', 'http://localhost:5000')
@@ -1,41 +1,393 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
+from pymongo.errors import OperationFailure
 from dotenv import load_dotenv
+from collections import deque
+from config.config import Config
+import threading
+import time
 import os
 
 load_dotenv()
 
 class Database:
+    """
+    Process-wide MongoDB handle
+
+    The MongoClient is created lazily on first use and recreated in every
+    process that inherits this object through fork(), so pre-fork servers never
+    share sockets between workers. Models bind `LazyCollection` proxies that
+    resolve the collection against the current process's client on every call.
+    """
     _instance = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(Database, cls).__new__(cls)
-            cls._instance.client = MongoClient(os.getenv('MONGODB_URI'))
-            cls._instance.db = cls._instance.client.get_database('brainwave_db')
+            cls._instance._reset()
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=cls._instance._reset)
         return cls._instance
     
+    def _reset(self):
+        """Forget the client (and its pool) inherited from a parent process"""
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.pool_monitor = PoolMonitor()
+    
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._client = MongoClient(
+                        Config.MONGODB_URI,
+                        event_listeners=[self.pool_monitor],
+                        **Database.client_options()
+                    )
+                    self._pid = os.getpid()
+        return self._client
+    
+    @property
+    def db(self):
+        return self.client.get_database(Config.MONGODB_DATABASE)
+    
+    @staticmethod
+    def client_options():
+        """MongoClient keyword arguments built from Config"""
+        options = {
+            'maxPoolSize': Config.MONGODB_MAX_POOL_SIZE,
+            'minPoolSize': Config.MONGODB_MIN_POOL_SIZE,
+            'maxIdleTimeMS': Config.MONGODB_MAX_IDLE_TIME_MS,
+            'serverSelectionTimeoutMS': Config.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            'connectTimeoutMS': Config.MONGODB_CONNECT_TIMEOUT_MS,
+            'socketTimeoutMS': Config.MONGODB_SOCKET_TIMEOUT_MS,
+        }
+        if Config.MONGODB_WAIT_QUEUE_TIMEOUT_MS:
+            options['waitQueueTimeoutMS'] = Config.MONGODB_WAIT_QUEUE_TIMEOUT_MS
+        if Config.MONGODB_COMPRESSORS:
+            options['compressors'] = Config.MONGODB_COMPRESSORS
+        if Config.MONGODB_WRITE_CONCERN:
+            w = Config.MONGODB_WRITE_CONCERN
+            options['w'] = int(w) if w.isdigit() else w
+        return options
+    
+    def pool_stats(self):
+        """Connection pool checkout statistics for the current process"""
+        stats = self.pool_monitor.snapshot()
+        stats['pid'] = os.getpid()
+        stats['max_pool_size'] = Config.MONGODB_MAX_POOL_SIZE
+        return stats
+    
     @property
     def users(self):
-        return self.db.users
+        return LazyCollection(self, 'users')
     
     @property
     def assessments(self):
-        return self.db.assessments
+        return LazyCollection(self, 'assessments')
     
     @property
     def speech_practice(self):
-        return self.db.speech_practice
+        return LazyCollection(self, 'speech_practice')
     
     @property
     def reports(self):
-        return self.db.reports
+        return LazyCollection(self, 'reports')
     
     @property
     def daily_schedule_activities(self):
-        return self.db.daily_schedule_activities
+        return LazyCollection(self, 'daily_schedule_activities')
+    
+    @property
+    def daily_schedule_summaries(self):
+        return LazyCollection(self, 'daily_schedule_summaries')
+    
+    @property
+    def report_jobs(self):
+        return LazyCollection(self, 'report_jobs')
+    
+    @property
+    def leases(self):
+        return LazyCollection(self, 'leases')
+    
+    @property
+    def chat_conversations(self):
+        return LazyCollection(self, 'chat_conversations')
+    
+    def ensure_indexes(self, models, drop_stale=False, rebuild=False):
+        """
+        Reconcile the indexes declared on each model with the database
+        
+        Missing indexes are created. Indexes whose keys or options changed are
+        only reported as 'outdated' unless rebuild is set; a rebuild first
+        builds a stand-in index (the declared keys plus _id) so queries stay
+        served, then drops the old index and builds the declared one, and
+        restores the old index if that fails (e.g. a unique index over data
+        that still has duplicates). Rebuilds and drops belong in the
+        `flask ensure-indexes` command, not in app startup, where every
+        worker would race on them.
+        
+        Args:
+            models: Model classes exposing `collection` and `indexes`
+            drop_stale: Drop indexes that are not declared by any model
+            rebuild: Rebuild indexes whose declaration changed
+        
+        Returns:
+            dict: Actions taken per collection ('created', 'rebuilt', 'outdated', 'dropped', 'errors')
+        """
+        summary = {}
+        for model in models:
+            collection = model.collection
+            existing = collection.index_information()
+            actions = {'created': [], 'rebuilt': [], 'outdated': [], 'dropped': [], 'errors': []}
+            declared_names = set()
+            
+            for index in model.indexes:
+                spec = index.document
+                name = spec['name']
+                declared_names.add(name)
+                current = existing.get(name)
+                
+                if current is None:
+                    try:
+                        collection.create_indexes([index])
+                        actions['created'].append(name)
+                    except OperationFailure as e:
+                        # e.g. a unique index over data that still has duplicates
+                        actions['errors'].append(f"{name}: {e}")
+                elif _index_matches(current, spec):
+                    continue
+                elif not rebuild:
+                    actions['outdated'].append(name)
+                else:
+                    error = _rebuild_index(collection, index, current)
+                    if error:
+                        actions['errors'].append(f"{name}: {error}")
+                    else:
+                        actions['rebuilt'].append(name)
+            
+            if drop_stale:
+                for name in existing:
+                    if name != '_id_' and name not in declared_names and not name.endswith(REBUILD_SUFFIX):
+                        collection.drop_index(name)
+                        actions['dropped'].append(name)
+            
+            summary[collection.name] = actions
+        return summary
+    
+    def collection_scans(self):
+        """
+        Queries the database profiler recorded as answered by a collection scan
+        
+        Complements check_query_coverage, which only checks the query shapes
+        models declare: this looks at the queries that actually ran. Needs the
+        profiler on (db.setProfilingLevel(1) on a staging database).
+        
+        Returns:
+            tuple: (profiling enabled: bool, list of 'collection: filter fields' descriptions)
+        """
+        if self.db.command('profile', -1).get('was', 0) == 0:
+            return False, []
+        scans = set()
+        for entry in self.db['system.profile'].find({'planSummary': 'COLLSCAN'}, {'ns': 1, 'command': 1}):
+            collection = entry.get('ns', '').split('.', 1)[-1]
+            if collection.startswith('system.'):
+                continue
+            command = entry.get('command') or {}
+            query = command.get('filter') or command.get('query') or command.get('q') or {}
+            # A scan without a filter (e.g. a backfill) is intentional
+            if query:
+                scans.add(f"{collection}: {sorted(query)}")
+        return True, sorted(scans)
+    
+    @staticmethod
+    def check_query_coverage(models):
+        """
+        Check that every query shape a model declares is served by one of its indexes
+
+        A query is covered when an index starts with its equality fields, continues
+        with its sort fields (in the same or fully reversed direction) and contains
+        its range fields afterwards (equality, sort, range ordering).
+
+        Args:
+            models: Model classes exposing `indexes` and `queries`
+
+        Returns:
+            list: Descriptions of uncovered queries (empty when all are covered)
+        """
+        uncovered = []
+        for model in models:
+            index_keys = [list(index.document['key'].items()) for index in model.indexes]
+            for query in model.queries:
+                if not any(_index_supports(keys, query) for keys in index_keys):
+                    uncovered.append(f"{model.__name__}.{query['name']}")
+        return uncovered
     
     def close(self):
-        self.client.close()
+        if self._client is not None and self._pid == os.getpid():
+            self._client.close()
+        self._client = None
+
+
+class LazyCollection:
+    """Collection proxy that looks the collection up on the current process's client"""
+    
+    def __init__(self, database, name):
+        self._database = database
+        self.name = name
+    
+    def __getattr__(self, attr):
+        return getattr(self._database.db[self.name], attr)
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Records how long threads wait to check a connection out of the pool"""
+    
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.checkout_failures = {}
+        self.in_use = 0
+        self.open_connections = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def _wait_time(self):
+        started = getattr(self._local, 'started', None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+    
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+    
+    def connection_checked_out(self, event):
+        wait = self._wait_time()
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._waits.append(wait)
+    
+    def connection_check_out_failed(self, event):
+        self._wait_time()
+        reason = str(event.reason)
+        with self._lock:
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(self.open_connections - 1, 0)
+    
+    def connection_ready(self, event):
+        pass
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+    
+    def snapshot(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                'checkouts': self.checkouts,
+                'checkout_failures': dict(self.checkout_failures),
+                'in_use': self.in_use,
+                'open_connections': self.open_connections,
+                'avg_wait_ms': (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                'max_wait_ms': self.max_wait * 1000,
+            }
+        for label, q in (('p50_wait_ms', 0.50), ('p95_wait_ms', 0.95), ('p99_wait_ms', 0.99)):
+            stats[label] = waits[min(int(q * len(waits)), len(waits) - 1)] * 1000 if waits else 0.0
+        return stats
+
+
+# Name suffix of the stand-in index built while an index is rebuilt
+REBUILD_SUFFIX = '__rebuild'
+
+INDEX_OPTIONS = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression')
+
+
+def _rebuild_index(collection, index, current):
+    """Replace an index whose declaration changed without leaving its queries unindexed; returns an error or None"""
+    spec = index.document
+    name = spec['name']
+    stand_in = f"{name}{REBUILD_SUFFIX}"
+    keys = list(spec['key'].items())
+    if '_id' not in spec['key']:
+        keys.append(('_id', 1))
+    try:
+        collection.create_index(keys, name=stand_in)
+    except OperationFailure as e:
+        return f"stand-in index could not be built, old index kept: {e}"
+    
+    collection.drop_index(name)
+    error = None
+    try:
+        collection.create_indexes([index])
+    except OperationFailure as e:
+        error = f"{e}; previous index restored"
+        options = {option: current[option] for option in INDEX_OPTIONS if option in current}
+        collection.create_index(list(current['key']), name=name, **options)
+    collection.drop_index(stand_in)
+    return error
+
+
+def _index_matches(current, spec):
+    """Compare an index_information() entry with a declared index document"""
+    if list(current['key']) != list(spec['key'].items()):
+        return False
+    for option in INDEX_OPTIONS:
+        if current.get(option) != spec.get(option):
+            # index_information() omits unique/sparse when they are false
+            if not (option in ('unique', 'sparse') and not current.get(option) and not spec.get(option)):
+                return False
+    return True
+
+
+def _index_supports(keys, query):
+    """Whether an index key list can serve a query shape without a scan or in-memory sort"""
+    equality = set(query.get('equality', ()))
+    sort = [(field, direction) for field, direction in query.get('sort', ()) if field not in equality]
+    ranges = set(query.get('range', ()))
+    
+    if len(keys) < len(equality) + len(sort):
+        return False
+    
+    prefix = keys[:len(equality)]
+    if {field for field, _ in prefix} != equality:
+        return False
+    
+    sort_keys = keys[len(equality):len(equality) + len(sort)]
+    if [field for field, _ in sort_keys] != [field for field, _ in sort]:
+        return False
+    if sort:
+        same = all(d == s for (_, d), (_, s) in zip(sort_keys, sort))
+        reversed_ = all(d == -s for (_, d), (_, s) in zip(sort_keys, sort))
+        if not (same or reversed_):
+            return False
+    
+    remaining = {field for field, _ in keys[len(equality) + len(sort):]}
+    return ranges <= remaining
 
 # Initialize database
 db = Database()
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, date
+from models.assessment import Assessment
+from models.speech_practice import SpeechPractice
+from models.daily_schedule_summary import DailyScheduleSummary
+from config.config import Config
+from utils.cache import TTLCache
+
+
+class AnalyticsController:
+    """Controller for server-side child progress analytics"""
+    
+    # Keyed by (child_name, parent_auth0_id, days, window). Entries are dropped
+    # when this process writes new records for the child and expire after the
+    # TTL, which bounds staleness from writes handled by other workers.
+    cache = TTLCache(max_entries=Config.ANALYTICS_CACHE_SIZE, ttl=Config.ANALYTICS_CACHE_TTL)
+    
+    @staticmethod
+    def get_child_progress(parent_auth0_id, child_name, days=30, window=7):
+        """
+        Get streaks, speech accuracy trend, activity counts and JHFT subtest trends
+        
+        Args:
+            parent_auth0_id: Parent requesting the analytics (scopes assessments)
+            child_name: Child to analyse
+            days: Number of days covered by the speech and activity series
+            window: Size of the rolling averages, in days with data
+        
+        Returns:
+            tuple: (progress: dict, error: str)
+        """
+        try:
+            days = max(1, min(days, 365))
+            window = max(1, min(window, 60))
+            key = (child_name, parent_auth0_id, days, window)
+            
+            progress = AnalyticsController.cache.get(key)
+            if progress is not None:
+                return progress, None
+            
+            today = datetime.utcnow().date()
+            start_date = (today - timedelta(days=days - 1)).isoformat()
+            
+            speech = SpeechPractice.score_trend(child_name, start_date, window)
+            activities = DailyScheduleSummary.activity_stats(child_name, start_date, window)
+            subtests = Assessment.subtest_trends(parent_auth0_id, child_name)
+            
+            active_dates = {practice['date'] for practice in speech}
+            active_dates.update(day['date'] for day in activities['per_day'] if day.get('total_completed'))
+            
+            accuracies = [practice['accuracy'] for practice in speech if practice.get('accuracy') is not None]
+            progress = {
+                'childName': child_name,
+                'startDate': start_date,
+                'endDate': today.isoformat(),
+                'streaks': AnalyticsController.compute_streaks(active_dates, today),
+                'speechPractice': {
+                    'sessions': len(speech),
+                    'averageAccuracy': sum(accuracies) / len(accuracies) if accuracies else None,
+                    'trend': speech
+                },
+                'dailyActivities': {
+                    'totalCompleted': sum(day.get('total_completed', 0) for day in activities['per_day']),
+                    'perDay': activities['per_day'],
+                    'perPreset': activities['per_preset']
+                },
+                'jhftSubtests': subtests
+            }
+            
+            AnalyticsController.cache.set(key, progress)
+            return progress, None
+        except Exception as e:
+            return None, str(e)
+    
+    @staticmethod
+    def compute_streaks(active_dates, today):
+        """
+        Current and longest runs of consecutive active days
+        
+        The current streak still counts when today has no activity yet, as long
+        as yesterday was active.
+        
+        Args:
+            active_dates: ISO date strings with at least one practice or activity
+            today: Current date
+        
+        Returns:
+            dict: {'current': int, 'longest': int}
+        """
+        days = {date.fromisoformat(d) for d in active_dates}
+        
+        current = 0
+        cursor = today if today in days else today - timedelta(days=1)
+        while cursor in days:
+            current += 1
+            cursor -= timedelta(days=1)
+        
+        longest = 0
+        run = 0
+        previous = None
+        for day in sorted(days):
+            run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+            longest = max(longest, run)
+            previous = day
+        
+        return {'current': current, 'longest': longest}
+    
+    @staticmethod
+    def invalidate(child_name=None, parent_auth0_id=None):
+        """Drop cached analytics for a child and/or a parent (everything if neither is given)"""
+        if child_name is None and parent_auth0_id is None:
+            AnalyticsController.cache.invalidate()
+            return
+        AnalyticsController.cache.invalidate(
+            lambda key: (child_name is not None and key[0] == child_name)
+            or (parent_auth0_id is not None and key[1] == parent_auth0_id)
+        )
@@ -1,4 +1,7 @@
 from models.assessment import Assessment
+from utils.pagination import encode_cursor, decode_cursor
+from controllers.analytics_controller import AnalyticsController
+from services.jhft_scoring import score_test_results, HANDS
 from flask import session
 
 class AssessmentController:
@@ -14,16 +17,30 @@ class AssessmentController:
             
             # Create assessment
             assessment = Assessment.create(parent_auth0_id, assessment_data)
+            AnalyticsController.invalidate(parent_auth0_id=parent_auth0_id)
             return assessment, None
         except Exception as e:
             return None, str(e)
     
     @staticmethod
-    def get_assessments_by_parent(parent_auth0_id, limit=100, skip=0):
-        """Get all assessments for a parent"""
+    def get_assessments_by_parent(parent_auth0_id, limit=100, skip=0, cursor=None, fields=None, view=None):
+        """
+        Get a page of assessments for a parent
+        
+        Returns:
+            tuple: ({'assessments': list, 'next_cursor': str or None, 'fields': list or None}, error)
+        """
         try:
-            assessments = Assessment.find_by_parent(parent_auth0_id, limit, skip)
-            return assessments, None
+            after = None
+            if cursor:
+                after = decode_cursor(cursor)
+                if after is None:
+                    return None, "Invalid cursor"
+            
+            projection, selected = Assessment.projection(fields, view)
+            assessments = Assessment.find_by_parent(parent_auth0_id, limit, skip, after, projection)
+            next_cursor = encode_cursor(assessments[-1]) if assessments and len(assessments) == limit else None
+            return {'assessments': assessments, 'next_cursor': next_cursor, 'fields': selected}, None
         except Exception as e:
             return None, str(e)
     
@@ -43,6 +60,42 @@ class AssessmentController:
         except Exception as e:
             return None, str(e)
     
+    @staticmethod
+    def get_assessment_scores(assessment_id, parent_auth0_id, hand=None):
+        """
+        Score an assessment's JHFT results against the local normative tables
+        
+        Args:
+            assessment_id: Assessment to score
+            parent_auth0_id: Requesting parent (ownership check)
+            hand: 'dominant' or 'non-dominant'; defaults to the dominant hand
+            
+        Returns:
+            tuple: (scores: dict, error: str)
+        """
+        if hand and hand not in HANDS:
+            return None, f"hand must be one of {', '.join(HANDS)}"
+        
+        assessment, error = AssessmentController.get_assessment_by_id(assessment_id, parent_auth0_id)
+        if error:
+            return None, error
+        
+        try:
+            child_info = assessment.get('child_info') or {}
+            scores = score_test_results(
+                assessment.get('test_results') or [],
+                child_info.get('age'),
+                hand or 'dominant'
+            )
+            if scores is None:
+                return None, "Child age is missing or invalid"
+            
+            scores['assessmentId'] = assessment['_id']
+            scores['dominantHand'] = child_info.get('dominantHand')
+            return scores, None
+        except Exception as e:
+            return None, str(e)
+    
     @staticmethod
     def get_assessments_by_child(parent_auth0_id, child_name):
         """Get all assessments for a specific child"""
@@ -56,17 +109,14 @@ class AssessmentController:
     def update_assessment(assessment_id, parent_auth0_id, update_data):
         """Update an assessment (with authorization check)"""
         try:
-            # Check if assessment exists and belongs to parent
-            assessment = Assessment.find_by_id(assessment_id)
-            if not assessment:
+            # Ownership is checked by the update filter itself
+            status = Assessment.update_for_parent(assessment_id, parent_auth0_id, update_data)
+            if status == 'not_found':
                 return False, "Assessment not found"
-            
-            if assessment.get('parent_auth0_id') != parent_auth0_id:
+            if status == 'forbidden':
                 return False, "Unauthorized"
-            
-            # Update assessment
-            success = Assessment.update(assessment_id, update_data)
-            return success, None if success else "Update failed"
+            AnalyticsController.invalidate(parent_auth0_id=parent_auth0_id)
+            return True, None
         except Exception as e:
             return False, str(e)
     
@@ -74,24 +124,21 @@ class AssessmentController:
     def delete_assessment(assessment_id, parent_auth0_id):
         """Delete an assessment (with authorization check)"""
         try:
-            # Check if assessment exists and belongs to parent
-            assessment = Assessment.find_by_id(assessment_id)
-            if not assessment:
+            # Ownership is checked by the delete filter itself
+            status = Assessment.delete_for_parent(assessment_id, parent_auth0_id)
+            if status == 'not_found':
                 return False, "Assessment not found"
-            
-            if assessment.get('parent_auth0_id') != parent_auth0_id:
+            if status == 'forbidden':
                 return False, "Unauthorized"
-            
-            # Delete assessment
-            success = Assessment.delete(assessment_id)
-            return success, None if success else "Delete failed"
+            AnalyticsController.invalidate(parent_auth0_id=parent_auth0_id)
+            return True, None
         except Exception as e:
             return False, str(e)
     
     @staticmethod
-    def format_assessment_response(assessment):
-        """Format assessment for API response"""
-        return {
+    def format_assessment_response(assessment, fields=None):
+        """Format assessment for API response, keeping only `fields` (plus id) when given"""
+        response = {
             'id': assessment.get('_id'),
             'childInfo': assessment.get('child_info'),
             'testResults': assessment.get('test_results'),
@@ -102,3 +149,6 @@ class AssessmentController:
             'createdAt': assessment.get('created_at').isoformat() if assessment.get('created_at') else None,
             'updatedAt': assessment.get('updated_at').isoformat() if assessment.get('updated_at') else None
         }
+        if fields is not None:
+            response = {key: value for key, value in response.items() if key == 'id' or key in fields}
+        return response
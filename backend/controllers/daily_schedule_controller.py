@@ -1,26 +1,128 @@
 from models.daily_schedule_activity import DailyScheduleActivity
+from models.daily_schedule_summary import DailyScheduleSummary
+from controllers.analytics_controller import AnalyticsController
+from datetime import datetime, timedelta, timezone
 
 class DailyScheduleController:
+    REQUIRED_FIELDS = ['child_name', 'preset_type', 'task_id', 'task_title']
+    MAX_BATCH_SIZE = 500
+    
+    @staticmethod
+    def validate_activity(activity_data):
+        """Return an error message for an invalid activity, or None"""
+        if not isinstance(activity_data, dict):
+            return "Activity must be an object"
+        for field in DailyScheduleController.REQUIRED_FIELDS:
+            if field not in activity_data:
+                return f"Missing required field: {field}"
+        return None
+    
+    @staticmethod
+    def parse_completed_at(value):
+        """
+        Parse a client-side ISO-8601 completion time into a naive UTC datetime
+        
+        Returns:
+            tuple: (datetime or None, error)
+        """
+        if value is None:
+            return None, None
+        try:
+            completed_at = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None, "Invalid completed_at timestamp"
+        if completed_at.tzinfo is not None:
+            completed_at = completed_at.astimezone(timezone.utc).replace(tzinfo=None)
+        if completed_at > datetime.utcnow() + timedelta(minutes=5):
+            return None, "completed_at is in the future"
+        return completed_at, None
+    
     @staticmethod
     def save_activity(activity_data):
         """Save a completed daily schedule activity"""
         try:
             # Validate required fields
-            required_fields = ['child_name', 'preset_type', 'task_id', 'task_title']
-            for field in required_fields:
-                if field not in activity_data:
-                    return None, f"Missing required field: {field}"
+            error = DailyScheduleController.validate_activity(activity_data)
+            if error:
+                return None, error
             
             activity = DailyScheduleActivity.create(activity_data)
+            # The activity is stored; failing now would make the client retry and save it twice
+            DailyScheduleController.record_summaries([activity])
+            AnalyticsController.invalidate(child_name=activity['child_name'])
             return activity, None
         except Exception as e:
             return None, str(e)
     
     @staticmethod
-    def get_today_activities(child_name):
-        """Get all activities completed today by a child"""
+    def record_summaries(activities):
+        """
+        Update the daily rollups for stored activities without failing the request
+        
+        When the update fails the affected days' rollups are dropped, so they
+        are rebuilt from the raw activities on their next read instead of
+        drifting.
+        """
+        try:
+            DailyScheduleSummary.record(activities)
+        except Exception as e:
+            print(f"Daily summary update failed: {str(e)}")
+            for child_name, date_str in {(activity['child_name'], activity['date']) for activity in activities}:
+                try:
+                    DailyScheduleSummary.invalidate_day(child_name, date_str)
+                except Exception as e:
+                    print(f"Daily summary invalidation failed for {child_name} {date_str}: {str(e)}")
+    
+    @staticmethod
+    def save_activities(activities):
+        """
+        Save a batch of completed activities (e.g. replayed after being offline)
+        
+        Every item is validated with the same rules as save_activity; valid items
+        are written in one bulk insert that keeps their client-side `completed_at`.
+        
+        Returns:
+            tuple: (results: list of per-item dicts, error)
+        """
+        try:
+            if not isinstance(activities, list) or not activities:
+                return None, "activities must be a non-empty list"
+            if len(activities) > DailyScheduleController.MAX_BATCH_SIZE:
+                return None, f"At most {DailyScheduleController.MAX_BATCH_SIZE} activities per batch"
+            
+            results = [None] * len(activities)
+            valid_indexes = []
+            valid_activities = []
+            for index, activity_data in enumerate(activities):
+                error = DailyScheduleController.validate_activity(activity_data)
+                completed_at = None
+                if not error:
+                    completed_at, error = DailyScheduleController.parse_completed_at(activity_data.get('completed_at'))
+                if error:
+                    results[index] = {'index': index, 'status': 'invalid', 'error': error}
+                    continue
+                valid_indexes.append(index)
+                valid_activities.append(dict(activity_data, completed_at=completed_at))
+            
+            created = DailyScheduleActivity.create_many(valid_activities)
+            saved = [outcome for outcome in created if 'error' not in outcome]
+            DailyScheduleController.record_summaries(saved)
+            for child_name in {activity['child_name'] for activity in saved}:
+                AnalyticsController.invalidate(child_name=child_name)
+            for index, outcome in zip(valid_indexes, created):
+                if 'error' in outcome:
+                    results[index] = {'index': index, 'status': 'failed', 'error': outcome['error']}
+                else:
+                    results[index] = {'index': index, 'status': 'created', 'activity': outcome}
+            return results, None
+        except Exception as e:
+            return None, str(e)
+    
+    @staticmethod
+    def get_today_activities(child_name, include_activities=True):
+        """Get today's completion summary for a child from its daily rollup"""
         try:
-            summary = DailyScheduleActivity.get_today_summary(child_name)
+            summary = DailyScheduleSummary.get_for_day(child_name, include_activities=include_activities)
             return summary, None
         except Exception as e:
             return None, str(e)
@@ -1,5 +1,16 @@
+import re
 from flask import jsonify, request
-from services.ondemand_service import generate_ice_breaker_response
+from services.ondemand_service import generate_ice_breaker_response, stream_ice_breaker_response
+from utils.sse import sse_response
+
+# Client-generated conversation ids (e.g. a UUID), long enough not to be guessed
+CONVERSATION_ID = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+def wants_stream(data):
+    """Whether the client asked for a streamed reply ("stream": true, ?stream=true or Accept: text/event-stream)"""
+    if data.get('stream') is True or request.args.get('stream', '').lower() in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == 'text/event-stream'
 
 def chat():
     """Handle Ice Breaker chat messages"""
@@ -11,8 +22,20 @@ def chat():
         
         user_message = data['message']
         
+        # Optional id under which recent turns are remembered as context
+        conversation_id = data.get('conversation_id')
+        if conversation_id is not None and not (isinstance(conversation_id, str) and CONVERSATION_ID.match(conversation_id)):
+            return jsonify({'error': 'conversation_id must be 16-64 letters, digits, "-" or "_"'}), 400
+        
+        # Relay the reply as Server-Sent Events while it is generated
+        if wants_stream(data):
+            return sse_response(
+                (event, {'text': payload} if event == 'chunk' else dict(payload, status='success'))
+                for event, payload in stream_ice_breaker_response(user_message, conversation_id=conversation_id)
+            )
+        
         # Generate friendly, autism-appropriate response
-        response = generate_ice_breaker_response(user_message)
+        response = generate_ice_breaker_response(user_message, conversation_id=conversation_id)
         
         return jsonify({
             'response': response,
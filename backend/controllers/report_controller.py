@@ -1,11 +1,56 @@
+import os
+import math
+import time
+import uuid
+import socket
+from pymongo.errors import DuplicateKeyError
 from models.report import Report
+from models.report_job import ReportJob
+from models.lease import Lease
 from models.assessment import Assessment
 from services.ondemand_service import OnDemandService
+from services.job_worker import JobWorker, RetryJob
+from utils.single_flight import SingleFlight
+from utils.heartbeat import Heartbeat
+from config.config import Config
 
 class ReportController:
+    # Background threads that run queued report jobs (started on a serving process's first request)
+    worker = JobWorker(
+        ReportJob,
+        lambda job: ReportController.run_job(job),
+        threads=Config.REPORT_WORKERS,
+        poll_interval=Config.REPORT_JOB_POLL_INTERVAL,
+        lease_seconds=Config.REPORT_JOB_LEASE_SECONDS,
+        max_attempts=Config.REPORT_JOB_MAX_ATTEMPTS,
+        name='report-worker',
+        # Queued jobs wait rather than fail while OnDemand is unavailable or every report slot is taken
+        paused=lambda: OnDemandService.breaker.is_open() or not OnDemandService.bulkheads['report'].has_free_slot()
+    )
+    
+    # Error returned while the OnDemand circuit breaker is open, the report bulkhead is full
+    # or too many report jobs are already queued
+    UNAVAILABLE = "Report generation is temporarily unavailable"
+    
+    # Concurrent generations of the same assessment in this process share one call
+    inflight = SingleFlight()
+    
     @staticmethod
     def generate_report(assessment_id, parent_auth0_id):
-        """Generate a report for an assessment"""
+        """
+        Generate a report for an assessment, at most once at a time per assessment
+        
+        Callers in this process share one in-flight generation; across
+        processes a Mongo lease elects a single generator and the others wait
+        for the report it stores.
+        """
+        return ReportController.inflight.do(
+            (assessment_id, parent_auth0_id),
+            lambda: ReportController._generate_report(assessment_id, parent_auth0_id)
+        )
+    
+    @staticmethod
+    def _generate_report(assessment_id, parent_auth0_id):
         try:
             # Check if report already exists
             existing_report = Report.find_by_assessment(assessment_id)
@@ -21,21 +66,256 @@ class ReportController:
             if assessment.get('parent_auth0_id') != parent_auth0_id:
                 return None, "Unauthorized"
             
-            # Generate report using OnDemand API
-            report_data, error = OnDemandService.generate_assessment_report(
-                assessment, 
-                parent_auth0_id
-            )
+            # Only one process generates; the others wait for its report
+            lease_key = f"report:{assessment_id}"
+            owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+            deadline = time.monotonic() + Config.REPORT_LEASE_WAIT
+            while not Lease.acquire(lease_key, owner, Config.REPORT_LEASE_SECONDS):
+                if time.monotonic() > deadline:
+                    return None, "Report generation already in progress"
+                time.sleep(Config.REPORT_JOB_POLL_INTERVAL)
+                existing_report = Report.find_by_assessment(assessment_id)
+                if existing_report:
+                    return existing_report, None
             
+            try:
+                # The previous holder may have stored the report just before releasing
+                existing_report = Report.find_by_assessment(assessment_id)
+                if existing_report:
+                    return existing_report, None
+                
+                # Generate report using OnDemand API, holding the lease for as long as it takes
+                with ReportController._lease_heartbeat(lease_key, owner):
+                    report_data, error = OnDemandService.generate_assessment_report(
+                        assessment, 
+                        parent_auth0_id
+                    )
+                
+                if error:
+                    return None, error
+                
+                # Save report to database (reports.assessment_id is unique)
+                try:
+                    report = Report.create(assessment_id, parent_auth0_id, report_data)
+                except DuplicateKeyError:
+                    # Another worker stored a report for this assessment first
+                    report = Report.find_by_assessment(assessment_id)
+                return report, None
+            finally:
+                Lease.release(lease_key, owner)
+        except Exception as e:
+            return None, str(e)
+    
+    @staticmethod
+    def _lease_heartbeat(lease_key, owner):
+        """Keep a report lease from expiring while its holder is still generating"""
+        return Heartbeat(
+            Config.REPORT_LEASE_SECONDS / 3,
+            lambda: Lease.renew(lease_key, owner, Config.REPORT_LEASE_SECONDS),
+            name='report-lease'
+        )
+    
+    @staticmethod
+    def stream_report(assessment_id, parent_auth0_id):
+        """
+        Generate a report while streaming its text
+        
+        Returns:
+            tuple: (events: generator of (event, data) pairs, error: str).
+                   Events are 'status', 'chunk' ({'text'}), 'done' ({'report'})
+                   and 'error' ({'error'}).
+        """
+        try:
+            existing_report = Report.find_by_assessment(assessment_id)
+            if existing_report:
+                if existing_report.get('parent_auth0_id') != parent_auth0_id:
+                    return None, "Unauthorized"
+                return ReportController._replay_report(existing_report), None
+            
+            assessment = Assessment.find_by_id(assessment_id)
+            if not assessment:
+                return None, "Assessment not found"
+            
+            if assessment.get('parent_auth0_id') != parent_auth0_id:
+                return None, "Unauthorized"
+            
+            # Refuse at once rather than queue behind a failing upstream or a full bulkhead
+            if OnDemandService.breaker.is_open() or OnDemandService.bulkheads['report'].is_full():
+                return None, ReportController.UNAVAILABLE
+            
+            return ReportController._stream_generation(assessment, assessment_id, parent_auth0_id), None
+        except Exception as e:
+            return None, str(e)
+    
+    @staticmethod
+    def _replay_report(report):
+        yield 'chunk', {'text': report.get('report_content') or ''}
+        yield 'done', {'report': report}
+    
+    @staticmethod
+    def _stream_generation(assessment, assessment_id, parent_auth0_id):
+        lease_key = f"report:{assessment_id}"
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        if not Lease.acquire(lease_key, owner, Config.REPORT_LEASE_SECONDS):
+            # Another request is already generating this report; wait for it
+            # rather than paying for a second generation
+            yield 'status', {'status': 'waiting'}
+            report, error = ReportController.generate_report(assessment_id, parent_auth0_id)
             if error:
-                return None, error
+                yield 'error', {'error': error}
+                return
+            yield from ReportController._replay_report(report)
+            return
+        
+        try:
+            existing_report = Report.find_by_assessment(assessment_id)
+            if existing_report:
+                yield from ReportController._replay_report(existing_report)
+                return
             
-            # Save report to database
-            report = Report.create(assessment_id, parent_auth0_id, report_data)
-            return report, None
+            yield 'status', {'status': 'generating'}
+            with ReportController._lease_heartbeat(lease_key, owner):
+                for event, data in OnDemandService.stream_assessment_report(assessment, parent_auth0_id):
+                    if event == 'chunk':
+                        yield 'chunk', {'text': data}
+                    elif event == 'error':
+                        yield 'error', {'error': data}
+                        return
+                    else:
+                        try:
+                            report = Report.create(assessment_id, parent_auth0_id, data)
+                        except DuplicateKeyError:
+                            report = Report.find_by_assessment(assessment_id)
+                        yield 'done', {'report': report}
+        except Exception as e:
+            yield 'error', {'error': str(e)}
+        finally:
+            Lease.release(lease_key, owner)
+    
+    @staticmethod
+    def enqueue_report(assessment_id, parent_auth0_id):
+        """
+        Queue report generation for an assessment
+        
+        Returns:
+            tuple: ({'report': dict} when a report already exists, otherwise
+                   {'job': dict}, error: str)
+        """
+        try:
+            existing_report = Report.find_by_assessment(assessment_id)
+            if existing_report:
+                if existing_report.get('parent_auth0_id') != parent_auth0_id:
+                    return None, "Unauthorized"
+                return {'report': existing_report}, None
+            
+            assessment = Assessment.find_by_id(assessment_id)
+            if not assessment:
+                return None, "Assessment not found"
+            
+            if assessment.get('parent_auth0_id') != parent_auth0_id:
+                return None, "Unauthorized"
+            
+            if OnDemandService.breaker.is_open():
+                return None, ReportController.UNAVAILABLE
+            
+            # Asking again for an assessment that is already queued never adds load
+            job = ReportJob.find_active(assessment_id)
+            if job:
+                return {'job': ReportController.format_job(job)}, None
+            
+            # Backpressure: refuse new work rather than let the queue grow without bound
+            if ReportJob.queued_count() >= Config.REPORT_JOB_MAX_QUEUED:
+                return None, ReportController.UNAVAILABLE
+            
+            job = ReportJob.enqueue(assessment_id, parent_auth0_id)
+            ReportController.worker.notify()
+            return {'job': ReportController.format_job(job)}, None
         except Exception as e:
             return None, str(e)
     
+    @staticmethod
+    def retry_after():
+        """Whole seconds a client should wait before retrying an unavailable request"""
+        if OnDemandService.breaker.is_open():
+            return max(1, math.ceil(OnDemandService.breaker.retry_after()))
+        retry_after = OnDemandService.bulkheads['report'].retry_after()
+        
+        queued = ReportJob.queued_count()
+        if queued >= Config.REPORT_JOB_MAX_QUEUED:
+            # Time for the workers to work the queue back under the limit, from this process's job times
+            average_run = ReportController.worker.stats()['avg_run_time_ms'] / 1000 or Config.ONDEMAND_REPORT_READ_TIMEOUT
+            excess = queued - Config.REPORT_JOB_MAX_QUEUED + 1
+            retry_after = max(retry_after, average_run * excess / max(1, Config.REPORT_WORKERS))
+        return max(1, math.ceil(retry_after))
+    
+    @staticmethod
+    def run_job(job):
+        """Worker handler: generate and store the report for a claimed job"""
+        report, error = ReportController.generate_report(job['assessment_id'], job['parent_auth0_id'])
+        if error == OnDemandService.BUSY or (error and OnDemandService.breaker.is_open()):
+            # Refused by a full report bulkhead or by (or failed into) the open circuit
+            # breaker; the job waits for a slot or for upstream to recover
+            raise RetryJob(error)
+        if error:
+            return None, error
+        return report['_id'], None
+    
+    @staticmethod
+    def get_job(job_id, parent_auth0_id, wait=0):
+        """
+        Get a report job's status, optionally waiting for it to finish
+        
+        Args:
+            job_id: Job to look up
+            parent_auth0_id: Parent polling the job (must own it)
+            wait: Seconds to wait for a queued/running job to finish
+                  (capped by Config.REPORT_JOB_MAX_WAIT)
+        
+        Returns:
+            tuple: (job: dict, error: str)
+        """
+        try:
+            deadline = time.monotonic() + max(0, min(wait, Config.REPORT_JOB_MAX_WAIT))
+            while True:
+                job = ReportJob.find_by_id(job_id)
+                if not job:
+                    return None, "Job not found"
+                
+                if job.get('parent_auth0_id') != parent_auth0_id:
+                    return None, "Unauthorized"
+                
+                remaining = deadline - time.monotonic()
+                if job['status'] in ReportJob.FINISHED or remaining <= 0:
+                    break
+                # Woken early when a job finishes in this process; jobs run by
+                # other workers are picked up on the next poll
+                ReportController.worker.wait(min(remaining, Config.REPORT_JOB_POLL_INTERVAL))
+            
+            report = None
+            if job['status'] == ReportJob.SUCCEEDED:
+                report = Report.find_by_id(job.get('report_id'))
+            return ReportController.format_job(job, report), None
+        except Exception as e:
+            return None, str(e)
+    
+    @staticmethod
+    def format_job(job, report=None):
+        """Format a report job for the API"""
+        response = {
+            'job_id': job['_id'],
+            'assessment_id': job['assessment_id'],
+            'status': job['status'],
+            'attempts': job.get('attempts', 0),
+            'created_at': job.get('created_at'),
+            'started_at': job.get('started_at'),
+            'finished_at': job.get('finished_at'),
+            'error': job.get('error'),
+            'status_url': f"/api/reports/jobs/{job['_id']}"
+        }
+        if report is not None:
+            response['report'] = report
+        return response
+    
     @staticmethod
     def get_report_by_assessment(assessment_id, parent_auth0_id):
         """Get report for a specific assessment"""
@@ -53,10 +333,11 @@ class ReportController:
             return None, str(e)
     
     @staticmethod
-    def get_reports_by_parent(parent_auth0_id, limit=50):
-        """Get all reports for a parent"""
+    def get_reports_by_parent(parent_auth0_id, limit=50, fields=None, view=None):
+        """Get all reports for a parent, optionally as a projection (fields / view='summary')"""
         try:
-            reports = Report.find_by_parent(parent_auth0_id, limit)
+            projection, _ = Report.projection(fields, view)
+            reports = Report.find_by_parent(parent_auth0_id, limit, projection)
             return reports, None
         except Exception as e:
             return None, str(e)
@@ -65,17 +346,12 @@ class ReportController:
     def delete_report(report_id, parent_auth0_id):
         """Delete a report"""
         try:
-            # Get report and verify ownership
-            report = Report.find_by_id(report_id)
-            if not report:
+            # Ownership is checked by the delete filter itself
+            status = Report.delete_for_parent(report_id, parent_auth0_id)
+            if status == 'not_found':
                 return None, "Report not found"
-            
-            if report.get('parent_auth0_id') != parent_auth0_id:
+            if status == 'forbidden':
                 return None, "Unauthorized"
-            
-            success = Report.delete(report_id)
-            if success:
-                return {"message": "Report deleted successfully"}, None
-            return None, "Failed to delete report"
+            return {"message": "Report deleted successfully"}, None
         except Exception as e:
             return None, str(e)
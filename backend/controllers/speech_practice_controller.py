@@ -1,4 +1,5 @@
 from models.speech_practice import SpeechPractice
+from controllers.analytics_controller import AnalyticsController
 from datetime import datetime
 
 class SpeechPracticeController:
@@ -12,13 +13,11 @@ class SpeechPracticeController:
                 if field not in practice_data:
                     return None, f"Missing required field: {field}"
             
-            # Check if already completed today
-            today_practice = SpeechPractice.find_by_child_and_date(child_name)
-            if today_practice:
+            # Create today's record atomically; None means it already exists
+            practice = SpeechPractice.create_once_per_day(child_name, practice_data)
+            if practice is None:
                 return None, "Already completed today"
-            
-            # Create practice record
-            practice = SpeechPractice.create(child_name, practice_data)
+            AnalyticsController.invalidate(child_name=child_name)
             return practice, None
         except Exception as e:
             return None, str(e)
@@ -47,6 +46,7 @@ class SpeechPracticeController:
         try:
             success = SpeechPractice.update(practice_id, update_data)
             if success:
+                AnalyticsController.invalidate()
                 return {"message": "Practice updated successfully"}, None
             return None, "Failed to update practice"
         except Exception as e:
@@ -58,6 +58,7 @@ class SpeechPracticeController:
         try:
             success = SpeechPractice.delete(practice_id)
             if success:
+                AnalyticsController.invalidate()
                 return {"message": "Practice deleted successfully"}, None
             return None, "Failed to delete practice"
         except Exception as e:
@@ -1,4 +1,5 @@
 from models.user import User
+from utils.pagination import encode_cursor, decode_cursor
 from datetime import datetime
 
 
@@ -75,18 +76,27 @@ class UserController:
         return User.delete(auth0_id)
     
     @staticmethod
-    def get_all_users(limit=100, skip=0):
+    def get_all_users(limit=100, skip=0, cursor=None):
         """
         Get all users with pagination
         
         Args:
             limit: Maximum number of users to return
-            skip: Number of users to skip
+            skip: Number of users to skip (ignored when cursor is given)
+            cursor: Opaque cursor returned as next_cursor by a previous page
             
         Returns:
-            list: List of user dictionaries
+            tuple: (users: list, next_cursor: str or None), or None if the cursor is invalid
         """
-        return User.get_all(limit, skip)
+        after = None
+        if cursor:
+            after = decode_cursor(cursor)
+            if after is None:
+                return None
+        
+        users = User.get_all(limit, skip, after)
+        next_cursor = encode_cursor(users[-1]) if users and len(users) == limit else None
+        return users, next_cursor
     
     @staticmethod
     def format_user_response(user):
@@ -1,4 +1,16 @@
 # This file makes the models directory a package
 from models.user import User
+from models.assessment import Assessment
+from models.speech_practice import SpeechPractice
+from models.report import Report
+from models.report_job import ReportJob
+from models.daily_schedule_activity import DailyScheduleActivity
+from models.daily_schedule_summary import DailyScheduleSummary
+from models.lease import Lease
+from models.chat_conversation import ChatConversation
 
-__all__ = ['User']
+# Every model whose indexes are managed through Database.ensure_indexes
+ALL_MODELS = [User, Assessment, SpeechPractice, Report, ReportJob, DailyScheduleActivity, DailyScheduleSummary, Lease,
+              ChatConversation]
+
+__all__ = ['User', 'Assessment', 'SpeechPractice', 'Report', 'ReportJob', 'DailyScheduleActivity', 'DailyScheduleSummary', 'Lease', 'ChatConversation', 'ALL_MODELS']
@@ -1,10 +1,46 @@
 from datetime import datetime
 from config.database import db
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from utils.pagination import keyset_filter, KEYSET_SORT
+from utils.projection import build_projection
 
 class Assessment:
     collection = db.assessments
     
+    indexes = [
+        IndexModel([('parent_auth0_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                   name='parent_created_at'),
+        IndexModel([('parent_auth0_id', ASCENDING), ('child_info.name', ASCENDING), ('created_at', DESCENDING)],
+                   name='parent_child_created_at'),
+    ]
+    
+    queries = [
+        {'name': 'find_by_parent', 'equality': ['parent_auth0_id'], 'sort': KEYSET_SORT},
+        {'name': 'find_by_child', 'equality': ['parent_auth0_id', 'child_info.name'], 'sort': [('created_at', -1)]},
+        {'name': 'get_all_for_parent', 'equality': ['parent_auth0_id'], 'sort': [('created_at', -1)]},
+        {'name': 'subtest_trends', 'equality': ['parent_auth0_id', 'child_info.name']},
+    ]
+    
+    # API field name -> document field, for `fields=` / `view=` projections
+    FIELDS = {
+        'childInfo': 'child_info',
+        'testResults': 'test_results',
+        'totalTime': 'total_time',
+        'observations': 'observations',
+        'assessmentDate': 'assessment_date',
+        'assessmentType': 'assessment_type',
+        'createdAt': 'created_at',
+        'updatedAt': 'updated_at'
+    }
+    SUMMARY_FIELDS = ['childInfo', 'totalTime', 'assessmentDate', 'assessmentType', 'createdAt']
+    
+    @staticmethod
+    def projection(fields=None, view=None):
+        """Build a projection from API field names or a view name ('summary' / 'full')"""
+        return build_projection(Assessment.FIELDS, fields, view, Assessment.SUMMARY_FIELDS)
+    
     @staticmethod
     def create(parent_auth0_id, assessment_data):
         """Create a new assessment for a child"""
@@ -25,11 +61,21 @@ class Assessment:
         return data
     
     @staticmethod
-    def find_by_parent(parent_auth0_id, limit=100, skip=0):
-        """Find all assessments for a parent"""
+    def find_by_parent(parent_auth0_id, limit=100, skip=0, after=None, projection=None):
+        """
+        Find assessments for a parent, newest first
+        
+        Pages either by keyset (`after` is a decoded cursor) or, for older
+        clients, by offset (`skip`, ignored when `after` is given). A
+        projection restricts the fields loaded from the database.
+        """
         assessments = Assessment.collection.find(
-            {'parent_auth0_id': parent_auth0_id}
-        ).sort('created_at', -1).limit(limit).skip(skip)
+            keyset_filter({'parent_auth0_id': parent_auth0_id}, after),
+            projection
+        ).sort(KEYSET_SORT)
+        if skip and after is None:
+            assessments = assessments.skip(skip)
+        assessments = assessments.limit(limit)
         
         result = []
         for assessment in assessments:
@@ -75,6 +121,58 @@ class Assessment:
         except:
             return False
     
+    @staticmethod
+    def update_for_parent(assessment_id, parent_auth0_id, update_data):
+        """
+        Update an assessment only if it belongs to the given parent
+        
+        Ownership is part of the write filter, so a successful update is a single
+        round trip; only a miss costs a lookup to tell "not found" from "forbidden".
+        
+        Returns:
+            str: 'ok', 'not_found' or 'forbidden'
+        """
+        try:
+            object_id = ObjectId(assessment_id)
+        except (InvalidId, TypeError):
+            return 'not_found'
+        
+        update_data = {k: v for k, v in update_data.items() if k not in ('_id', 'parent_auth0_id')}
+        update_data['updated_at'] = datetime.utcnow()
+        result = Assessment.collection.update_one(
+            {'_id': object_id, 'parent_auth0_id': parent_auth0_id},
+            {'$set': update_data}
+        )
+        if result.matched_count:
+            return 'ok'
+        return Assessment._miss_reason(object_id)
+    
+    @staticmethod
+    def delete_for_parent(assessment_id, parent_auth0_id):
+        """
+        Delete an assessment only if it belongs to the given parent
+        
+        Returns:
+            str: 'ok', 'not_found' or 'forbidden'
+        """
+        try:
+            object_id = ObjectId(assessment_id)
+        except (InvalidId, TypeError):
+            return 'not_found'
+        
+        result = Assessment.collection.delete_one(
+            {'_id': object_id, 'parent_auth0_id': parent_auth0_id}
+        )
+        if result.deleted_count:
+            return 'ok'
+        return Assessment._miss_reason(object_id)
+    
+    @staticmethod
+    def _miss_reason(object_id):
+        """Explain why an owner-scoped write matched nothing"""
+        exists = Assessment.collection.count_documents({'_id': object_id}, limit=1)
+        return 'forbidden' if exists else 'not_found'
+    
     @staticmethod
     def delete(assessment_id):
         """Delete an assessment"""
@@ -85,10 +183,11 @@ class Assessment:
             return False
     
     @staticmethod
-    def get_all_for_parent(parent_auth0_id):
+    def get_all_for_parent(parent_auth0_id, projection=None):
         """Get all assessments for a parent with child grouping"""
         assessments = Assessment.collection.find(
-            {'parent_auth0_id': parent_auth0_id}
+            {'parent_auth0_id': parent_auth0_id},
+            projection
         ).sort('created_at', -1)
         
         result = []
@@ -96,3 +195,47 @@ class Assessment:
             assessment['_id'] = str(assessment['_id'])
             result.append(assessment)
         return result
+    
+    @staticmethod
+    def subtest_trends(parent_auth0_id, child_name):
+        """
+        Per-subtest JHFT completion times across a child's assessments
+        
+        Returns:
+            list: [{'test', 'points': [{'assessment_id', 'created_at', 'time', 'change', 'best_time'}]}]
+                  where change is the difference from the previous assessment
+        """
+        pipeline = [
+            {'$match': {'parent_auth0_id': parent_auth0_id, 'child_info.name': child_name}},
+            {'$unwind': '$test_results'},
+            {'$project': {
+                '_id': 0,
+                'assessment_id': {'$toString': '$_id'},
+                'created_at': 1,
+                'test': {'$ifNull': ['$test_results.testName', '$test_results.name']},
+                'time': {'$ifNull': ['$test_results.timeInSeconds', '$test_results.time']}
+            }},
+            {'$match': {'time': {'$type': 'number'}}},
+            {'$setWindowFields': {
+                'partitionBy': '$test',
+                'sortBy': {'created_at': 1},
+                'output': {
+                    'previous_time': {'$shift': {'output': '$time', 'by': -1}},
+                    'best_time': {'$min': '$time', 'window': {'documents': ['unbounded', 'current']}}
+                }
+            }},
+            {'$sort': {'test': 1, 'created_at': 1}},
+            {'$group': {
+                '_id': '$test',
+                'points': {'$push': {
+                    'assessment_id': '$assessment_id',
+                    'created_at': '$created_at',
+                    'time': '$time',
+                    'change': {'$subtract': ['$time', '$previous_time']},
+                    'best_time': '$best_time'
+                }}
+            }},
+            {'$sort': {'_id': 1}},
+            {'$project': {'_id': 0, 'test': '$_id', 'points': 1}}
+        ]
+        return list(Assessment.collection.aggregate(pipeline))
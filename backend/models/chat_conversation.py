@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+from config.database import db
+from pymongo import IndexModel, ASCENDING, ReturnDocument
+
+class ChatConversation:
+    """
+    Recent Ice Breaker turns per conversation, shared by every worker process
+    
+    One document per conversation id holding its last turns (capped with
+    $slice) and the total number of turns so far. Conversations that see no
+    new turn for the configured TTL are removed by a TTL index.
+    """
+    collection = db.chat_conversations
+    
+    indexes = [
+        IndexModel([('expires_at', ASCENDING)], name='expires_at_ttl', expireAfterSeconds=0),
+    ]
+    
+    # Conversations are only read and written by _id
+    queries = []
+    
+    @staticmethod
+    def find_by_id(conversation_id):
+        """Return {'turns': [...], 'seq': int} for a conversation, or None"""
+        return ChatConversation.collection.find_one({'_id': conversation_id}, {'turns': 1, 'seq': 1})
+    
+    @staticmethod
+    def append(conversation_id, turn, max_turns, ttl):
+        """
+        Add a turn, keeping only the last max_turns
+        
+        Args:
+            conversation_id: Client-chosen conversation id
+            turn: {'id': str, 'child': str, 'reply': str}
+            max_turns: Turns kept per conversation
+            ttl: Seconds the conversation is kept after this turn
+        
+        Returns:
+            dict: The updated {'turns', 'seq'}
+        """
+        now = datetime.utcnow()
+        return ChatConversation.collection.find_one_and_update(
+            {'_id': conversation_id},
+            {
+                '$push': {'turns': {'$each': [turn], '$slice': -max_turns}},
+                '$inc': {'seq': 1},
+                '$set': {'updated_at': now, 'expires_at': now + timedelta(seconds=ttl)}
+            },
+            projection={'turns': 1, 'seq': 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    
+    @staticmethod
+    def set_late_reply(conversation_id, turn_id, reply):
+        """Store the upstream reply that arrived after a turn was answered locally"""
+        ChatConversation.collection.update_one(
+            {'_id': conversation_id},
+            {'$set': {'turns.$[turn].late_reply': reply}},
+            array_filters=[{'turn.id': turn_id}]
+        )
@@ -1,10 +1,24 @@
 from datetime import datetime
 from config.database import db
 from bson import ObjectId
+from pymongo import IndexModel, ASCENDING
+from pymongo.errors import BulkWriteError
 
 class DailyScheduleActivity:
     collection = db.daily_schedule_activities
     
+    indexes = [
+        IndexModel([('child_name', ASCENDING), ('date', ASCENDING), ('completed_at', ASCENDING)],
+                   name='child_date_completed_at'),
+        IndexModel([('child_name', ASCENDING), ('completed_at', ASCENDING), ('date', ASCENDING)],
+                   name='child_completed_at_date'),
+    ]
+    
+    queries = [
+        {'name': 'find_by_child_and_date', 'equality': ['child_name', 'date'], 'sort': [('completed_at', 1)]},
+        {'name': 'find_by_child_date_range', 'equality': ['child_name'], 'sort': [('completed_at', 1)], 'range': ['date']},
+    ]
+    
     @staticmethod
     def create(activity_data):
         """Create a new daily schedule activity completion"""
@@ -23,6 +37,52 @@ class DailyScheduleActivity:
         data['_id'] = str(result.inserted_id)
         return data
     
+    @staticmethod
+    def create_many(activities):
+        """
+        Insert several activity completions in one unordered bulk write
+        
+        Each activity may carry its own `completed_at` (naive UTC datetime),
+        e.g. when a tablet replays tasks completed while offline; the `date`
+        bucket is derived from it.
+        
+        Returns:
+            list: Per activity, the created document or {'error': message}
+        """
+        now = datetime.utcnow()
+        documents = []
+        for activity_data in activities:
+            completed_at = activity_data.get('completed_at') or now
+            documents.append({
+                'child_name': activity_data.get('child_name'),
+                'preset_type': activity_data.get('preset_type'),
+                'task_id': activity_data.get('task_id'),
+                'task_title': activity_data.get('task_title'),
+                'task_emoji': activity_data.get('task_emoji'),
+                'completed_at': completed_at,
+                'date': completed_at.date().isoformat(),
+                'created_at': now
+            })
+        
+        if not documents:
+            return []
+        
+        failed = {}
+        try:
+            DailyScheduleActivity.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                failed[write_error['index']] = write_error.get('errmsg', 'Write failed')
+        
+        results = []
+        for index, document in enumerate(documents):
+            if index in failed:
+                results.append({'error': failed[index]})
+            else:
+                document['_id'] = str(document['_id'])
+                results.append(document)
+        return results
+    
     @staticmethod
     def find_by_child_and_date(child_name, date_str=None):
         """Find all activities for a child on a specific date"""
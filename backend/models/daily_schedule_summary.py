@@ -0,0 +1,224 @@
+from datetime import datetime
+from collections import OrderedDict
+from config.database import db
+from models.daily_schedule_activity import DailyScheduleActivity
+from pymongo import IndexModel, ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+
+class DailyScheduleSummary:
+    """
+    Per-child, per-day rollup of daily schedule activities
+    
+    One document per (child_name, date) holding the completion counters and
+    the day's activities, maintained with $inc/$push as activities are saved so
+    the "today" view is a single indexed point read. Recording an activity is
+    idempotent, and a day without a rollup (saved before rollups existed, or
+    whose rollup was invalidated after a failed update) is rebuilt from the
+    raw activities when it is first read or written.
+    """
+    collection = db.daily_schedule_summaries
+    
+    indexes = [
+        IndexModel([('child_name', ASCENDING), ('date', ASCENDING)], name='child_date', unique=True),
+    ]
+    
+    queries = [
+        {'name': 'get_for_day', 'equality': ['child_name', 'date']},
+        {'name': 'activity_stats', 'equality': ['child_name'], 'range': ['date']},
+    ]
+    
+    @staticmethod
+    def preset_key(preset_type):
+        """Field-name-safe key for the by_preset counters (kept in step with the backfill pipeline)"""
+        preset = 'unknown' if preset_type is None or preset_type == '' else str(preset_type)
+        return preset.replace('.', '_').replace('$', '_')
+    
+    @staticmethod
+    def record(activities):
+        """
+        Fold saved activity documents into their day's rollup
+        
+        Each activity is added only if the rollup does not hold it yet, so
+        recording the same activity twice (e.g. on a retry) changes nothing.
+        All updates go out in a single bulk write. A day that has no rollup
+        yet is first built from the raw activities (which already include
+        the ones being recorded), in case some were saved before it existed.
+        
+        Args:
+            activities: Activity documents as returned by DailyScheduleActivity.create
+        """
+        if not activities:
+            return
+        
+        days = {(activity['child_name'], activity['date']) for activity in activities}
+        existing = {
+            (summary['child_name'], summary['date'])
+            for summary in DailyScheduleSummary.collection.find(
+                {'$or': [{'child_name': child_name, 'date': date_str} for child_name, date_str in days]},
+                {'_id': 0, 'child_name': 1, 'date': 1}
+            )
+        }
+        for child_name, date_str in days - existing:
+            DailyScheduleSummary.rebuild(child_name, date_str)
+        
+        now = datetime.utcnow()
+        operations = []
+        for activity in activities:
+            key = f"by_preset.{DailyScheduleSummary.preset_key(activity.get('preset_type'))}"
+            operations.append(UpdateOne(
+                {'child_name': activity['child_name'], 'date': activity['date'], 'activities._id': {'$ne': activity['_id']}},
+                {
+                    '$inc': {'total_completed': 1, key: 1},
+                    '$push': {'activities': {'$each': [activity], '$sort': {'completed_at': 1}}},
+                    '$set': {'updated_at': now}
+                },
+                upsert=True
+            ))
+        
+        try:
+            DailyScheduleSummary.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # A duplicate key means the rollup exists and already holds the activity
+            errors = [error for error in e.details.get('writeErrors', []) if error.get('code') != 11000]
+            if errors:
+                raise
+    
+    @staticmethod
+    def invalidate_day(child_name, date_str):
+        """Drop a day's rollup so it is rebuilt from the raw activities on its next read"""
+        DailyScheduleSummary.collection.delete_one({'child_name': child_name, 'date': date_str})
+    
+    @staticmethod
+    def get_for_day(child_name, date_str=None, include_activities=True):
+        """Get the rollup for a child's day (defaults to today)"""
+        if date_str is None:
+            date_str = datetime.utcnow().date().isoformat()
+        
+        projection = {'_id': 0, 'total_completed': 1, 'by_preset': 1}
+        if include_activities:
+            projection['activities'] = 1
+        
+        summary = DailyScheduleSummary.collection.find_one({'child_name': child_name, 'date': date_str}, projection)
+        if summary is None:
+            DailyScheduleSummary.rebuild(child_name, date_str)
+            summary = DailyScheduleSummary.collection.find_one(
+                {'child_name': child_name, 'date': date_str},
+                projection
+            ) or {}
+        
+        result = {
+            'date': date_str,
+            'total_completed': summary.get('total_completed', 0),
+            'by_preset': summary.get('by_preset', {})
+        }
+        if include_activities:
+            result['activities'] = summary.get('activities', [])
+        return result
+    
+    @staticmethod
+    def activity_stats(child_name, start_date, window=7):
+        """
+        Activities completed per day (with a rolling average) and per preset
+        
+        Computed from the daily rollups, so the scan is one document per day.
+        
+        Returns:
+            dict: {'per_day': [{'date', 'total_completed', 'rolling_average'}],
+                   'per_preset': [{'preset', 'count'}]}
+        """
+        pipeline = [
+            {'$match': {'child_name': child_name, 'date': {'$gte': start_date}}},
+            {'$project': {
+                '_id': 0,
+                'date': 1,
+                'total_completed': 1,
+                'presets': {'$objectToArray': {'$ifNull': ['$by_preset', {}]}}
+            }},
+            {'$facet': {
+                'per_day': [
+                    {'$setWindowFields': {
+                        'sortBy': {'date': 1},
+                        'output': {
+                            'rolling_average': {'$avg': '$total_completed', 'window': {'documents': [-(window - 1), 'current']}}
+                        }
+                    }},
+                    {'$project': {'date': 1, 'total_completed': 1, 'rolling_average': 1}}
+                ],
+                'per_preset': [
+                    {'$unwind': '$presets'},
+                    {'$group': {'_id': '$presets.k', 'count': {'$sum': '$presets.v'}}},
+                    {'$sort': {'count': -1, '_id': 1}},
+                    {'$project': {'_id': 0, 'preset': '$_id', 'count': 1}}
+                ]
+            }}
+        ]
+        result = list(DailyScheduleSummary.collection.aggregate(pipeline))
+        return result[0] if result else {'per_day': [], 'per_preset': []}
+    
+    @staticmethod
+    def backfill(child_name=None):
+        """
+        Rebuild rollups from the raw activities collection
+        
+        Runs entirely server-side: activities are grouped per (child_name, date)
+        and merged over the existing rollups. Activities saved while the
+        backfill runs may need another pass.
+        
+        Args:
+            child_name: Only rebuild this child's rollups
+        """
+        DailyScheduleSummary._rebuild({'child_name': child_name} if child_name else {}, 'replace')
+    
+    @staticmethod
+    def rebuild(child_name, date_str):
+        """
+        Build a missing day's rollup from the raw activities
+        
+        A rollup that already exists is kept as it is, so this never
+        overwrites updates that record() made while the pipeline ran.
+        A no-op for a day without activities.
+        """
+        DailyScheduleSummary._rebuild({'child_name': child_name, 'date': date_str}, 'keepExisting')
+    
+    @staticmethod
+    def _rebuild(match, when_matched):
+        pipeline = [
+            {'$match': match},
+            {'$sort': {'completed_at': 1}},
+            {'$group': {
+                '_id': {'child_name': '$child_name', 'date': '$date'},
+                'total_completed': {'$sum': 1},
+                # Same rule as preset_key: missing, null and '' count as 'unknown'
+                'presets': {'$push': {'$cond': [
+                    {'$eq': [{'$ifNull': ['$preset_type', '']}, '']}, 'unknown', '$preset_type'
+                ]}},
+                'activities': {'$push': {'$mergeObjects': ['$$ROOT', {'_id': {'$toString': '$_id'}}]}}
+            }},
+            {'$project': {
+                '_id': 0,
+                'child_name': '$_id.child_name',
+                'date': '$_id.date',
+                'total_completed': 1,
+                'activities': 1,
+                'by_preset': {'$arrayToObject': {'$map': {
+                    'input': {'$setUnion': ['$presets', []]},
+                    'as': 'preset',
+                    'in': {
+                        'k': {'$replaceAll': {
+                            'input': {'$replaceAll': {'input': {'$toString': '$$preset'}, 'find': '.', 'replacement': '_'}},
+                            'find': {'$literal': '$'}, 'replacement': '_'
+                        }},
+                        'v': {'$size': {'$filter': {'input': '$presets', 'cond': {'$eq': ['$$this', '$$preset']}}}}
+                    }
+                }}},
+                'updated_at': '$$NOW'
+            }},
+            {'$merge': {
+                'into': DailyScheduleSummary.collection.name,
+                'on': ['child_name', 'date'],
+                'whenMatched': when_matched,
+                'whenNotMatched': 'insert'
+            }}
+        ]
+        # A full backfill sorts and groups every activity, past the in-memory stage limit
+        list(DailyScheduleActivity.collection.aggregate(pipeline, allowDiskUse=True))
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from config.database import db
+from pymongo import IndexModel, ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+class Lease:
+    """
+    Cross-process mutual exclusion through expiring lease documents
+    
+    A lease is a document whose _id is the lease key. Acquiring upserts it
+    only when it is missing or expired, so exactly one holder wins. A holder
+    renews it while it works, and one that dies simply lets the lease run
+    out. Expired documents are cleaned up by a TTL index.
+    """
+    collection = db.leases
+    
+    indexes = [
+        IndexModel([('expires_at', ASCENDING)], name='expires_at_ttl', expireAfterSeconds=0),
+    ]
+    
+    # Leases are only read and written by _id
+    queries = []
+    
+    @staticmethod
+    def acquire(key, owner, ttl):
+        """
+        Take the lease for key if it is free or expired
+        
+        Args:
+            key: Lease name, e.g. 'report:<assessment_id>'
+            owner: Unique id of the holder
+            ttl: Seconds until the lease expires unless released
+        
+        Returns:
+            bool: Whether owner now holds the lease
+        """
+        now = datetime.utcnow()
+        try:
+            Lease.collection.update_one(
+                {'_id': key, 'expires_at': {'$lt': now}},
+                {'$set': {'owner': owner, 'acquired_at': now, 'expires_at': now + timedelta(seconds=ttl)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # The lease exists and has not expired
+            return False
+    
+    @staticmethod
+    def renew(key, owner, ttl):
+        """
+        Push the expiry of a held lease ttl seconds into the future
+        
+        Returns:
+            bool: False when owner no longer holds the lease
+        """
+        result = Lease.collection.update_one(
+            {'_id': key, 'owner': owner},
+            {'$set': {'expires_at': datetime.utcnow() + timedelta(seconds=ttl)}}
+        )
+        return result.matched_count > 0
+    
+    @staticmethod
+    def release(key, owner):
+        """Give the lease up (only if owner still holds it)"""
+        Lease.collection.delete_one({'_id': key, 'owner': owner})
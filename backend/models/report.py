@@ -1,10 +1,35 @@
 from datetime import datetime
 from config.database import db
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from utils.projection import build_projection
 
 class Report:
     collection = db.reports
     
+    indexes = [
+        IndexModel([('assessment_id', ASCENDING)], name='assessment_id_unique', unique=True),
+        IndexModel([('parent_auth0_id', ASCENDING), ('created_at', DESCENDING)], name='parent_created_at'),
+    ]
+    
+    queries = [
+        {'name': 'find_by_assessment', 'equality': ['assessment_id']},
+        {'name': 'find_by_parent', 'equality': ['parent_auth0_id'], 'sort': [('created_at', -1)]},
+    ]
+    
+    # Reports are returned as stored, so API and document field names match
+    FIELDS = {field: field for field in (
+        'assessment_id', 'parent_auth0_id', 'report_content', 'session_id',
+        'message_id', 'created_at', 'updated_at'
+    )}
+    SUMMARY_FIELDS = ['assessment_id', 'created_at', 'updated_at']
+    
+    @staticmethod
+    def projection(fields=None, view=None):
+        """Build a projection from field names or a view name ('summary' / 'full')"""
+        return build_projection(Report.FIELDS, fields, view, Report.SUMMARY_FIELDS)
+    
     @staticmethod
     def create(assessment_id, parent_auth0_id, report_data):
         """Create a new report"""
@@ -14,6 +39,8 @@ class Report:
             'report_content': report_data.get('report'),
             'session_id': report_data.get('session_id'),
             'message_id': report_data.get('message_id'),
+            'scores': report_data.get('scores'),
+            'metrics': report_data.get('metrics'),
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
@@ -31,10 +58,11 @@ class Report:
         return report
     
     @staticmethod
-    def find_by_parent(parent_auth0_id, limit=50):
-        """Find all reports for a parent"""
+    def find_by_parent(parent_auth0_id, limit=50, projection=None):
+        """Find all reports for a parent, optionally loading only projected fields"""
         reports = Report.collection.find(
-            {'parent_auth0_id': parent_auth0_id}
+            {'parent_auth0_id': parent_auth0_id},
+            projection
         ).sort('created_at', -1).limit(limit)
         
         result = []
@@ -62,3 +90,27 @@ class Report:
             return result.deleted_count > 0
         except:
             return False
+    
+    @staticmethod
+    def delete_for_parent(report_id, parent_auth0_id):
+        """
+        Delete a report only if it belongs to the given parent
+        
+        Ownership is part of the delete filter, so a successful delete is a single
+        round trip; only a miss costs a lookup to tell "not found" from "forbidden".
+        
+        Returns:
+            str: 'ok', 'not_found' or 'forbidden'
+        """
+        try:
+            object_id = ObjectId(report_id)
+        except (InvalidId, TypeError):
+            return 'not_found'
+        
+        result = Report.collection.delete_one(
+            {'_id': object_id, 'parent_auth0_id': parent_auth0_id}
+        )
+        if result.deleted_count:
+            return 'ok'
+        exists = Report.collection.count_documents({'_id': object_id}, limit=1)
+        return 'forbidden' if exists else 'not_found'
@@ -0,0 +1,193 @@
+from datetime import datetime, timedelta
+from config.database import db
+from config.config import Config
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import IndexModel, ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+class ReportJob:
+    """
+    Mongo-backed queue of report generation jobs
+    
+    Jobs move queued -> running -> succeeded/failed. A running job holds a
+    lease that its worker renews while it runs; when the worker dies the
+    lease expires and another worker reclaims it, so queued and in-flight
+    work survives restarts. Only the worker holding the lease can renew or
+    finish a job. While a job is queued
+    or running it carries `active_key` (the assessment id), whose unique index
+    keeps a second job for the same assessment from being enqueued. Finished
+    jobs are removed by a TTL index after Config.REPORT_JOB_RETENTION_DAYS.
+    """
+    collection = db.report_jobs
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    FINISHED = (SUCCEEDED, FAILED)
+    
+    indexes = [
+        IndexModel([('status', ASCENDING), ('created_at', ASCENDING)], name='status_created_at'),
+        IndexModel([('status', ASCENDING), ('lease_until', ASCENDING)], name='status_lease_until'),
+        IndexModel([('active_key', ASCENDING)], name='active_key_unique', unique=True, sparse=True),
+        IndexModel([('expires_at', ASCENDING)], name='expires_at_ttl', expireAfterSeconds=0),
+    ]
+    
+    queries = [
+        {'name': 'claim', 'equality': ['status'], 'sort': [('created_at', 1)]},
+        {'name': 'reclaim', 'equality': ['status'], 'range': ['lease_until']},
+        {'name': 'enqueue', 'equality': ['active_key']},
+        {'name': 'queued_count', 'equality': ['status']},
+    ]
+    
+    @staticmethod
+    def enqueue(assessment_id, parent_auth0_id):
+        """
+        Queue a report job, or return the job already queued/running for the assessment
+        
+        Returns:
+            dict: The job document with '_id' as a string
+        """
+        now = datetime.utcnow()
+        job = {
+            'assessment_id': assessment_id,
+            'parent_auth0_id': parent_auth0_id,
+            'active_key': assessment_id,
+            'status': ReportJob.QUEUED,
+            'attempts': 0,
+            'created_at': now,
+            'updated_at': now
+        }
+        
+        for _ in range(2):
+            try:
+                result = ReportJob.collection.insert_one(job)
+                job['_id'] = str(result.inserted_id)
+                return job
+            except DuplicateKeyError:
+                job.pop('_id', None)
+                existing = ReportJob.collection.find_one({'active_key': assessment_id})
+                if existing:
+                    existing['_id'] = str(existing['_id'])
+                    return existing
+                # The active job finished in between; queue a fresh one
+        raise RuntimeError("Could not enqueue report job")
+    
+    @staticmethod
+    def claim(worker_id, lease_seconds):
+        """
+        Take the oldest queued job, or a running job whose lease has expired
+        
+        Returns:
+            dict: The claimed job (attempts already incremented), or None
+        """
+        now = datetime.utcnow()
+        update = {
+            '$set': {
+                'status': ReportJob.RUNNING,
+                'worker': worker_id,
+                'started_at': now,
+                'lease_until': now + timedelta(seconds=lease_seconds),
+                'updated_at': now
+            },
+            '$inc': {'attempts': 1}
+        }
+        
+        job = ReportJob.collection.find_one_and_update(
+            {'status': ReportJob.QUEUED},
+            update,
+            sort=[('created_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job is None:
+            job = ReportJob.collection.find_one_and_update(
+                {'status': ReportJob.RUNNING, 'lease_until': {'$lt': now}},
+                update,
+                return_document=ReturnDocument.AFTER
+            )
+        return job
+    
+    @staticmethod
+    def renew(job_id, worker_id, lease_seconds):
+        """
+        Extend the lease of a running job
+        
+        Returns:
+            bool: False when worker_id no longer holds the job (its lease expired and it was reclaimed)
+        """
+        now = datetime.utcnow()
+        result = ReportJob.collection.update_one(
+            {'_id': ObjectId(job_id), 'status': ReportJob.RUNNING, 'worker': worker_id},
+            {'$set': {'lease_until': now + timedelta(seconds=lease_seconds), 'updated_at': now}}
+        )
+        return result.matched_count > 0
+    
+    @staticmethod
+    def _finish(job_id, worker_id, status, fields):
+        now = datetime.utcnow()
+        fields.update({
+            'status': status,
+            'finished_at': now,
+            'updated_at': now,
+            'expires_at': now + timedelta(days=Config.REPORT_JOB_RETENTION_DAYS)
+        })
+        result = ReportJob.collection.update_one(
+            {'_id': ObjectId(job_id), 'status': ReportJob.RUNNING, 'worker': worker_id},
+            {'$set': fields, '$unset': {'active_key': '', 'lease_until': ''}}
+        )
+        return result.modified_count > 0
+    
+    @staticmethod
+    def complete(job_id, worker_id, report_id):
+        """Mark a job worker_id is running as succeeded with the id of the report it produced"""
+        return ReportJob._finish(job_id, worker_id, ReportJob.SUCCEEDED, {'report_id': report_id, 'error': None})
+    
+    @staticmethod
+    def fail(job_id, worker_id, error):
+        """Mark a job worker_id is running as failed"""
+        return ReportJob._finish(job_id, worker_id, ReportJob.FAILED, {'error': error})
+    
+    @staticmethod
+    def requeue(job_id, worker_id, reason):
+        """Put a job worker_id is running back in the queue without counting the attempt"""
+        now = datetime.utcnow()
+        result = ReportJob.collection.update_one(
+            {'_id': ObjectId(job_id), 'status': ReportJob.RUNNING, 'worker': worker_id},
+            {
+                '$set': {'status': ReportJob.QUEUED, 'retry_reason': reason, 'updated_at': now},
+                '$unset': {'worker': '', 'lease_until': '', 'started_at': ''},
+                '$inc': {'attempts': -1}
+            }
+        )
+        return result.modified_count > 0
+    
+    @staticmethod
+    def find_by_id(job_id):
+        """Find a job by ID"""
+        try:
+            job = ReportJob.collection.find_one({'_id': ObjectId(job_id)})
+        except (InvalidId, TypeError):
+            return None
+        if job:
+            job['_id'] = str(job['_id'])
+        return job
+    
+    @staticmethod
+    def find_active(assessment_id):
+        """The queued or running job for an assessment, or None"""
+        job = ReportJob.collection.find_one({'active_key': assessment_id})
+        if job:
+            job['_id'] = str(job['_id'])
+        return job
+    
+    @staticmethod
+    def queued_count():
+        """Number of jobs waiting to be claimed"""
+        return ReportJob.collection.count_documents({'status': ReportJob.QUEUED})
+    
+    @staticmethod
+    def counts():
+        """Number of jobs per status"""
+        pipeline = [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]
+        return {row['_id']: row['count'] for row in ReportJob.collection.aggregate(pipeline)}
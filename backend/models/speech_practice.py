@@ -1,10 +1,23 @@
 from datetime import datetime, date
 from config.database import db
 from bson import ObjectId
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
 
 class SpeechPractice:
     collection = db.speech_practice
     
+    indexes = [
+        IndexModel([('child_name', ASCENDING), ('date', ASCENDING)], name='child_date', unique=True),
+        IndexModel([('child_name', ASCENDING), ('created_at', DESCENDING)], name='child_created_at'),
+    ]
+    
+    queries = [
+        {'name': 'find_by_child_and_date', 'equality': ['child_name', 'date']},
+        {'name': 'find_by_child', 'equality': ['child_name'], 'sort': [('created_at', -1)]},
+        {'name': 'score_trend', 'equality': ['child_name'], 'range': ['date']},
+    ]
+    
     @staticmethod
     def create(child_name, practice_data):
         """Create a new speech practice record"""
@@ -22,6 +35,44 @@ class SpeechPractice:
         data['_id'] = str(result.inserted_id)
         return data
     
+    @staticmethod
+    def create_once_per_day(child_name, practice_data):
+        """
+        Create today's speech practice record unless one already exists
+        
+        A single upsert with $setOnInsert against the unique (child_name, date)
+        index, so concurrent submissions cannot both insert.
+        
+        Returns:
+            dict: The created record, or None if the child already practiced today
+        """
+        now = datetime.utcnow()
+        data = {
+            'child_name': child_name,
+            'score': practice_data.get('score'),
+            'total_questions': practice_data.get('totalQuestions'),
+            'questions_attempted': practice_data.get('questionsAttempted'),
+            'date': now.date().isoformat(),  # Store as ISO date string
+            'created_at': now,
+            'updated_at': now
+        }
+        
+        try:
+            result = SpeechPractice.collection.update_one(
+                {'child_name': child_name, 'date': data['date']},
+                {'$setOnInsert': data},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Lost the race against a concurrent upsert for the same day
+            return None
+        
+        if result.upserted_id is None:
+            return None
+        
+        data['_id'] = str(result.upserted_id)
+        return data
+    
     @staticmethod
     def find_by_child_and_date(child_name, date_str=None):
         """Find speech practice record for a child on a specific date (defaults to today)"""
@@ -71,3 +122,38 @@ class SpeechPractice:
             return result.deleted_count > 0
         except:
             return False
+    
+    @staticmethod
+    def score_trend(child_name, start_date, window=7):
+        """
+        Daily speech accuracy (score / total_questions) with a rolling average
+        
+        Args:
+            child_name: Child to analyse
+            start_date: First ISO date included
+            window: Number of practice days in the rolling average
+            
+        Returns:
+            list: [{'date', 'score', 'total_questions', 'accuracy', 'rolling_accuracy'}] oldest first
+        """
+        pipeline = [
+            {'$match': {'child_name': child_name, 'date': {'$gte': start_date}}},
+            {'$project': {
+                '_id': 0,
+                'date': 1,
+                'score': 1,
+                'total_questions': 1,
+                'accuracy': {'$cond': [
+                    {'$gt': ['$total_questions', 0]},
+                    {'$divide': ['$score', '$total_questions']},
+                    None
+                ]}
+            }},
+            {'$setWindowFields': {
+                'sortBy': {'date': 1},
+                'output': {
+                    'rolling_accuracy': {'$avg': '$accuracy', 'window': {'documents': [-(window - 1), 'current']}}
+                }
+            }}
+        ]
+        return list(SpeechPractice.collection.aggregate(pipeline))
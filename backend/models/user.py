@@ -1,10 +1,25 @@
 from datetime import datetime
 from config.database import db
 from bson import ObjectId
+from pymongo import IndexModel, ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from utils.pagination import keyset_filter, KEYSET_SORT
 
 class User:
     collection = db.users
     
+    indexes = [
+        IndexModel([('auth0_id', ASCENDING)], name='auth0_id_unique', unique=True),
+        IndexModel([('email', ASCENDING)], name='email'),
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)], name='created_at'),
+    ]
+    
+    queries = [
+        {'name': 'find_by_auth0_id', 'equality': ['auth0_id']},
+        {'name': 'find_by_email', 'equality': ['email']},
+        {'name': 'get_all', 'sort': KEYSET_SORT},
+    ]
+    
     @staticmethod
     def create(auth0_id, email, name=None, picture=None):
         """Create a new user in MongoDB"""
@@ -50,25 +65,39 @@ class User:
     
     @staticmethod
     def find_or_create(auth0_id, email, name=None, picture=None, email_verified=False):
-        """Find existing user or create new one"""
-        user = User.find_by_auth0_id(auth0_id)
+        """
+        Find existing user or create new one
         
-        if user:
-            update_data = {}
-            if name and user.get('name') != name:
-                update_data['name'] = name
-            if picture and user.get('picture') != picture:
-                update_data['picture'] = picture
-            if user.get('email_verified') != email_verified:
-                update_data['email_verified'] = email_verified
-            
-            if update_data:
-                User.update(auth0_id, update_data)
-                user.update(update_data)
-            
-            return user
-        else:
-            return User.create(auth0_id, email, name, picture)
+        One find_one_and_update upsert: mutable profile fields go in $set,
+        creation-only fields in $setOnInsert, and the resulting document is
+        returned, so each login costs a single database operation.
+        """
+        now = datetime.utcnow()
+        set_fields = {'email_verified': email_verified, 'updated_at': now}
+        set_on_insert = {'email': email, 'created_at': now}
+        
+        # Only overwrite name/picture when Auth0 sent a value
+        for field, value in (('name', name), ('picture', picture)):
+            if value:
+                set_fields[field] = value
+            else:
+                set_on_insert[field] = None
+        
+        update = {'$set': set_fields, '$setOnInsert': set_on_insert}
+        try:
+            user = User.collection.find_one_and_update(
+                {'auth0_id': auth0_id}, update,
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # A concurrent login inserted the user first; the retry matches it
+            user = User.collection.find_one_and_update(
+                {'auth0_id': auth0_id}, update,
+                return_document=ReturnDocument.AFTER
+            )
+        
+        user['_id'] = str(user['_id'])
+        return user
     
     @staticmethod
     def delete(auth0_id):
@@ -77,9 +106,12 @@ class User:
         return result.deleted_count > 0
     
     @staticmethod
-    def get_all(limit=100, skip=0):
-        """Get all users with pagination"""
-        users = list(User.collection.find().limit(limit).skip(skip))
+    def get_all(limit=100, skip=0, after=None):
+        """Get all users, newest first, paged by keyset cursor or by offset"""
+        users = User.collection.find(keyset_filter({}, after)).sort(KEYSET_SORT)
+        if skip and after is None:
+            users = users.skip(skip)
+        users = list(users.limit(limit))
         for user in users:
             user['_id'] = str(user['_id'])
         return users
@@ -0,0 +1,29 @@
+from flask import Blueprint, request, jsonify
+from controllers.analytics_controller import AnalyticsController
+from controllers.auth_controller import AuthController
+from utils.decorators import requires_auth
+
+analytics_bp = Blueprint('analytics', __name__)
+
+@analytics_bp.route('/child/<child_name>', methods=['GET'], strict_slashes=False)
+@requires_auth
+def get_child_progress(child_name):
+    """Get progress analytics for a child (?days=30&window=7)"""
+    try:
+        parent_auth0_id = AuthController.get_session_auth0_id()
+        if not parent_auth0_id:
+            return jsonify({'error': 'Unauthorized'}), 401
+        
+        days = request.args.get('days', 30, type=int)
+        window = request.args.get('window', 7, type=int)
+        
+        progress, error = AnalyticsController.get_child_progress(
+            parent_auth0_id, child_name, days, window
+        )
+        
+        if error:
+            return jsonify({'error': error}), 500
+        
+        return jsonify(progress), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
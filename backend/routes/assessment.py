@@ -47,13 +47,18 @@ def get_assessments():
         if not parent_auth0_id:
             return jsonify({'error': 'Unauthorized'}), 401
         
-        # Get pagination parameters
+        # Get pagination parameters (cursor takes precedence over skip)
         limit = request.args.get('limit', 100, type=int)
         skip = request.args.get('skip', 0, type=int)
+        cursor = request.args.get('cursor')
+        
+        # Optional projection: ?fields=childInfo,createdAt or ?view=summary
+        fields = request.args.get('fields')
+        view = request.args.get('view')
         
         # Get assessments
-        assessments, error = AssessmentController.get_assessments_by_parent(
-            parent_auth0_id, limit, skip
+        page, error = AssessmentController.get_assessments_by_parent(
+            parent_auth0_id, limit, skip, cursor, fields, view
         )
         
         if error:
@@ -61,12 +66,13 @@ def get_assessments():
         
         # Format response
         formatted_assessments = [
-            AssessmentController.format_assessment_response(a) for a in assessments
+            AssessmentController.format_assessment_response(a, page['fields']) for a in page['assessments']
         ]
         
         return jsonify({
             'assessments': formatted_assessments,
-            'count': len(formatted_assessments)
+            'count': len(formatted_assessments),
+            'next_cursor': page['next_cursor']
         }), 200
         
     except Exception as e:
@@ -98,6 +104,32 @@ def get_assessment(assessment_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@assessment_bp.route('/<assessment_id>/scores', methods=['GET'])
+@requires_auth
+def get_assessment_scores(assessment_id):
+    """Get normative JHFT scores for an assessment (?hand=non-dominant)"""
+    try:
+        # Get parent auth0_id from session
+        parent_auth0_id = AuthController.get_session_auth0_id()
+        if not parent_auth0_id:
+            return jsonify({'error': 'Unauthorized'}), 401
+        
+        scores, error = AssessmentController.get_assessment_scores(
+            assessment_id, parent_auth0_id, request.args.get('hand')
+        )
+        
+        if error:
+            if error == "Assessment not found":
+                return jsonify({'error': error}), 404
+            if error == "Unauthorized":
+                return jsonify({'error': error}), 403
+            return jsonify({'error': error}), 400
+        
+        return jsonify({'scores': scores}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @assessment_bp.route('/child/<child_name>', methods=['GET'])
 @requires_auth
 def get_child_assessments(child_name):
@@ -20,11 +20,33 @@ def save_activity():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@daily_schedule_bp.route('/activities/batch', methods=['POST'])
+def save_activities_batch():
+    """Save many completed activities in one request (offline sync)"""
+    try:
+        data = request.get_json()
+        activities = data.get('activities') if isinstance(data, dict) else data
+        results, error = DailyScheduleController.save_activities(activities)
+        
+        if error:
+            return jsonify({'error': error}), 400
+        
+        created = sum(1 for result in results if result['status'] == 'created')
+        return jsonify({
+            'message': f'{created} of {len(results)} activities saved',
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }), 201 if created == len(results) else 207
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @daily_schedule_bp.route('/today/<child_name>', methods=['GET'])
 def get_today_activities(child_name):
-    """Get today's activities for a child"""
+    """Get today's activities for a child (?include_activities=false for counters only)"""
     try:
-        summary, error = DailyScheduleController.get_today_activities(child_name)
+        include_activities = request.args.get('include_activities', 'true').lower() != 'false'
+        summary, error = DailyScheduleController.get_today_activities(child_name, include_activities)
         
         if error:
             return jsonify({'error': error}), 500
@@ -1,26 +1,80 @@
 from flask import Blueprint, request, jsonify, session
 from controllers.report_controller import ReportController
 from utils.decorators import requires_auth
+from utils.sse import sse_response
 
 report_bp = Blueprint('report', __name__)
 
 @report_bp.route('/generate/<assessment_id>', methods=['POST'], strict_slashes=False)
 @requires_auth
 def generate_report(assessment_id):
-    """Generate a report for an assessment"""
+    """Queue report generation (202 + job), or return the existing report (200)"""
     try:
         parent_auth0_id = session.get('user', {}).get('userinfo', {}).get('sub')
         if not parent_auth0_id:
             return jsonify({'error': 'User not authenticated'}), 401
         
-        report, error = ReportController.generate_report(assessment_id, parent_auth0_id)
+        result, error = ReportController.enqueue_report(assessment_id, parent_auth0_id)
         
         if error:
             if error == "Unauthorized":
                 return jsonify({'error': error}), 403
+            if error == ReportController.UNAVAILABLE:
+                retry_after = ReportController.retry_after()
+                return jsonify({'error': error, 'retry_after': retry_after}), 503, {'Retry-After': str(retry_after)}
             return jsonify({'error': error}), 400
         
-        return jsonify(report), 201
+        if 'report' in result:
+            return jsonify(result['report']), 200
+        
+        job = result['job']
+        return jsonify(job), 202, {'Location': job['status_url']}
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@report_bp.route('/stream/<assessment_id>', methods=['GET'], strict_slashes=False)
+@requires_auth
+def stream_report(assessment_id):
+    """Generate a report and stream its text as Server-Sent Events"""
+    try:
+        parent_auth0_id = session.get('user', {}).get('userinfo', {}).get('sub')
+        if not parent_auth0_id:
+            return jsonify({'error': 'User not authenticated'}), 401
+        
+        events, error = ReportController.stream_report(assessment_id, parent_auth0_id)
+        
+        if error:
+            if error == "Unauthorized":
+                return jsonify({'error': error}), 403
+            if error == ReportController.UNAVAILABLE:
+                retry_after = ReportController.retry_after()
+                return jsonify({'error': error, 'retry_after': retry_after}), 503, {'Retry-After': str(retry_after)}
+            return jsonify({'error': error}), 400
+        
+        return sse_response(events)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@report_bp.route('/jobs/<job_id>', methods=['GET'], strict_slashes=False)
+@requires_auth
+def get_report_job(job_id):
+    """Get a report job's status (?wait=<seconds> to wait for it to finish)"""
+    try:
+        parent_auth0_id = session.get('user', {}).get('userinfo', {}).get('sub')
+        if not parent_auth0_id:
+            return jsonify({'error': 'User not authenticated'}), 401
+        
+        wait = request.args.get('wait', 0, type=float)
+        job, error = ReportController.get_job(job_id, parent_auth0_id, wait)
+        
+        if error:
+            if error == "Job not found":
+                return jsonify({'error': error}), 404
+            if error == "Unauthorized":
+                return jsonify({'error': error}), 403
+            return jsonify({'error': error}), 500
+        
+        return jsonify(job), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -56,9 +110,13 @@ def get_reports():
             return jsonify({'error': 'User not authenticated'}), 401
         
         limit = request.args.get('limit', 50, type=int)
-        reports, error = ReportController.get_reports_by_parent(parent_auth0_id, limit)
+        fields = request.args.get('fields')
+        view = request.args.get('view')
+        reports, error = ReportController.get_reports_by_parent(parent_auth0_id, limit, fields, view)
         
         if error:
+            if error.startswith('Unknown'):
+                return jsonify({'error': error}), 400
             return jsonify({'error': error}), 500
         
         return jsonify(reports), 200
@@ -12,15 +12,21 @@ def get_users():
     """Get all users with pagination"""
     limit = request.args.get('limit', 100, type=int)
     skip = request.args.get('skip', 0, type=int)
+    cursor = request.args.get('cursor')
     
-    users = UserController.get_all_users(limit=limit, skip=skip)
+    page = UserController.get_all_users(limit=limit, skip=skip, cursor=cursor)
+    if page is None:
+        return jsonify(error='Invalid cursor'), 400
+    
+    users, next_cursor = page
     formatted_users = [UserController.format_user_response(user) for user in users]
     
     return jsonify({
         'users': formatted_users,
         'count': len(formatted_users),
         'limit': limit,
-        'skip': skip
+        'skip': skip,
+        'next_cursor': next_cursor
     })
 
 
@@ -0,0 +1,105 @@
+import threading
+import time
+
+
+class Bulkhead:
+    """
+    Concurrency limit with a short wait queue for one class of upstream calls
+    
+    At most max_concurrent callers hold a slot at once; up to max_queue more
+    wait up to max_wait seconds for one to free up. A caller arriving while
+    the queue is full is refused at once, so a burst of one kind of traffic
+    cannot tie up every request thread in the process.
+    
+    Args:
+        max_concurrent: Slots held at once
+        max_queue: Callers allowed to wait for a slot
+        max_wait: Seconds a queued caller waits before giving up
+    """
+    
+    def __init__(self, max_concurrent=8, max_queue=8, max_wait=1.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._condition = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._counters = {'admitted': 0, 'queued': 0, 'rejected': 0, 'timed_out': 0}
+        self._total_wait = 0.0
+        self._longest_wait = 0.0
+        self._total_hold = 0.0
+        self._released = 0
+    
+    def is_full(self):
+        """Whether a new caller would be refused right now"""
+        with self._condition:
+            return self._active >= self.max_concurrent and self._waiting >= self.max_queue
+    
+    def has_free_slot(self):
+        """Whether a new caller would get a slot right now without queueing"""
+        with self._condition:
+            return self._active < self.max_concurrent and not self._waiting
+    
+    def acquire(self):
+        """
+        Take a slot, queueing for up to max_wait seconds when none is free
+        
+        Returns:
+            float: Ticket to hand to release(), or None when refused
+        """
+        started = time.monotonic()
+        with self._condition:
+            if self._active >= self.max_concurrent or self._waiting:
+                if self._waiting >= self.max_queue:
+                    self._counters['rejected'] += 1
+                    return None
+                self._waiting += 1
+                self._counters['queued'] += 1
+                try:
+                    deadline = started + self.max_wait
+                    while self._active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._counters['timed_out'] += 1
+                            # Pass on a wakeup this caller may have consumed
+                            if self._active < self.max_concurrent:
+                                self._condition.notify()
+                            return None
+                        self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            
+            self._active += 1
+            self._counters['admitted'] += 1
+            now = time.monotonic()
+            self._total_wait += now - started
+            self._longest_wait = max(self._longest_wait, now - started)
+            return now
+    
+    def release(self, ticket):
+        """Give back a slot taken by acquire()"""
+        with self._condition:
+            self._active -= 1
+            self._released += 1
+            self._total_hold += time.monotonic() - ticket
+            self._condition.notify()
+    
+    def retry_after(self):
+        """Seconds until a refused caller is likely to get a slot"""
+        with self._condition:
+            average_hold = self._total_hold / self._released if self._released else self.max_wait
+            return max(self.max_wait, average_hold * (self._waiting + 1) / self.max_concurrent)
+    
+    def stats(self):
+        with self._condition:
+            admitted = self._counters['admitted']
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'active': self._active,
+                'queue_depth': self._waiting,
+                **self._counters,
+                'avg_wait_ms': self._total_wait / admitted * 1000 if admitted else 0.0,
+                'max_wait_ms': self._longest_wait * 1000,
+                'avg_hold_ms': self._total_hold / self._released * 1000 if self._released else 0.0
+            }
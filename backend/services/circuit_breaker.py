@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitBreaker:
+    """
+    Failure-rate and slow-call circuit breaker for an upstream dependency
+    
+    Closed: calls go through and their outcomes fill a sliding window. Once
+    the window holds min_calls outcomes and either the failure rate or the
+    slow-call rate reaches its threshold, the circuit opens. Open: calls are
+    refused for open_seconds. Half-open: a single probe call is let through;
+    its success closes the circuit, its failure opens it again.
+    
+    Args:
+        window: Number of recent calls considered
+        min_calls: Calls needed in the window before the circuit may open
+        failure_rate: Fraction of failed calls that opens the circuit
+        slow_rate: Fraction of slow calls that opens the circuit
+        open_seconds: How long the circuit stays open before probing
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, window=20, min_calls=5, failure_rate=0.5, slow_rate=0.8, open_seconds=30):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._counters = {'opened': 0, 'rejected': 0, 'failures': 0, 'slow': 0}
+    
+    def is_open(self):
+        """Whether calls are currently refused (without claiming the half-open probe)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            if self._state == self.OPEN:
+                return time.monotonic() < self._opened_at + self.open_seconds
+            return self._probe_started is not None and not self._probe_expired()
+    
+    def allow(self):
+        """Whether a call may proceed now; in half-open state only one probe is allowed"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() >= self._opened_at + self.open_seconds:
+                self._state = self.HALF_OPEN
+                self._probe_started = None
+            if self._state == self.HALF_OPEN and (self._probe_started is None or self._probe_expired()):
+                self._probe_started = time.monotonic()
+                return True
+            if self._state == self.CLOSED:
+                return True
+            self._counters['rejected'] += 1
+            return False
+    
+    def _probe_expired(self):
+        # A probe whose outcome was never recorded must not block the circuit forever
+        return time.monotonic() - self._probe_started > self.open_seconds
+    
+    def record(self, success, slow=False):
+        """Record the outcome of a call that allow() let through"""
+        with self._lock:
+            if not success:
+                self._counters['failures'] += 1
+            if slow:
+                self._counters['slow'] += 1
+            
+            if self._state == self.HALF_OPEN:
+                if success and not slow:
+                    self._state = self.CLOSED
+                    self._calls.clear()
+                else:
+                    self._open()
+                return
+            
+            self._calls.append((success, slow))
+            if self._state == self.CLOSED and len(self._calls) >= self.min_calls:
+                failed = sum(1 for ok, _ in self._calls if not ok) / len(self._calls)
+                slowed = sum(1 for _, is_slow in self._calls if is_slow) / len(self._calls)
+                if failed >= self.failure_rate or slowed >= self.slow_rate:
+                    self._open()
+    
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_started = None
+        self._calls.clear()
+        self._counters['opened'] += 1
+    
+    def retry_after(self):
+        """Seconds until the circuit will let a probe through (0 when closed)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return 0.0
+            return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+    
+    def stats(self):
+        with self._lock:
+            calls = len(self._calls)
+            return {
+                'state': self._state,
+                'window_calls': calls,
+                'window_failure_rate': sum(1 for ok, _ in self._calls if not ok) / calls if calls else 0.0,
+                'window_slow_rate': sum(1 for _, slow in self._calls if slow) / calls if calls else 0.0,
+                **self._counters
+            }
@@ -0,0 +1,185 @@
+import threading
+import uuid
+from collections import OrderedDict, deque
+from utils.cache import TTLCache
+
+
+class ConversationMemory:
+    """
+    Recent turns of each Ice Breaker conversation, bounded in count and size
+    
+    The last max_turns turns ({'child', 'reply'}) of each conversation are
+    kept in an LRU + TTL cache of max_conversations entries, each message
+    clipped to max_turn_chars. context() returns the newest turns that fit in
+    token_budget, dropping the oldest first. With a store (the
+    ChatConversation model) turns are also written to MongoDB, and a
+    conversation this process does not hold (after a restart, or when
+    another worker served it) is loaded from there.
+    
+    It also remembers the last turn each upstream session has seen, so the
+    guidelines and earlier turns are only sent to a session that lacks them.
+    An upstream reply that arrived after the child was already given the
+    local one can be attached to its turn as 'late_reply', so the next
+    message still has it as context.
+    
+    Args:
+        max_conversations: Conversations kept per process
+        max_turns: Turns kept per conversation
+        token_budget: Approximate tokens of history sent with a message
+        max_turn_chars: Characters kept of each message and reply
+        ttl: Seconds a conversation is kept after its last turn
+        store: Optional model exposing find_by_id(id), append(id, turn, max_turns, ttl)
+               and set_late_reply(id, turn_id, reply)
+    """
+    # Upstream sessions tracked per conversation
+    MAX_SESSIONS = 8
+    
+    def __init__(self, max_conversations=5000, max_turns=12, token_budget=400, max_turn_chars=400, ttl=3600,
+                 store=None):
+        self.entries = TTLCache(max_entries=max_conversations, ttl=ttl)
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.max_turn_chars = max_turn_chars
+        self.ttl = ttl
+        self.store = store
+        self._lock = threading.Lock()
+        self._counters = {
+            'turns': 0, 'late_replies': 0, 'loaded': 0, 'store_errors': 0, 'primed_queries': 0, 'full_queries': 0
+        }
+    
+    @staticmethod
+    def estimate_tokens(text):
+        # Same ~4 characters per token estimate as the report prompt metrics
+        return (len(text) + 3) // 4 if text else 0
+    
+    def _entry(self, conversation_id):
+        entry = self.entries.get(conversation_id)
+        if entry is not None:
+            return entry
+        
+        loaded = None
+        if self.store is not None:
+            try:
+                loaded = self.store.find_by_id(conversation_id)
+            except Exception as e:
+                print(f"Loading conversation failed: {str(e)}")
+                with self._lock:
+                    self._counters['store_errors'] += 1
+        
+        with self._lock:
+            # Another thread may have created it while the store was read
+            entry = self.entries.get(conversation_id)
+            if entry is None:
+                entry = {'turns': deque(maxlen=self.max_turns), 'seq': 0, 'sessions': OrderedDict()}
+                if loaded:
+                    entry['turns'].extend(loaded.get('turns', []))
+                    entry['seq'] = loaded.get('seq', len(entry['turns']))
+                    self._counters['loaded'] += 1
+                self.entries.set(conversation_id, entry)
+            return entry
+    
+    def turn_count(self, conversation_id):
+        """Turns recorded so far in a conversation"""
+        entry = self._entry(conversation_id)
+        with self._lock:
+            return entry['seq']
+    
+    def context(self, conversation_id, session_id=None):
+        """
+        History to send upstream with the next message of a conversation
+        
+        Returns:
+            tuple: (turns: list, primed: bool) where primed means session_id
+                   has already seen the guidelines, and turns then only holds
+                   the turns it has not seen yet
+        """
+        entry = self._entry(conversation_id)
+        with self._lock:
+            seen = entry['sessions'].get(session_id) if session_id else None
+            turns = list(entry['turns'])
+            if seen is not None:
+                turns = turns[len(turns) - min(len(turns), entry['seq'] - seen):]
+            self._counters['primed_queries' if seen is not None else 'full_queries'] += 1
+        
+        # Newest turns first until the budget is spent
+        fitted = []
+        tokens = 0
+        for turn in reversed(turns):
+            tokens += sum(self.estimate_tokens(turn.get(field)) for field in ('child', 'reply', 'late_reply'))
+            if tokens > self.token_budget:
+                break
+            fitted.append(turn)
+        fitted.reverse()
+        return fitted, seen is not None
+    
+    def add(self, conversation_id, child, reply, session_id=None):
+        """
+        Record a turn as the child saw it
+        
+        Args:
+            conversation_id: Client-chosen conversation id
+            child: The child's message
+            reply: The reply that was shown
+            session_id: Upstream session that produced the reply, which has therefore seen the turn
+        
+        Returns:
+            str: Id of the turn, for add_late_reply()
+        """
+        turn = {'id': uuid.uuid4().hex[:12], 'child': child[:self.max_turn_chars], 'reply': reply[:self.max_turn_chars]}
+        entry = self._entry(conversation_id)
+        
+        stored = None
+        if self.store is not None:
+            try:
+                stored = self.store.append(conversation_id, turn, self.max_turns, self.ttl)
+            except Exception as e:
+                print(f"Saving conversation turn failed: {str(e)}")
+                with self._lock:
+                    self._counters['store_errors'] += 1
+        
+        with self._lock:
+            if stored:
+                # The stored turns include any added by other workers
+                entry['turns'].clear()
+                entry['turns'].extend(stored.get('turns', []))
+                entry['seq'] = stored.get('seq', entry['seq'] + 1)
+            else:
+                entry['turns'].append(turn)
+                entry['seq'] += 1
+            if session_id:
+                entry['sessions'][session_id] = entry['seq']
+                entry['sessions'].move_to_end(session_id)
+                while len(entry['sessions']) > self.MAX_SESSIONS:
+                    entry['sessions'].popitem(last=False)
+            self._counters['turns'] += 1
+        # Refresh the conversation's TTL and recency
+        self.entries.set(conversation_id, entry)
+        return turn['id']
+    
+    def add_late_reply(self, conversation_id, turn_id, reply):
+        """Attach an upstream reply that arrived after the turn was recorded with another one"""
+        reply = reply[:self.max_turn_chars]
+        entry = self._entry(conversation_id)
+        if self.store is not None:
+            try:
+                self.store.set_late_reply(conversation_id, turn_id, reply)
+            except Exception as e:
+                print(f"Saving late reply failed: {str(e)}")
+                with self._lock:
+                    self._counters['store_errors'] += 1
+        
+        with self._lock:
+            for turn in entry['turns']:
+                if turn.get('id') == turn_id:
+                    turn['late_reply'] = reply
+                    self._counters['late_replies'] += 1
+                    break
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'conversations': self.entries.stats()['entries'],
+                'max_conversations': self.entries.max_entries,
+                'store': 'mongo' if self.store is not None else 'memory',
+                **self._counters
+            }
@@ -0,0 +1,191 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling upstream while the circuit breaker is open"""
+    
+    def __init__(self, retry_after=0.0):
+        super().__init__(f"Upstream circuit open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class PooledHttpClient:
+    """
+    Shared keep-alive HTTP client with timeouts, bounded retries and call statistics
+    
+    One requests.Session (and urllib3 connection pool) per process, recreated
+    after fork(), so every call reuses warm TLS connections instead of opening
+    a new one. Retries use full-jitter exponential backoff and only happen when
+    repeating the request is safe: a connect timeout (nothing was sent) always,
+    other connection errors and 429/502/503/504 responses only for calls marked
+    idempotent.
+    
+    Args:
+        pool_size: Maximum pooled connections per host (match server concurrency)
+        connect_timeout: Seconds to establish a connection
+        read_timeout: Default seconds to wait for response data
+        max_retries: Retries after the first attempt
+        backoff_base: Base backoff in seconds (doubled per attempt)
+        backoff_max: Upper bound for a single backoff
+        breaker: Optional CircuitBreaker consulted before and fed after every call
+    """
+    RETRY_STATUSES = {429, 502, 503, 504}
+    
+    def __init__(self, pool_size=20, connect_timeout=5.0, read_timeout=60.0,
+                 max_retries=2, backoff_base=0.25, backoff_max=2.0, breaker=None):
+        self.pool_size = pool_size
+        self.breaker = breaker
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        """Forget the session (and its sockets) inherited from a parent process"""
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+    
+    @property
+    def session(self):
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    self._pid = os.getpid()
+        return self._session
+    
+    def post(self, url, operation, idempotent=False, read_timeout=None, slow_after=None, **kwargs):
+        """
+        POST with pooled connections, timeouts and safe retries
+        
+        Args:
+            url: Request URL
+            operation: Label the call's statistics are grouped under
+            idempotent: Whether repeating the request after a partial failure is safe
+            read_timeout: Override of the default read timeout in seconds
+            slow_after: Seconds after which the call counts as slow for the breaker
+            **kwargs: Passed through to requests (json, headers, stream, ...)
+        
+        Returns:
+            requests.Response: The final response (callers still check the status)
+        
+        Raises:
+            CircuitOpenError: Without calling upstream while the breaker is open
+            requests.exceptions.RequestException: When every attempt failed
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            self._record(operation, time.perf_counter(), 0, error=True, rejected=True)
+            raise CircuitOpenError(self.breaker.retry_after())
+        
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(url, timeout=timeout, **kwargs)
+                retryable = idempotent and response.status_code in self.RETRY_STATUSES
+                if not retryable or attempt >= self.max_retries:
+                    self._record(operation, started, attempt, error=response.status_code >= 400)
+                    upstream_failed = response.status_code >= 500 or response.status_code == 429
+                    self._record_breaker(started, slow_after, success=not upstream_failed)
+                    return response
+                response.close()
+            except requests.exceptions.ConnectTimeout:
+                if attempt >= self.max_retries:
+                    self._record(operation, started, attempt, error=True)
+                    self._record_breaker(started, slow_after, success=False)
+                    raise
+            except requests.exceptions.ConnectionError:
+                if not idempotent or attempt >= self.max_retries:
+                    self._record(operation, started, attempt, error=True)
+                    self._record_breaker(started, slow_after, success=False)
+                    raise
+            except requests.exceptions.RequestException:
+                self._record(operation, started, attempt, error=True)
+                self._record_breaker(started, slow_after, success=False)
+                raise
+            
+            time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt))))
+            attempt += 1
+    
+    def _record_breaker(self, started, slow_after, success):
+        if self.breaker is not None:
+            slow = slow_after is not None and time.perf_counter() - started > slow_after
+            self.breaker.record(success, slow)
+    
+    def _record(self, operation, started, retries, error, rejected=False):
+        latency = time.perf_counter() - started
+        with self._stats_lock:
+            stats = self._stats.setdefault(operation, {
+                'calls': 0, 'errors': 0, 'retries': 0, 'rejected': 0, 'total_latency': 0.0, 'max_latency': 0.0,
+                'recent': deque(maxlen=500)
+            })
+            if rejected:
+                stats['rejected'] += 1
+                return
+            stats['calls'] += 1
+            stats['errors'] += 1 if error else 0
+            stats['retries'] += retries
+            stats['total_latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+            stats['recent'].append(latency)
+    
+    def connection_stats(self):
+        """Connections opened vs requests sent across the urllib3 pools"""
+        opened = 0
+        sent = 0
+        session = self._session
+        if session is not None and self._pid == os.getpid():
+            for adapter in session.adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is not None:
+                        opened += pool.num_connections
+                        sent += pool.num_requests
+        return {
+            'connections_opened': opened,
+            'requests_sent': sent,
+            'reuse_ratio': 1.0 - opened / sent if sent else 0.0
+        }
+    
+    def stats(self):
+        """Per-operation latency/error/retry statistics plus connection reuse"""
+        operations = {}
+        with self._stats_lock:
+            for operation, stats in self._stats.items():
+                recent = sorted(stats['recent'])
+                operations[operation] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'rejected': stats['rejected'],
+                    'avg_latency_ms': stats['total_latency'] / stats['calls'] * 1000 if stats['calls'] else 0.0,
+                    'max_latency_ms': stats['max_latency'] * 1000,
+                    'p50_latency_ms': recent[len(recent) // 2] * 1000 if recent else 0.0,
+                    'p95_latency_ms': recent[min(int(len(recent) * 0.95), len(recent) - 1)] * 1000 if recent else 0.0,
+                }
+        return {
+            'pid': os.getpid(),
+            'pool_size': self.pool_size,
+            'operations': operations,
+            'connections': self.connection_stats()
+        }
@@ -0,0 +1,177 @@
+import math
+import numpy as np
+
+# Subtests in the order they are administered
+SUBTESTS = [
+    'writing',
+    'card_turning',
+    'small_objects',
+    'feeding',
+    'checkers',
+    'large_light',
+    'large_heavy',
+]
+
+# Keywords used to map a free-text test name onto a subtest
+SUBTEST_KEYWORDS = [
+    ('writing', ('writ',)),
+    ('card_turning', ('card', 'page turn')),
+    ('small_objects', ('small',)),
+    ('feeding', ('feed',)),
+    ('checkers', ('checker', 'stack')),
+    ('large_light', ('light',)),
+    ('large_heavy', ('heavy',)),
+]
+
+# Hands NORMS has values for
+HANDS = ('dominant', 'non-dominant')
+
+# Age bands (inclusive lower bound, exclusive upper bound) covered by NORMS
+AGE_GROUPS = [(6, 8, '6-7'), (8, 10, '8-9'), (10, 12, '10-11'), (12, 14, '12-13'), (14, 16, '14-15'), (16, 20, '16-19')]
+
+# Normative completion times in seconds as (mean, standard deviation) per
+# subtest, in SUBTESTS order, for each age band and hand. Approximate pediatric
+# reference values after Taylor et al. (1973); replace them with the clinic's
+# own validated norms before relying on them clinically.
+NORMS = {
+    ('6-7', 'dominant'):      [(45.0, 14.0), (6.5, 1.6), (8.5, 1.6), (12.0, 2.6), (7.5, 2.2), (5.3, 1.0), (5.6, 1.1)],
+    ('6-7', 'non-dominant'):  [(95.0, 30.0), (7.5, 1.8), (9.5, 1.8), (15.5, 3.5), (9.5, 2.8), (5.8, 1.1), (6.0, 1.2)],
+    ('8-9', 'dominant'):      [(30.0, 9.0), (5.5, 1.3), (7.3, 1.3), (10.0, 2.0), (6.0, 1.6), (4.6, 0.8), (4.8, 0.9)],
+    ('8-9', 'non-dominant'):  [(70.0, 22.0), (6.3, 1.5), (8.2, 1.5), (13.0, 2.8), (7.6, 2.0), (5.0, 0.9), (5.2, 1.0)],
+    ('10-11', 'dominant'):    [(22.0, 6.0), (4.8, 1.0), (6.5, 1.1), (8.7, 1.6), (5.0, 1.2), (4.1, 0.7), (4.3, 0.7)],
+    ('10-11', 'non-dominant'): [(55.0, 16.0), (5.5, 1.2), (7.3, 1.2), (11.2, 2.2), (6.4, 1.6), (4.5, 0.8), (4.7, 0.8)],
+    ('12-13', 'dominant'):    [(17.0, 4.5), (4.3, 0.9), (6.0, 0.9), (7.8, 1.4), (4.3, 1.0), (3.7, 0.6), (3.9, 0.6)],
+    ('12-13', 'non-dominant'): [(45.0, 13.0), (5.0, 1.0), (6.7, 1.0), (10.0, 1.9), (5.5, 1.3), (4.0, 0.7), (4.2, 0.7)],
+    ('14-15', 'dominant'):    [(14.0, 3.5), (4.0, 0.8), (5.7, 0.8), (7.2, 1.2), (3.9, 0.9), (3.4, 0.5), (3.6, 0.5)],
+    ('14-15', 'non-dominant'): [(38.0, 11.0), (4.6, 0.9), (6.3, 0.9), (9.2, 1.7), (5.0, 1.1), (3.7, 0.6), (3.9, 0.6)],
+    ('16-19', 'dominant'):    [(12.5, 3.0), (3.8, 0.7), (5.5, 0.8), (6.8, 1.1), (3.6, 0.8), (3.2, 0.5), (3.4, 0.5)],
+    ('16-19', 'non-dominant'): [(33.0, 9.0), (4.3, 0.8), (6.0, 0.9), (8.6, 1.5), (4.6, 1.0), (3.5, 0.5), (3.7, 0.5)],
+}
+
+# z-score thresholds (slower than the mean is positive) and their categories
+CATEGORY_THRESHOLDS = [1.0, 2.0, 3.0]
+CATEGORIES = ['Within Normal Range', 'Mildly Delayed', 'Moderately Delayed', 'Significantly Delayed']
+NOT_SCORED = 'Not scored'
+
+# Half-width of the interquartile range in standard deviations (normal distribution)
+IQR_Z = 0.6745
+
+
+def subtest_key(test_name):
+    """Map a test name such as 'Stacking Checkers' onto a subtest key (or None)"""
+    name = (test_name or '').lower()
+    for key, keywords in SUBTEST_KEYWORDS:
+        if any(keyword in name for keyword in keywords):
+            return key
+    return None
+
+
+def age_group(age):
+    """Age band label for an age in years, clamped to the bands NORMS covers (None when not a finite number)"""
+    if isinstance(age, bool):
+        return None
+    try:
+        age = float(age)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(age):
+        return None
+    for lower, upper, label in AGE_GROUPS:
+        if lower <= age < upper:
+            return label
+    return AGE_GROUPS[0][2] if age < AGE_GROUPS[0][0] else AGE_GROUPS[-1][2]
+
+
+def normal_cdf(z):
+    """Vectorized standard normal CDF (Abramowitz & Stegun 7.1.26 erf, |error| < 1.5e-7)"""
+    x = np.abs(z) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+def score_test_results(test_results, age, hand='dominant'):
+    """
+    Score a whole JHFT test_results array against the normative tables at once
+    
+    Args:
+        test_results: List of {'testName' | 'name', 'timeInSeconds' | 'time', ...}
+        age: Child's age in years
+        hand: 'dominant' or 'non-dominant' (a per-test 'hand' field overrides it)
+    
+    Returns:
+        dict: {'ageGroup', 'hand', 'subtests': [...], 'overall': {...}}, or None
+              when the age cannot be mapped onto a normative band
+    """
+    group = age_group(age)
+    if group is None:
+        return None
+    if hand not in HANDS:
+        raise ValueError(f"hand must be one of {', '.join(HANDS)}")
+    
+    count = len(test_results)
+    means = np.full(count, np.nan)
+    sds = np.full(count, np.nan)
+    times = np.full(count, np.nan)
+    keys = []
+    hands = []
+    
+    for i, test in enumerate(test_results):
+        key = subtest_key(test.get('testName', test.get('name')))
+        test_hand = test.get('hand') or hand
+        test_hand = 'non-dominant' if str(test_hand).lower().startswith('non') else 'dominant'
+        keys.append(key)
+        hands.append(test_hand)
+        
+        time = test.get('timeInSeconds', test.get('time'))
+        # bool is an int subclass, but True is not a completion time
+        if key is None or isinstance(time, bool) or not isinstance(time, (int, float)) or time <= 0:
+            continue
+        means[i], sds[i] = NORMS[(group, test_hand)][SUBTESTS.index(key)]
+        times[i] = time
+    
+    z_scores = (times - means) / sds
+    scored = ~np.isnan(z_scores)
+    # Percentage of same-age peers who were slower than the child
+    percentiles = 100.0 * (1.0 - normal_cdf(np.where(scored, z_scores, 0.0)))
+    q1 = means - IQR_Z * sds
+    q3 = means + IQR_Z * sds
+    category_index = np.digitize(np.where(scored, z_scores, 0.0), CATEGORY_THRESHOLDS, right=True)
+    
+    subtests = []
+    for i, test in enumerate(test_results):
+        entry = {
+            'testName': test.get('testName', test.get('name')),
+            'subtest': keys[i],
+            'hand': hands[i],
+            'timeInSeconds': test.get('timeInSeconds', test.get('time')),
+        }
+        if scored[i]:
+            entry.update({
+                'normMean': float(means[i]),
+                'normSd': float(sds[i]),
+                'normIqr': [round(float(q1[i]), 2), round(float(q3[i]), 2)],
+                'zScore': round(float(z_scores[i]), 2),
+                'percentile': round(float(percentiles[i]), 1),
+                'iqrFlag': 'slower' if times[i] > q3[i] else 'faster' if times[i] < q1[i] else 'within',
+                'category': CATEGORIES[category_index[i]],
+            })
+        else:
+            entry['category'] = NOT_SCORED
+        subtests.append(entry)
+    
+    overall = {'scoredSubtests': int(scored.sum())}
+    if scored.any():
+        mean_z = float(z_scores[scored].mean())
+        overall.update({
+            'meanZScore': round(mean_z, 2),
+            'maxZScore': round(float(z_scores[scored].max()), 2),
+            'subtestsOutsideIqr': int((times[scored] > q3[scored]).sum() + (times[scored] < q1[scored]).sum()),
+            'subtestsDelayed': int((z_scores[scored] > CATEGORY_THRESHOLDS[0]).sum()),
+            'category': CATEGORIES[int(np.digitize(mean_z, CATEGORY_THRESHOLDS, right=True))],
+        })
+    else:
+        overall['category'] = NOT_SCORED
+    
+    return {'ageGroup': group, 'hand': hand, 'subtests': subtests, 'overall': overall}
@@ -0,0 +1,169 @@
+import os
+import socket
+import threading
+import time
+
+from utils.heartbeat import Heartbeat
+
+
+class RetryJob(Exception):
+    """Raised by a handler when a job could not run for a transient reason; it is requeued without using an attempt"""
+
+
+class JobWorker:
+    """
+    Pool of background threads draining a Mongo-backed job queue
+    
+    Each thread claims one job at a time from the queue model (claim /
+    complete / fail), runs the handler on it and records the outcome. The
+    job's lease is renewed every third of lease_seconds while the handler
+    runs, so a slow job is not reclaimed by another worker mid-way. A handler
+    that raises RetryJob (e.g. because upstream is unavailable) has its job
+    put back in the queue with the attempt refunded. Threads
+    sleep between polls unless notify() signals new work enqueued in this
+    process. Threads do not survive fork(), so start() must be called in the
+    process that should run them; calling it again is a no-op.
+    
+    Args:
+        queue: Queue model exposing claim(worker_id, lease_seconds), renew(job_id, worker_id, lease_seconds),
+               complete(job_id, worker_id, result_id), fail(job_id, worker_id, error) and
+               requeue(job_id, worker_id, reason)
+        handler: Callable job -> (result_id, error)
+        threads: Number of worker threads
+        poll_interval: Seconds between polls of an empty queue
+        lease_seconds: How long a claimed job stays reserved without a renewal before another worker may reclaim it
+        max_attempts: Claims (including reclaims after a crash) before a job is failed
+        name: Thread name prefix
+        paused: Optional callable; no new jobs are claimed while it returns True
+    """
+    
+    def __init__(self, queue, handler, threads=2, poll_interval=1.0, lease_seconds=300, max_attempts=3, name='jobs',
+                 paused=None):
+        self.queue = queue
+        self.handler = handler
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.name = name
+        self.paused = paused
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        """Forget threads inherited from a parent process (they do not exist here)"""
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._finished = threading.Condition()
+        self._stats = {'succeeded': 0, 'failed': 0, 'requeued': 0, 'busy': 0, 'total_run_time': 0.0}
+    
+    def start(self):
+        """Start the worker threads in the current process"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            for i in range(self.threads):
+                thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+    
+    def notify(self):
+        """Wake idle threads because a job was just enqueued"""
+        self._wakeup.set()
+    
+    def wait(self, timeout):
+        """Block until any job finishes in this process or timeout seconds pass"""
+        with self._finished:
+            self._finished.wait(timeout)
+    
+    def _run(self):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while not self._stop.is_set():
+            if self.paused is not None and self.paused():
+                self._stop.wait(self.poll_interval)
+                continue
+            try:
+                job = self.queue.claim(worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"Job claim failed: {str(e)}")
+                job = None
+            
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            
+            if not self._process(job, worker_id):
+                # Give whatever made the job retry a moment before claiming again
+                self._stop.wait(self.poll_interval)
+    
+    def _process(self, job, worker_id):
+        """Run one claimed job; returns False when it was requeued"""
+        job_id = str(job['_id'])
+        started = time.perf_counter()
+        with self._lock:
+            self._stats['busy'] += 1
+        
+        retry = None
+        if job.get('attempts', 1) > self.max_attempts:
+            result_id, error = None, f"Gave up after {self.max_attempts} attempts"
+        else:
+            heartbeat = Heartbeat(
+                self.lease_seconds / 3,
+                lambda: self.queue.renew(job_id, worker_id, self.lease_seconds),
+                name=f"{threading.current_thread().name}-lease"
+            )
+            try:
+                with heartbeat:
+                    result_id, error = self.handler(job)
+            except RetryJob as e:
+                result_id, error, retry = None, None, str(e)
+            except Exception as e:
+                result_id, error = None, str(e)
+        
+        try:
+            # A no-op when the lease was lost and another worker now owns the job
+            if retry is not None:
+                self.queue.requeue(job_id, worker_id, retry)
+            elif error:
+                self.queue.fail(job_id, worker_id, error)
+            else:
+                self.queue.complete(job_id, worker_id, result_id)
+        except Exception as e:
+            # The lease expires and another worker picks the job up again
+            print(f"Recording job {job_id} failed: {str(e)}")
+        
+        with self._lock:
+            self._stats['busy'] -= 1
+            if retry is not None:
+                self._stats['requeued'] += 1
+            else:
+                self._stats['failed' if error else 'succeeded'] += 1
+                self._stats['total_run_time'] += time.perf_counter() - started
+        if retry is None:
+            with self._finished:
+                self._finished.notify_all()
+        return retry is None
+    
+    def stats(self):
+        with self._lock:
+            finished = self._stats['succeeded'] + self._stats['failed']
+            return {
+                'pid': os.getpid(),
+                'threads': sum(1 for thread in self._threads if thread.is_alive()),
+                'busy': self._stats['busy'],
+                'succeeded': self._stats['succeeded'],
+                'failed': self._stats['failed'],
+                'requeued': self._stats['requeued'],
+                'avg_run_time_ms': self._stats['total_run_time'] / finished * 1000 if finished else 0.0
+            }
@@ -0,0 +1,323 @@
+import json
+import math
+import random
+import re
+import threading
+from collections import defaultdict
+from services.response_cache import normalize_message
+
+WORD = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+
+# Words too common to say anything about what the child means
+STOPWORDS = frozenset("""
+a an and are at be but can do does did for from have has i i'm im in is it it's its me my of on or so that the
+then there this to was we were what when where who why will with you your
+""".split())
+
+# Built-in intents, most specific first: on equal keyword hits the earlier
+# intent wins. keywords are matched as whole words or phrases (plurals
+# included); examples feed the similarity fallback for messages that hit
+# no keyword.
+INTENTS = [
+    {
+        'name': 'sad',
+        'keywords': ['sad', 'bad', 'upset', 'cry', 'crying', 'angry', 'mad', 'scared', 'afraid', 'worried', 'lonely',
+                     'hurt', 'not good', 'not happy', 'feel bad'],
+        'examples': ['i feel sad today', 'i am upset', 'nobody wants to play with me', 'i had a bad day at school',
+                     'i miss my mom', 'something is wrong', 'i do not feel well'],
+        'responses': [
+            "I'm sorry you're feeling that way. It's okay to have big feelings. Do you want to tell me more?",
+            "That sounds hard. 💛 I'm here to listen. What happened?",
+            "Thank you for telling me how you feel. It's okay to feel that way. Would you like to talk about it?"
+        ]
+    },
+    {
+        'name': 'happy',
+        'keywords': ['happy', 'good', 'great', 'awesome', 'excited', 'fun', 'yay', 'amazing', 'fine'],
+        'examples': ['i feel good today', 'today was a fun day', 'i am so excited', 'i won a game',
+                     'i got a present'],
+        'responses': [
+            "That's wonderful! 😊 I'm so glad you're feeling good! What makes you happy?",
+            "Yay! 🌟 That sounds great! What was the best part?",
+            "I love hearing that! 😊 What else made today fun?"
+        ]
+    },
+    {
+        'name': 'animals',
+        'keywords': ['animal', 'dog', 'puppy', 'cat', 'kitten', 'pet', 'fish', 'bird', 'horse', 'rabbit', 'bunny',
+                     'dinosaur', 'lion', 'tiger', 'elephant', 'hamster'],
+        'examples': ['i have a little brother who barks', 'we went to the zoo', 'i like to feed the ducks',
+                     'my grandma has a farm'],
+        'responses': [
+            "Animals are awesome! Do you have a favorite animal? I love hearing about pets! 🐶🐱",
+            "Ooh, I love animals! 🐾 What sound does your favorite animal make?",
+            "Animals are so cool! 🦁 If you could be any animal, which one would you be?"
+        ]
+    },
+    {
+        'name': 'colors',
+        'keywords': ['color', 'colour', 'red', 'blue', 'green', 'yellow', 'purple', 'pink', 'orange', 'rainbow'],
+        'examples': ['i like to paint', 'i drew a picture', 'my shirt is bright today'],
+        'responses': [
+            "Colors are so fun! What's your favorite color? Mine changes all the time! 🌈",
+            "What a nice color! 🎨 What things do you know that are that color?"
+        ]
+    },
+    {
+        'name': 'games',
+        'keywords': ['game', 'play', 'playing', 'lego', 'minecraft', 'toy', 'puzzle', 'video game', 'ball',
+                     'soccer', 'football'],
+        'examples': ['i built a tower', 'we went to the park', 'i kicked it really far'],
+        'responses': [
+            "Playing is the best! 🎲 What's your favorite game to play?",
+            "That sounds like so much fun! 🧩 Who do you like to play with?"
+        ]
+    },
+    {
+        'name': 'school',
+        'keywords': ['school', 'teacher', 'class', 'homework', 'friend', 'friends', 'recess', 'reading', 'math'],
+        'examples': ['i learned something new', 'we had a test', 'i read a book'],
+        'responses': [
+            "School has lots going on! 📚 What's your favorite part of the day?",
+            "That's interesting! ✏️ What did you learn about?"
+        ]
+    },
+    {
+        'name': 'food',
+        'keywords': ['food', 'eat', 'eating', 'hungry', 'pizza', 'ice cream', 'cookie', 'snack', 'lunch', 'dinner',
+                     'breakfast', 'candy', 'apple'],
+        'examples': ['i want something yummy', 'my dad cooked today', 'it was delicious'],
+        'responses': [
+            "Yum! 🍕 What's your favorite food?",
+            "That sounds tasty! 🍎 Do you like sweet or crunchy snacks more?"
+        ]
+    },
+    {
+        'name': 'joke',
+        'keywords': ['joke', 'jokes', 'funny', 'laugh', 'silly'],
+        'examples': ['make me laugh', 'tell me something silly'],
+        'responses': [
+            "Here's a silly one: Why did the teddy bear say no to dessert? Because she was stuffed! 🧸 Do you like jokes?",
+            "Why did the cookie go to the doctor? Because it felt crummy! 🍪 Do you know a joke?"
+        ]
+    },
+    {
+        'name': 'identity',
+        'keywords': ['name', 'who are you', 'what are you', 'are you real', 'robot'],
+        'examples': ['tell me about you', 'how old are you'],
+        'responses': [
+            "I'm your friendly chat buddy! I'm here to talk and listen. What's your name?",
+            "I'm a chat buddy who loves to listen! 😊 What should I call you?"
+        ]
+    },
+    {
+        'name': 'likes',
+        'keywords': ['like', 'love', 'favorite', 'favourite', 'best'],
+        'examples': ['i really enjoy it', 'that is my thing'],
+        'responses': [
+            "That sounds really cool! Tell me more about what you like! 🌟",
+            "I love that! 😊 What do you like most about it?"
+        ]
+    },
+    {
+        'name': 'greeting',
+        'keywords': ['hi', 'hello', 'hey', 'hiya', 'howdy', 'good morning', 'good afternoon', 'good evening'],
+        'examples': ['how are you', 'whats up', 'nice to meet you'],
+        'responses': [
+            "Hi there! 👋 I'm happy to talk with you! What would you like to chat about?",
+            "Hello! 😊 It's so nice to see you! How is your day going?"
+        ]
+    },
+    {
+        'name': 'goodbye',
+        'keywords': ['bye', 'goodbye', 'see you', 'good night', 'gotta go'],
+        'examples': ['i have to leave now', 'talk later'],
+        'responses': [
+            "Bye for now! 👋 It was so nice talking with you!",
+            "See you next time! 🌟 You did a great job chatting today!"
+        ]
+    }
+]
+
+# Replies for messages that match no intent
+GENERIC_RESPONSES = [
+    "That's really interesting! Can you tell me more about that? 😊",
+    "I love hearing what you have to say! What else would you like to talk about?",
+    "You're doing a great job sharing! Do you have a favorite thing to do?",
+    "That's so cool! Would you like to tell me something else?",
+    "Thanks for sharing that with me! What makes you smile? 😊",
+]
+
+
+def tokenize(text):
+    """Normalized word tokens with a plural "s" dropped, so "dogs" and "dog" match"""
+    tokens = []
+    for token in WORD.findall(normalize_message(text)):
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class LocalResponder:
+    """
+    Local chat replies from an intent catalog, used when the OnDemand API is
+    unavailable or too slow
+    
+    Keyword phrases are indexed by their first token, so a message is
+    matched in one pass over its words regardless of catalog size, and only
+    whole words match ("this" no longer matches "hi"). The intent with the
+    most keyword hits wins. A message that hits no keyword is compared with
+    each intent's examples by TF-IDF cosine similarity through an inverted
+    index; below min_similarity a generic reply is given.
+    
+    Args:
+        intents: Catalog entries {name, keywords, examples, responses}
+        generic_responses: Replies when nothing matches
+        min_similarity: Cosine similarity needed to use an intent without a keyword hit
+    """
+    
+    def __init__(self, intents=INTENTS, generic_responses=GENERIC_RESPONSES, min_similarity=0.3):
+        self.intents = list(intents)
+        self.generic_responses = list(generic_responses)
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._counters = {'keyword': 0, 'similar': 0, 'generic': 0}
+        self._build_keyword_index()
+        self._build_similarity_index()
+    
+    @classmethod
+    def load(cls, path=None, **kwargs):
+        """
+        Built-in catalog, extended from a JSON file when path is given
+        
+        The file holds {"intents": [...], "generic_responses": [...]}; an
+        intent with the name of a built-in one replaces it, others are added
+        after the built-ins.
+        """
+        intents = list(INTENTS)
+        generic_responses = GENERIC_RESPONSES
+        if path:
+            with open(path, encoding='utf-8') as f:
+                catalog = json.load(f)
+            names = {intent['name']: i for i, intent in enumerate(intents)}
+            for intent in catalog.get('intents', []):
+                if intent['name'] in names:
+                    intents[names[intent['name']]] = intent
+                else:
+                    intents.append(intent)
+            generic_responses = catalog.get('generic_responses') or generic_responses
+        return cls(intents, generic_responses, **kwargs)
+    
+    def _build_keyword_index(self):
+        # first token -> [(phrase tokens, intent index)], longest phrases first
+        self._phrases = defaultdict(list)
+        for i, intent in enumerate(self.intents):
+            for keyword in intent.get('keywords', []):
+                phrase = tuple(tokenize(keyword))
+                if phrase:
+                    self._phrases[phrase[0]].append((phrase, i))
+        for entries in self._phrases.values():
+            entries.sort(key=lambda entry: -len(entry[0]))
+    
+    def _build_similarity_index(self):
+        documents = [
+            (i, [token for token in tokenize(example) if token not in STOPWORDS])
+            for i, intent in enumerate(self.intents)
+            for example in intent.get('examples', []) + intent.get('keywords', [])
+        ]
+        document_frequency = defaultdict(int)
+        for _, tokens in documents:
+            for token in set(tokens):
+                document_frequency[token] += 1
+        self._idf = {
+            token: math.log((1 + len(documents)) / (1 + count)) + 1
+            for token, count in document_frequency.items()
+        }
+        # token -> [(document, weight)] with unit-length document vectors
+        self._postings = defaultdict(list)
+        self._document_intents = []
+        for i, tokens in documents:
+            vector = self._vector(tokens)
+            if not vector:
+                continue
+            document = len(self._document_intents)
+            self._document_intents.append(i)
+            for token, weight in vector.items():
+                self._postings[token].append((document, weight))
+    
+    def _vector(self, tokens):
+        counts = defaultdict(int)
+        for token in tokens:
+            if token in self._idf:
+                counts[token] += 1
+        vector = {token: count * self._idf[token] for token, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {token: weight / norm for token, weight in vector.items()} if norm else {}
+    
+    def match_keywords(self, tokens):
+        """Index of the intent with the most keyword hits, or None"""
+        hits = defaultdict(int)
+        position = 0
+        while position < len(tokens):
+            step = 1
+            for phrase, intent in self._phrases.get(tokens[position], ()):
+                if tuple(tokens[position:position + len(phrase)]) == phrase:
+                    hits[intent] += 1
+                    step = len(phrase)
+                    break
+            position += step
+        if not hits:
+            return None
+        return min(hits, key=lambda intent: (-hits[intent], intent))
+    
+    def match_similar(self, tokens):
+        """Index of the intent whose example is most similar, or None below min_similarity"""
+        query = self._vector([token for token in tokens if token not in STOPWORDS])
+        scores = defaultdict(float)
+        for token, weight in query.items():
+            for document, document_weight in self._postings[token]:
+                scores[document] += weight * document_weight
+        if not scores:
+            return None
+        document = max(scores, key=scores.get)
+        if scores[document] < self.min_similarity:
+            return None
+        return self._document_intents[document]
+    
+    def _match(self, message):
+        tokens = tokenize(message)
+        intent = self.match_keywords(tokens)
+        if intent is not None:
+            return intent, 'keyword'
+        intent = self.match_similar(tokens)
+        if intent is not None:
+            return intent, 'similar'
+        return None, 'generic'
+    
+    def classify(self, message):
+        """
+        Match a message against the catalog
+        
+        Returns:
+            tuple: (intent name or None, how it matched: 'keyword', 'similar' or 'generic')
+        """
+        intent, method = self._match(message)
+        return (self.intents[intent]['name'] if intent is not None else None), method
+    
+    def respond(self, message):
+        """Reply to a chat message from the catalog"""
+        intent, method = self._match(message)
+        with self._lock:
+            self._counters[method] += 1
+        if intent is None:
+            return random.choice(self.generic_responses)
+        return random.choice(self.intents[intent]['responses'])
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'intents': len(self.intents),
+                'keywords': sum(len(entries) for entries in self._phrases.values()),
+                **self._counters
+            }
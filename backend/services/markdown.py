@@ -0,0 +1,299 @@
+import re
+
+CODE_BLOCK = re.compile(r'```[\s\S]*?```')
+INLINE_CODE = re.compile(r'`[^`\n]+`')
+HEADER = re.compile(r'#{1,6}\s+')
+BOLD_ITALIC = re.compile(r'\*\*\*(.+?)\*\*\*')
+BOLD = re.compile(r'\*\*(.+?)\*\*')
+ITALIC = re.compile(r'\*(.+?)\*')
+UNDERSCORE_BOLD_ITALIC = re.compile(r'___(.+?)___')
+UNDERSCORE_BOLD = re.compile(r'__(.+?)__')
+UNDERSCORE_ITALIC = re.compile(r'_(.+?)_')
+LINK = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+IMAGE = re.compile(r'!\[([^\]]*)\]\([^\)]+\)')
+HORIZONTAL_RULE = re.compile(r'^\s*[-*_]{3,}\s*$', re.MULTILINE)
+# r'^>\s+' (multiline) with the line-start check moved after the '>', so the
+# regex engine can jump from '>' to '>' instead of trying every position
+BLOCKQUOTE = re.compile(r'>(?<!.>)\s+')
+LIST_MARKER = re.compile(r'^\s*[-*+]\s+', re.MULTILINE)
+NUMBERED_MARKER = re.compile(r'^\s*\d+\.\s+', re.MULTILINE)
+EXTRA_BLANK_LINES = re.compile(r'\n{3,}')
+
+# The stripping rules, in the order they must run, each with the literal
+# substrings one of which must be present for its pattern to match. Later
+# rules see the output of earlier ones (e.g. the link rule turns "![a](b)"
+# into "!a" before the image rule runs). strip_markdown reproduces their
+# combined effect in one pass over the lines and only runs them in turn for
+# text where a rule could match across a line break.
+PASSES = [
+    # Code blocks and inline code
+    (CODE_BLOCK, '', ('```',)),
+    (INLINE_CODE, '', ('`',)),
+    # Headers
+    (HEADER, '', ('#',)),
+    # Bold and italic
+    (BOLD_ITALIC, r'\1', ('***',)),
+    (BOLD, r'\1', ('**',)),
+    (ITALIC, r'\1', ('*',)),
+    (UNDERSCORE_BOLD_ITALIC, r'\1', ('___',)),
+    (UNDERSCORE_BOLD, r'\1', ('__',)),
+    (UNDERSCORE_ITALIC, r'\1', ('_',)),
+    # Links (keeping their text), then images
+    (LINK, r'\1', ('](',)),
+    (IMAGE, '', ('![',)),
+    # Horizontal rules, blockquotes and list markers
+    (HORIZONTAL_RULE, '', ('-', '*', '_')),
+    (BLOCKQUOTE, '', ('>',)),
+    (LIST_MARKER, '', ('-', '*', '+')),
+    (NUMBERED_MARKER, '', ('.',)),
+    # Extra blank lines
+    (EXTRA_BLANK_LINES, '\n\n', ('\n\n\n',)),
+]
+
+# A '#' run the header rule would strip together with the line break after it
+HEADER_AT_LINE_END = re.compile(r'#\s*\Z')
+
+
+def _open_bracket(line):
+    """Whether a link or image could continue past the end of the line"""
+    return '[' in line and (line.rfind('[') > line.rfind(']') or line.rfind('](') > line.rfind(')'))
+
+
+# The rules that apply within a line (code spans up to images), each with a
+# check for the line ends they could run past, in which case the line cannot
+# be cleaned on its own
+LINE_PASSES = [
+    (INLINE_CODE, '', ('`',), None),
+    (HEADER, '', ('#',), HEADER_AT_LINE_END.search),
+    (BOLD_ITALIC, r'\1', ('***',), None),
+    (BOLD, r'\1', ('**',), None),
+    (ITALIC, r'\1', ('*',), None),
+    (UNDERSCORE_BOLD_ITALIC, r'\1', ('___',), None),
+    (UNDERSCORE_BOLD, r'\1', ('__',), None),
+    (UNDERSCORE_ITALIC, r'\1', ('_',), None),
+    (LINK, r'\1', ('](',), _open_bracket),
+    (IMAGE, '', ('![',), _open_bracket),
+]
+HEADER_PASSES = LINE_PASSES[1:2]
+STAR_PASSES = LINE_PASSES[2:5]
+
+# A line the horizontal rule pattern removes entirely
+RULE_LINE = re.compile(r'\s*[-*_]{3,}\s*\Z')
+# Blockquote, list and numbered markers at the start of a line, in the order
+# their rules run; group 1 is set when a list or numbered marker is present
+LINE_START = re.compile(r'(?:>\s+)?(\s*(?:[-*+]\s+(?:\d+\.\s+)?|\d+\.\s+))?')
+# What is left of a line when a marker rule could match into the next line
+DANGLING_MARKER = re.compile(r'>?\s*(?:[-*+]|\d+\.)?\s*\Z')
+
+
+def _strip_line(line, passes):
+    """Apply the given in-line rules to one line (None when one could match past its end)"""
+    for pattern, replacement, triggers, spills in passes:
+        if spills is not None and spills(line):
+            return None
+        for trigger in triggers:
+            if trigger in line:
+                line = pattern.sub(replacement, line)
+                break
+    return line
+
+
+def _strip_header(line):
+    """The header rule on a line without code spans (None when it could match past its end)"""
+    if line[0] == '#':
+        body = line.lstrip('#')
+        text = body.lstrip()
+        # The common "## Title" line: the last six '#' and the spaces go
+        if body[:1].isspace() and text and '#' not in text:
+            return '#' * (len(line) - len(body) - 6) + text
+    return _strip_line(line, HEADER_PASSES)
+
+
+def _strip_stars(line):
+    """The three '*' emphasis rules on a line"""
+    if '****' not in line:
+        # With star runs no longer than three, each rule pairs its own runs
+        # from left to right; the shortcut holds while the '***' and '**'
+        # runs pair up evenly, as a leftover one would be rescanned by the
+        # rules after it
+        triple = line.count('***')
+        double = line.count('**') - triple
+        if not triple % 2 and not double % 2:
+            if triple:
+                line = line.replace('***', '')
+            if double:
+                line = line.replace('**', '')
+            single = line.count('*')
+            if single % 2:
+                last = line.rfind('*')
+                return line[:last].replace('*', '') + line[last:]
+            return line.replace('*', '') if single else line
+    return _strip_line(line, STAR_PASSES)
+
+
+def _strip_lines(text):
+    """
+    The rules after the code blocks in a single pass over the lines
+    
+    In-line rules are applied line by line, and the line-start rules drop
+    the blank lines their patterns' leading and trailing whitespace would
+    swallow. Returns None for text where a rule could match across a line
+    break, which only the passes over the whole text reproduce.
+    """
+    code = '`' in text
+    headers = '#' in text
+    stars = '*' in text
+    others = '_' in text or '[' in text
+    lines = []
+    # Blank lines since the last kept line; a list or numbered marker drops them
+    blanks = []
+    after_rule = False
+    # Whether the blank lines swallowed after a rule ended with an empty line,
+    # which lets the next rule's match start there
+    rule_joins = False
+    for line in text.split('\n'):
+        if (code and '`' in line) or (others and ('_' in line or '[' in line)):
+            line = _strip_line(line, LINE_PASSES)
+            if line is None:
+                return None
+        else:
+            if headers and '#' in line:
+                line = _strip_header(line)
+                if line is None:
+                    return None
+            if stars and '*' in line:
+                line = _strip_stars(line)
+        
+        if not line or line.isspace():
+            if after_rule:
+                rule_joins = not line
+            else:
+                blanks.append(line)
+            continue
+        first = line[0]
+        if (first.isspace() or (first in '-*_' and line[1:2] in ('-', '*', '_'))) and RULE_LINE.match(line):
+            # The rule and the blank lines around it become one empty line,
+            # which a following rule joins when an empty line came between
+            if not after_rule:
+                blanks = ['']
+            elif not rule_joins:
+                blanks.append('')
+            after_rule = True
+            rule_joins = False
+            continue
+        after_rule = False
+        if first in '-*+' and line[1:2] == ' ' and line[2:3].isalpha():
+            # The common "- item" line
+            blanks = []
+            line = line[2:]
+        elif first in '>-*+' or first.isspace() or first.isdecimal():
+            match = LINE_START.match(line)
+            # Only a line ending in a space or a marker character can dangle
+            last = line[-1]
+            if (last in '>-*+.' or last.isspace()) and DANGLING_MARKER.match(line, match.end()):
+                return None
+            if match.group(1) is not None:
+                blanks = []
+            line = line[match.end():]
+        if blanks:
+            lines += blanks
+            blanks = []
+        lines.append(line)
+    lines += blanks
+    
+    text = '\n'.join(lines)
+    if '\n\n\n' in text:
+        text = EXTRA_BLANK_LINES.sub('\n\n', text)
+    return text
+
+
+def strip_markdown(text):
+    """Apply every stripping rule without trimming the ends (for text cleaned piece by piece)"""
+    if '```' in text:
+        text = CODE_BLOCK.sub('', text)
+    stripped = _strip_lines(text)
+    if stripped is not None:
+        return stripped
+    for pattern, replacement, triggers in PASSES[1:]:
+        for trigger in triggers:
+            if trigger in text:
+                text = pattern.sub(replacement, text)
+                break
+    return text
+
+
+def remove_markdown(text):
+    """Remove markdown formatting from text"""
+    if not text:
+        return text
+    return strip_markdown(text).strip()
+
+
+class MarkdownStream:
+    """
+    Strip markdown from streamed text as it arrives
+    
+    Text is released up to the end of the last complete non-blank line (never
+    inside an unclosed code fence), since every rule remove_markdown applies
+    is line-local apart from fences and the ones that span blank lines, which
+    therefore always see the blank lines together with the line after them.
+    In eager mode a partial line is also released word by word as long as it
+    holds nothing that could start markdown. The result is a close preview;
+    callers that need the exact text run remove_markdown on the full answer.
+    """
+    # Characters that may open inline or heading markup
+    MARKUP_CHARS = frozenset('*_`#[>')
+    # Line starts that may turn out to be a list marker, numbered item or rule
+    LINE_MARKER = re.compile(r'\s*[-+*\d]')
+    
+    def __init__(self, eager=False):
+        self.eager = eager
+        self._pending = ''
+        # '' before any text, '\n' at a line start, 'x' in the middle of a line
+        self._context = ''
+    
+    def feed(self, chunk):
+        """Add streamed text; returns the cleaned text that is now final"""
+        self._pending += chunk
+        released = ''
+        complete = self._pending[:self._pending.rfind('\n') + 1]
+        end = len(complete.rstrip())
+        if end:
+            cut = complete.index('\n', end) + 1
+            block = self._pending[:cut]
+            if block.count('```') % 2:
+                return ''
+            self._pending = self._pending[cut:]
+            released = self._clean(block, '\n')
+        if self.eager and '\n' not in self._pending:
+            released += self._release_words()
+        return released
+    
+    def flush(self):
+        """Clean whatever is left once the stream has ended"""
+        block, self._pending = self._pending, ''
+        return self._clean(block, '\n').rstrip()
+    
+    def _release_words(self):
+        pending = self._pending
+        if any(char in self.MARKUP_CHARS for char in pending):
+            return ''
+        if self._context != 'x' and self.LINE_MARKER.match(pending):
+            return ''
+        cut = max(pending.rfind(' '), pending.rfind('\t')) + 1
+        if not cut:
+            return ''
+        self._pending = pending[cut:]
+        return self._clean(pending[:cut], 'x')
+    
+    def _clean(self, block, ends):
+        prefix = self._context
+        if not prefix:
+            text = strip_markdown(block).lstrip()
+            self._context = ends if text else ''
+            return text
+        # Re-attach what preceded the block so line-start and blank-line
+        # rules behave as they would on the whole text
+        text = strip_markdown(prefix + block)
+        self._context = ends
+        return text[1:] if text.startswith(prefix) else text
@@ -1,7 +1,23 @@
 import requests
 import os
-import re
+import json
+import time
+import hashlib
+import queue
+import threading
 from dotenv import load_dotenv
+from config.config import Config
+from services.jhft_scoring import score_test_results, NOT_SCORED
+from services.http_client import PooledHttpClient
+from services.circuit_breaker import CircuitBreaker
+from services.bulkhead import Bulkhead
+from services.session_pool import SessionPool
+from services.response_cache import ResponseCache
+from services.local_responder import LocalResponder
+from services.conversation_memory import ConversationMemory
+from models.chat_conversation import ChatConversation
+from services.markdown import remove_markdown, MarkdownStream
+from utils.hedge import Hedge
 
 load_dotenv()
 
@@ -11,47 +27,79 @@ class OnDemandService:
     AGENT_ID = os.getenv('ONDEMAND_AGENT_ID')
     ENDPOINT_ID = os.getenv('ONDEMAND_ENDPOINT_ID', 'predefined-openai-gpt4o')
     
+    # Opens on a high failure or slow-call rate so callers fall back immediately
+    breaker = CircuitBreaker(
+        window=Config.BREAKER_WINDOW,
+        min_calls=Config.BREAKER_MIN_CALLS,
+        failure_rate=Config.BREAKER_FAILURE_RATE,
+        slow_rate=Config.BREAKER_SLOW_RATE,
+        open_seconds=Config.BREAKER_OPEN_SECONDS
+    )
+    
+    # Shared keep-alive connection pool for every OnDemand call in this process
+    http = PooledHttpClient(
+        pool_size=Config.ONDEMAND_POOL_SIZE,
+        connect_timeout=Config.ONDEMAND_CONNECT_TIMEOUT,
+        read_timeout=Config.ONDEMAND_READ_TIMEOUT,
+        max_retries=Config.ONDEMAND_MAX_RETRIES,
+        backoff_base=Config.ONDEMAND_BACKOFF_BASE,
+        backoff_max=Config.ONDEMAND_BACKOFF_MAX,
+        breaker=breaker
+    )
+    
+    # Separate limits on upstream calls in flight per purpose, so neither a
+    # burst of reports nor of chat messages can hold every request thread
+    bulkheads = {
+        'ice-breaker': Bulkhead(
+            max_concurrent=Config.ONDEMAND_CHAT_CONCURRENCY,
+            max_queue=Config.ONDEMAND_CHAT_QUEUE,
+            max_wait=Config.ONDEMAND_CHAT_QUEUE_WAIT
+        ),
+        'report': Bulkhead(
+            max_concurrent=Config.ONDEMAND_REPORT_CONCURRENCY,
+            max_queue=Config.ONDEMAND_REPORT_QUEUE,
+            max_wait=Config.ONDEMAND_REPORT_QUEUE_WAIT
+        )
+    }
+    BUSY = "Too many concurrent upstream requests"
+    
+    # Warm chat sessions keyed by (purpose, conversation id)
+    sessions = SessionPool(
+        lambda purpose, conversation_id: OnDemandService.new_session(purpose, conversation_id),
+        ttl=Config.ONDEMAND_SESSION_TTL,
+        max_uses=Config.ONDEMAND_SESSION_MAX_USES,
+        max_idle=Config.ONDEMAND_SESSION_MAX_IDLE,
+        max_keys=Config.ONDEMAND_SESSION_MAX_KEYS
+    )
+    
+    # Recent ice-breaker replies for frequently repeated messages
+    chat_cache = ResponseCache(
+        max_entries=Config.CHAT_CACHE_SIZE,
+        ttl=Config.CHAT_CACHE_TTL,
+        variants=Config.CHAT_CACHE_VARIANTS,
+        max_message_length=Config.CHAT_CACHE_MAX_MESSAGE_LENGTH
+    )
+    
+    # Intent catalog answering chat messages locally, indexed once per process
+    responder = LocalResponder.load(Config.CHAT_INTENTS_FILE, min_similarity=Config.CHAT_FALLBACK_MIN_SIMILARITY)
+    
+    # Races non-streamed chat calls against the local responder
+    chat_hedge = Hedge(Config.ONDEMAND_CHAT_HEDGE_BUDGET, name='ice-breaker-hedge')
+    
+    # Recent turns per chat conversation, sent upstream as context
+    memory = ConversationMemory(
+        max_conversations=Config.CHAT_MEMORY_CONVERSATIONS,
+        max_turns=Config.CHAT_MEMORY_TURNS,
+        token_budget=Config.CHAT_MEMORY_TOKEN_BUDGET,
+        max_turn_chars=Config.CHAT_MEMORY_MAX_TURN_CHARS,
+        ttl=Config.CHAT_MEMORY_TTL,
+        store=ChatConversation if Config.CHAT_MEMORY_STORE == 'mongo' else None
+    )
+    
     @staticmethod
     def remove_markdown(text):
         """Remove markdown formatting from text"""
-        if not text:
-            return text
-        
-        # Remove code blocks
-        text = re.sub(r'```[\s\S]*?```', '', text)
-        text = re.sub(r'`[^`\n]+`', '', text)
-        
-        # Remove headers
-        text = re.sub(r'#{1,6}\s+', '', text)
-        
-        # Remove bold and italic
-        text = re.sub(r'\*\*\*(.+?)\*\*\*', r'\1', text)
-        text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
-        text = re.sub(r'\*(.+?)\*', r'\1', text)
-        text = re.sub(r'___(.+?)___', r'\1', text)
-        text = re.sub(r'__(.+?)__', r'\1', text)
-        text = re.sub(r'_(.+?)_', r'\1', text)
-        
-        # Remove links but keep text
-        text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
-        
-        # Remove images
-        text = re.sub(r'!\[([^\]]*)\]\([^\)]+\)', '', text)
-        
-        # Remove horizontal rules
-        text = re.sub(r'^\s*[-*_]{3,}\s*$', '', text, flags=re.MULTILINE)
-        
-        # Remove blockquotes
-        text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
-        
-        # Remove list markers
-        text = re.sub(r'^\s*[-*+]\s+', '', text, flags=re.MULTILINE)
-        text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
-        
-        # Clean up extra whitespace
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        return text.strip()
+        return remove_markdown(text)
     
     @staticmethod
     def create_session(external_user_id):
@@ -62,15 +110,18 @@ class OnDemandService:
             "Content-Type": "application/json"
         }
         
-        # Use hardcoded unique externalUserId as required by OnDemand API
         payload = {
-            "externalUserId": "brainwave-assessment-user",
+            "externalUserId": external_user_id,
             "pluginIds": []
         }
         
         try:
             print(f"Creating session with payload: {payload}")
-            response = requests.post(url, json=payload, headers=headers)
+            # Safe to repeat: a retry after a lost response at worst leaves an unused empty session
+            response = OnDemandService.http.post(
+                url, 'create_session', idempotent=True, json=payload, headers=headers,
+                slow_after=Config.ONDEMAND_SESSION_SLOW_SECONDS
+            )
             print(f"Session creation response: {response.status_code}")
             print(f"Response body: {response.text}")
             response.raise_for_status()
@@ -82,8 +133,79 @@ class OnDemandService:
             return None, str(e)
     
     @staticmethod
-    def submit_query(session_id, query, reasoning_mode="medium"):
-        """Submit a query to the chat session"""
+    def external_user_id(purpose, conversation_id=None):
+        """
+        Stable externalUserId for a pooled session
+        
+        Conversation ids (e.g. a parent's Auth0 id) are hashed so they are not
+        sent upstream verbatim.
+        """
+        user_id = f"{Config.ONDEMAND_EXTERNAL_USER_PREFIX}-{purpose}"
+        if conversation_id:
+            digest = hashlib.sha256(str(conversation_id).encode('utf-8')).hexdigest()[:16]
+            user_id = f"{user_id}-{digest}"
+        return user_id
+    
+    @staticmethod
+    def new_session(purpose, conversation_id=None):
+        """Create an upstream session for the pool; returns (session_id, error)"""
+        session_response, error = OnDemandService.create_session(
+            OnDemandService.external_user_id(purpose, conversation_id)
+        )
+        if error:
+            return None, error
+        
+        session_id = (session_response or {}).get('data', {}).get('id')
+        if not session_id:
+            return None, "No session ID returned"
+        return session_id, None
+    
+    @staticmethod
+    def prewarm_sessions():
+        """
+        Keep unused chat and report sessions ready so new conversations and reports skip session setup
+        
+        The pool creates them in the background and tops them up after each one is taken.
+        """
+        if not OnDemandService.API_KEY:
+            return
+        OnDemandService.sessions.keep_warm('ice-breaker', Config.ONDEMAND_SESSION_PREWARM)
+        OnDemandService.sessions.keep_warm('report', Config.ONDEMAND_REPORT_SESSION_PREWARM)
+    
+    @staticmethod
+    def pooled_query(purpose, query, conversation_id=None, read_timeout=None, slow_after=None):
+        """
+        Submit a query on a pooled session, creating a session only when none is idle
+        
+        query may also be a callable session -> text, for queries that depend
+        on what the session has already seen.
+        
+        Returns:
+            tuple: (response: dict, session: dict, error: str)
+        """
+        bulkhead = OnDemandService.bulkheads[purpose]
+        ticket = bulkhead.acquire()
+        if ticket is None:
+            return None, None, OnDemandService.BUSY
+        
+        try:
+            session, error = OnDemandService.sessions.acquire(purpose, conversation_id)
+            if error:
+                return None, None, f"Failed to create session: {error}"
+            
+            if callable(query):
+                query = query(session)
+            response, error = OnDemandService.submit_query(
+                session['id'], query, read_timeout=read_timeout, slow_after=slow_after
+            )
+            OnDemandService.sessions.release(session, healthy=error is None)
+            return response, session, error
+        finally:
+            bulkhead.release(ticket)
+    
+    @staticmethod
+    def submit_query(session_id, query, reasoning_mode="medium", read_timeout=None, slow_after=None):
+        """Submit a query to the chat session (read_timeout / slow_after in seconds for the client and breaker)"""
         url = f"{OnDemandService.BASE_URL}/sessions/{session_id}/query"
         headers = {
             "apikey": OnDemandService.API_KEY,
@@ -99,7 +221,10 @@ class OnDemandService:
         
         try:
             print(f"Submitting query with payload: {payload}")
-            response = requests.post(url, json=payload, headers=headers)
+            response = OnDemandService.http.post(
+                url, 'submit_query', json=payload, headers=headers,
+                read_timeout=read_timeout, slow_after=slow_after
+            )
             print(f"Query response: {response.status_code}")
             print(f"Response body: {response.text}")
             response.raise_for_status()
@@ -111,17 +236,58 @@ class OnDemandService:
             return None, str(e)
     
     @staticmethod
-    def generate_assessment_report(assessment_data, parent_id):
-        """Generate a report from assessment data using OnDemand AI"""
-        # Create session
-        session_response, error = OnDemandService.create_session(parent_id)
-        if error:
-            return None, f"Failed to create session: {error}"
+    def stream_query(session_id, query, reasoning_mode="medium", read_timeout=None, slow_after=None, opened=None):
+        """
+        Submit a query in streaming response mode
         
-        session_id = session_response.get('data', {}).get('id')
-        if not session_id:
-            return None, "No session ID returned"
+        opened, when given, is called with the open response, so another
+        thread can close it to stop a read that is no longer wanted.
         
+        Yields:
+            dict: Each fulfillment event ('answer' holds the next piece of text)
+        
+        Raises:
+            requests.exceptions.RequestException: When the request or the stream fails
+        """
+        url = f"{OnDemandService.BASE_URL}/sessions/{session_id}/query"
+        headers = {
+            "apikey": OnDemandService.API_KEY,
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
+        }
+        
+        payload = {
+            "query": query,
+            "endpointId": OnDemandService.ENDPOINT_ID,
+            "pluginIds": [],
+            "responseMode": "stream"
+        }
+        
+        response = OnDemandService.http.post(
+            url, 'stream_query', json=payload, headers=headers,
+            read_timeout=read_timeout, slow_after=slow_after, stream=True
+        )
+        if opened is not None:
+            opened(response)
+        with response:
+            response.raise_for_status()
+            response.encoding = response.encoding or 'utf-8'
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    continue
+                if event.get('eventType') == 'fulfillment' and event.get('answer'):
+                    yield event
+    
+    @staticmethod
+    def build_full_report_query(assessment_data):
+        """Original report prompt that leaves all of the statistics to the LLM"""
         # Prepare query with assessment data
         child_info = assessment_data.get('child_info', {})
         test_results = assessment_data.get('test_results', [])
@@ -194,9 +360,93 @@ FORMAT GUIDELINES:
 - Maintain a supportive, encouraging tone while being clinically accurate
 - Focus on the child's unique profile rather than generic recommendations
 """
+        return query
+    
+    @staticmethod
+    def build_compact_report_query(assessment_data, scores):
+        """
+        Report prompt carrying locally computed JHFT scores
+        
+        The per-subtest statistics come from services.jhft_scoring, so the LLM
+        only writes the narrative interpretation and recommendations.
+        """
+        child_info = assessment_data.get('child_info') or {}
+        observations = assessment_data.get('observations') or {}
+        
+        score_lines = []
+        for subtest in scores.get('subtests', []) if scores else []:
+            if subtest['category'] == NOT_SCORED:
+                score_lines.append(f"{subtest['testName']}: {subtest['timeInSeconds']}s (no norms)")
+            else:
+                score_lines.append(
+                    f"{subtest['testName']}: {subtest['timeInSeconds']}s, norm {subtest['normMean']}±{subtest['normSd']}s, "
+                    f"z={subtest['zScore']:+.2f}, {subtest['percentile']:.0f}% of peers slower, IQR {subtest['iqrFlag']}, {subtest['category']}"
+                )
+        overall = scores.get('overall', {}) if scores else {}
         
-        # Submit query
-        response, error = OnDemandService.submit_query(session_id, query)
+        observation_lines = [
+            f"{label}: {observations.get(key)}"
+            for key, label in (('motorSkills', 'Motor'), ('concentration', 'Concentration'),
+                               ('frustrationLevel', 'Frustration'), ('cooperationLevel', 'Cooperation'),
+                               ('additionalNotes', 'Notes'))
+            if observations.get(key)
+        ]
+        
+        return "\n".join([
+            "You are a pediatric occupational therapist. Write a parent-friendly Jebsen Hand Function Test report.",
+            f"Child: {child_info.get('name', 'N/A')}, {child_info.get('age', 'N/A')}y, {child_info.get('dominantHand', 'N/A')}-handed. "
+            f"Concerns: {child_info.get('specificConcerns') or 'None'}. Previous: {child_info.get('previousAssessments') or 'None'}.",
+            f"Scores (age norms {scores.get('ageGroup') if scores else 'N/A'}, precomputed - do not recalculate):",
+            *score_lines,
+            f"Overall: {overall.get('category', 'N/A')}, mean z={overall.get('meanZScore', 'N/A')}, "
+            f"{overall.get('subtestsOutsideIqr', 0)} subtests outside IQR.",
+            "Observations: " + ("; ".join(observation_lines) or "None"),
+            "Sections: Performance Summary (cite the numbers above), Clinical Interpretation, Strengths and Challenges, "
+            "Recommendations (OT interventions, equipment, home activities), Follow-up Plan (reassessment timeline, measurable goals).",
+            "Plain language, supportive tone, specific to this child, under 600 words.",
+        ])
+    
+    @staticmethod
+    def estimate_tokens(text):
+        """Rough token count (~4 characters per token) used for prompt size metrics"""
+        return (len(text) + 3) // 4 if text else 0
+    
+    @staticmethod
+    def generate_assessment_report(assessment_data, parent_id):
+        """
+        Generate a report from assessment data using OnDemand AI
+        
+        In 'compact' prompt mode (Config.REPORT_PROMPT_MODE) the JHFT statistics
+        are computed locally and only the narrative is asked of the LLM. Prompt
+        and answer sizes and upstream latency are returned under 'metrics'.
+        """
+        bulkhead = OnDemandService.bulkheads['report']
+        ticket = bulkhead.acquire()
+        if ticket is None:
+            return None, OnDemandService.BUSY
+        
+        try:
+            # A fresh session per report, so no earlier assessment (of this or any
+            # other child) is ever part of the upstream conversation
+            started = time.perf_counter()
+            session, error = OnDemandService.sessions.acquire('report', parent_id, shared=False)
+            session_latency_ms = (time.perf_counter() - started) * 1000
+            if error:
+                return None, f"Failed to create session: {error}"
+            session_id = session['id']
+            
+            # Prepare query with assessment data
+            query, full_query, scores = OnDemandService.build_report_query(assessment_data)
+            
+            # Submit query
+            started = time.perf_counter()
+            response, error = OnDemandService.submit_query(
+                session_id, query, read_timeout=Config.ONDEMAND_REPORT_READ_TIMEOUT
+            )
+            query_latency_ms = (time.perf_counter() - started) * 1000
+            OnDemandService.sessions.release(session, healthy=error is None)
+        finally:
+            bulkhead.release(ticket)
         if error:
             return None, f"Failed to generate report: {error}"
         
@@ -207,27 +457,153 @@ FORMAT GUIDELINES:
         # Remove markdown formatting from the report
         clean_answer = OnDemandService.remove_markdown(answer)
         
+        metrics = {
+            'prompt_mode': 'compact' if scores else 'full',
+            'prompt_tokens': OnDemandService.estimate_tokens(query),
+            'full_prompt_tokens': OnDemandService.estimate_tokens(full_query),
+            'answer_tokens': OnDemandService.estimate_tokens(answer),
+            'session_reused': session['reused'],
+            'session_latency_ms': round(session_latency_ms, 1),
+            'query_latency_ms': round(query_latency_ms, 1)
+        }
+        print(f"Report generation metrics: {metrics}")
+        
         return {
             'session_id': session_id,
             'report': clean_answer,
-            'message_id': response.get('data', {}).get('messageId')
+            'message_id': response.get('data', {}).get('messageId'),
+            'scores': scores,
+            'metrics': metrics
         }, None
+    
+    @staticmethod
+    def build_report_query(assessment_data):
+        """
+        Build the report prompt for the configured prompt mode
+        
+        Returns:
+            tuple: (query: str, full_query: str, scores: dict or None)
+        """
+        full_query = OnDemandService.build_full_report_query(assessment_data)
+        scores = None
+        if Config.REPORT_PROMPT_MODE == 'compact':
+            child_info = assessment_data.get('child_info') or {}
+            scores = score_test_results(
+                assessment_data.get('test_results') or [],
+                child_info.get('age')
+            )
+        query = OnDemandService.build_compact_report_query(assessment_data, scores) if scores else full_query
+        return query, full_query, scores
+    
+    @staticmethod
+    def stream_assessment_report(assessment_data, parent_id):
+        """
+        Streaming variant of generate_assessment_report
+        
+        Yields:
+            tuple: ('chunk', text) for each cleaned piece of the report as it
+                   arrives, then ('done', report_data) with the same fields
+                   generate_assessment_report returns, or ('error', message)
+        """
+        bulkhead = OnDemandService.bulkheads['report']
+        ticket = bulkhead.acquire()
+        if ticket is None:
+            yield 'error', OnDemandService.BUSY
+            return
+        
+        try:
+            started = time.perf_counter()
+            session, error = OnDemandService.sessions.acquire('report', parent_id, shared=False)
+            session_latency_ms = (time.perf_counter() - started) * 1000
+            if error:
+                yield 'error', f"Failed to create session: {error}"
+                return
+            
+            query, full_query, scores = OnDemandService.build_report_query(assessment_data)
+            
+            started = time.perf_counter()
+            first_chunk_ms = None
+            pieces = []
+            message_id = None
+            cleaner = MarkdownStream()
+            healthy = False
+            try:
+                for event in OnDemandService.stream_query(
+                    session['id'], query, read_timeout=Config.ONDEMAND_REPORT_READ_TIMEOUT
+                ):
+                    if first_chunk_ms is None:
+                        first_chunk_ms = (time.perf_counter() - started) * 1000
+                    pieces.append(event['answer'])
+                    message_id = event.get('messageId') or message_id
+                    text = cleaner.feed(event['answer'])
+                    if text:
+                        yield 'chunk', text
+                healthy = True
+            except requests.exceptions.RequestException as e:
+                print(f"Streaming query error: {str(e)}")
+                yield 'error', f"Failed to generate report: {str(e)}"
+                return
+            finally:
+                # Also reached when the client disconnects mid-stream
+                OnDemandService.sessions.release(session, healthy=healthy)
+        finally:
+            bulkhead.release(ticket)
+        
+        text = cleaner.flush()
+        if text:
+            yield 'chunk', text
+        
+        answer = ''.join(pieces)
+        if not answer:
+            yield 'error', "No report generated"
+            return
+        
+        metrics = {
+            'prompt_mode': 'compact' if scores else 'full',
+            'prompt_tokens': OnDemandService.estimate_tokens(query),
+            'full_prompt_tokens': OnDemandService.estimate_tokens(full_query),
+            'answer_tokens': OnDemandService.estimate_tokens(answer),
+            'session_reused': session['reused'],
+            'session_latency_ms': round(session_latency_ms, 1),
+            'first_chunk_ms': round(first_chunk_ms, 1) if first_chunk_ms is not None else None,
+            'query_latency_ms': round((time.perf_counter() - started) * 1000, 1),
+            'streamed': True
+        }
+        print(f"Report generation metrics: {metrics}")
+        
+        yield 'done', {
+            'session_id': session['id'],
+            # Cleaned in one pass so the stored report matches the non-streaming path
+            'report': OnDemandService.remove_markdown(answer),
+            'message_id': message_id,
+            'scores': scores,
+            'metrics': metrics
+        }
 
-def generate_ice_breaker_response(user_message):
-    """Generate friendly, autism-appropriate chatbot response"""
+def build_ice_breaker_query(user_message, history=(), primed=False):
+    """
+    Autism-friendly chat prompt for one message
     
-    # Create or get session
-    session_response, error = OnDemandService.create_session("ice-breaker-chat")
-    if error:
-        # Return fallback response
-        return get_fallback_response(user_message)
+    Args:
+        user_message: The child's message
+        history: Earlier turns ({'child', 'reply', optional 'late_reply'}) the upstream session has not seen
+        primed: The session already had the guidelines, so they are not repeated
+    """
+    conversation = ''.join(
+        f'Child: "{turn["child"]}"\nYou: "{turn["reply"]}"\n'
+        + (f'(Your fuller answer, which came too late for the child to see: "{turn["late_reply"]}")\n'
+           if turn.get('late_reply') else '')
+        for turn in history
+    )
+    if conversation:
+        conversation = f"CONVERSATION SO FAR:\n{conversation}\n"
     
-    session_id = session_response.get('data', {}).get('id')
-    if not session_id:
-        return get_fallback_response(user_message)
+    if primed:
+        return f"""{conversation}The child said: "{user_message}"
+
+Reply following the guidelines from the start of this conversation."""
     
-    # Create autism-friendly prompt
-    query = f"""You are a friendly, patient chatbot designed to help children with autism feel comfortable and practice social communication. 
+    return f"""You are a friendly, patient chatbot designed to help children with autism feel comfortable and practice social communication. 
 
 GUIDELINES:
 - Use simple, clear language
@@ -259,61 +635,231 @@ AVOID:
 - Sudden topic changes
 - Negative or corrective language
 
-The child said: "{user_message}"
+{conversation}The child said: "{user_message}"
 
 Respond in a friendly, supportive way that encourages continued conversation and helps the child feel safe and understood."""
+
+def remember_turn(conversation_id, user_message, reply, session_id=None):
+    """Add a turn to the conversation's memory; returns its id (None without a conversation id)"""
+    if conversation_id:
+        return OnDemandService.memory.add(conversation_id, user_message, reply, session_id=session_id)
+    return None
+
+def chat_query_for(user_message, conversation_id):
+    """Query text, or a builder that adds what the conversation's session has not seen yet"""
+    if not conversation_id:
+        return build_ice_breaker_query(user_message)
+    
+    def build(session):
+        history, primed = OnDemandService.memory.context(conversation_id, session['id'])
+        return build_ice_breaker_query(user_message, history, primed)
+    return build
+
+def generate_ice_breaker_response(user_message, conversation_id=None):
+    """
+    Generate friendly, autism-appropriate chatbot response
+    
+    The upstream call is raced against Config.ONDEMAND_CHAT_HEDGE_BUDGET. When
+    it has not answered in time the local reply is returned instead. The
+    upstream answer is still used once it arrives: it is added to the reply
+    cache (when cacheable) and attached to the conversation's turn as
+    context for the next message. With a conversation id, recent turns are
+    sent as context and replies that depend on them are kept out of the
+    cache.
+    """
+    cacheable = not conversation_id or OnDemandService.memory.turn_count(conversation_id) == 0
     
-    # Submit query
-    response, error = OnDemandService.submit_query(session_id, query)
-    if error:
-        return get_fallback_response(user_message)
+    # Frequent messages are answered from a pool of earlier replies
+    cached = OnDemandService.chat_cache.get(user_message) if cacheable else None
+    if cached:
+        remember_turn(conversation_id, user_message, cached)
+        return cached
     
-    answer = response.get('data', {}).get('answer')
-    if not answer:
-        return get_fallback_response(user_message)
+    # Don't wait on an upstream that is known to be failing
+    if OnDemandService.breaker.is_open():
+        fallback = get_fallback_response(user_message)
+        remember_turn(conversation_id, user_message, fallback)
+        return fallback
+    
+    # Create autism-friendly prompt
+    query = chat_query_for(user_message, conversation_id)
+    upstream = {}
+    
+    def ask_upstream():
+        # Submit query on a warm pooled session (one upstream call when one is idle)
+        started = time.perf_counter()
+        response, session, error = OnDemandService.pooled_query(
+            'ice-breaker', query,
+            conversation_id=conversation_id,
+            read_timeout=Config.ONDEMAND_CHAT_READ_TIMEOUT,
+            slow_after=Config.ONDEMAND_CHAT_SLOW_SECONDS
+        )
+        if error:
+            return None
+        
+        answer = response.get('data', {}).get('answer')
+        if not answer:
+            return None
+        
+        # Clean up the response
+        clean_answer = OnDemandService.remove_markdown(answer)
+        if cacheable:
+            OnDemandService.chat_cache.add(user_message, clean_answer, time.perf_counter() - started)
+        upstream['session_id'] = session['id']
+        return clean_answer
     
-    # Clean up the response
-    clean_answer = OnDemandService.remove_markdown(answer)
+    turn = {'recorded': threading.Event(), 'id': None}
     
-    return clean_answer
+    def keep_late_answer(late_answer):
+        # Runs on the upstream call's thread, possibly before the fallback turn is recorded
+        if conversation_id and turn['recorded'].wait(Config.ONDEMAND_CHAT_READ_TIMEOUT) and turn['id']:
+            OnDemandService.memory.add_late_reply(conversation_id, turn['id'], late_answer)
+    
+    answer, winner = OnDemandService.chat_hedge.run(
+        ask_upstream, lambda: get_fallback_response(user_message), on_late=keep_late_answer
+    )
+    # A session whose answer lost the race has not seen the reply the child got
+    turn['id'] = remember_turn(
+        conversation_id, user_message, answer, upstream.get('session_id') if winner == 'primary' else None
+    )
+    turn['recorded'].set()
+    return answer
 
-def get_fallback_response(user_message):
-    """Provide fallback responses when API is unavailable"""
-    message_lower = user_message.lower()
+def stream_ice_breaker_response(user_message, first_token_budget=None, conversation_id=None):
+    """
+    Stream a chat reply as it is generated
     
-    # Pattern-based responses
-    if any(word in message_lower for word in ['hi', 'hello', 'hey']):
-        return "Hi there! 👋 I'm happy to talk with you! What would you like to chat about?"
+    The upstream stream is read on a background thread. When no text arrives
+    within first_token_budget seconds (Config.ONDEMAND_CHAT_FIRST_TOKEN_BUDGET
+    by default), or the call fails before any text, the local fallback reply
+    is sent instead and the upstream call is abandoned: its response is
+    closed, so the thread and its chat slot are freed at once. A reply that
+    breaks off after the first text is sent as far as it got and marked
+    'truncated'. Conversation ids are handled as in
+    generate_ice_breaker_response.
     
-    elif any(word in message_lower for word in ['name', 'who are you']):
-        return "I'm your friendly chat buddy! I'm here to talk and listen. What's your name?"
+    Yields:
+        tuple: ('chunk', text) pieces, then ('done', {'response', 'fallback', 'truncated'})
+    """
+    if first_token_budget is None:
+        first_token_budget = Config.ONDEMAND_CHAT_FIRST_TOKEN_BUDGET
     
-    elif any(word in message_lower for word in ['happy', 'good', 'great']):
-        return "That's wonderful! 😊 I'm so glad you're feeling good! What makes you happy?"
+    cacheable = not conversation_id or OnDemandService.memory.turn_count(conversation_id) == 0
+    cached = OnDemandService.chat_cache.get(user_message) if cacheable else None
+    if cached:
+        remember_turn(conversation_id, user_message, cached)
+        yield 'chunk', cached
+        yield 'done', {'response': cached, 'fallback': False, 'truncated': False, 'cached': True}
+        return
     
-    elif any(word in message_lower for word in ['sad', 'bad', 'upset']):
-        return "I'm sorry you're feeling that way. It's okay to have big feelings. Do you want to tell me more?"
+    if OnDemandService.breaker.is_open():
+        fallback = get_fallback_response(user_message)
+        remember_turn(conversation_id, user_message, fallback)
+        yield 'chunk', fallback
+        yield 'done', {'response': fallback, 'fallback': True, 'truncated': False}
+        return
     
-    elif any(word in message_lower for word in ['like', 'love', 'favorite']):
-        return "That sounds really cool! Tell me more about what you like! 🌟"
+    query = chat_query_for(user_message, conversation_id)
+    started = time.perf_counter()
+    events = queue.Queue()
+    abandoned = threading.Event()
+    upstream = {}
     
-    elif any(word in message_lower for word in ['animal', 'dog', 'cat', 'pet']):
-        return "Animals are awesome! Do you have a favorite animal? I love hearing about pets! 🐶🐱"
+    def opened(response):
+        upstream['response'] = response
+        # The reader may have given up just before the response was stored
+        if abandoned.is_set():
+            response.close()
     
-    elif any(word in message_lower for word in ['color', 'colours']):
-        return "Colors are so fun! What's your favorite color? Mine changes all the time! 🌈"
+    def abandon():
+        abandoned.set()
+        response = upstream.get('response')
+        if response is not None:
+            response.close()
     
-    elif 'joke' in message_lower:
-        return "Here's a silly one: Why did the teddy bear say no to dessert? Because she was stuffed! 🧸 Do you like jokes?"
+    def pump():
+        # The chat slot is held for as long as the upstream stream is read
+        bulkhead = OnDemandService.bulkheads['ice-breaker']
+        ticket = bulkhead.acquire()
+        if ticket is None:
+            events.put(('error', OnDemandService.BUSY))
+            return
+        try:
+            if abandoned.is_set():
+                return
+            session, error = OnDemandService.sessions.acquire('ice-breaker', conversation_id)
+            if error:
+                events.put(('error', error))
+                return
+            upstream['session_id'] = session['id']
+            healthy = False
+            try:
+                if abandoned.is_set():
+                    # Nothing was asked, so the session is still fit for reuse
+                    healthy = True
+                    return
+                for event in OnDemandService.stream_query(
+                    session['id'], query(session) if callable(query) else query,
+                    read_timeout=Config.ONDEMAND_CHAT_READ_TIMEOUT,
+                    slow_after=Config.ONDEMAND_CHAT_SLOW_SECONDS,
+                    opened=opened
+                ):
+                    if abandoned.is_set():
+                        return
+                    events.put(('text', event['answer']))
+                healthy = True
+                events.put(('end', None))
+            except Exception as e:
+                # Closing an abandoned response breaks the read; that is not an upstream error
+                if not abandoned.is_set():
+                    print(f"Chat stream error: {str(e)}")
+                    events.put(('error', str(e)))
+            finally:
+                OnDemandService.sessions.release(session, healthy=healthy)
+        finally:
+            bulkhead.release(ticket)
     
-    else:
-        # Generic encouraging responses
-        responses = [
-            "That's really interesting! Can you tell me more about that? 😊",
-            "I love hearing what you have to say! What else would you like to talk about?",
-            "You're doing a great job sharing! Do you have a favorite thing to do?",
-            "That's so cool! Would you like to tell me something else?",
-            "Thanks for sharing that with me! What makes you smile? 😊",
-        ]
-        import random
-        return random.choice(responses)
+    threading.Thread(target=pump, name='ice-breaker-stream', daemon=True).start()
+    
+    try:
+        try:
+            kind, data = events.get(timeout=first_token_budget)
+        except queue.Empty:
+            kind, data = 'timeout', None
+        
+        if kind != 'text':
+            fallback = get_fallback_response(user_message)
+            remember_turn(conversation_id, user_message, fallback)
+            yield 'chunk', fallback
+            yield 'done', {'response': fallback, 'fallback': True, 'truncated': False}
+            return
+        
+        cleaner = MarkdownStream(eager=True)
+        pieces = []
+        while kind == 'text':
+            pieces.append(data)
+            text = cleaner.feed(data)
+            if text:
+                yield 'chunk', text
+            try:
+                kind, data = events.get(timeout=Config.ONDEMAND_CHAT_READ_TIMEOUT)
+            except queue.Empty:
+                break
+        
+        text = cleaner.flush()
+        if text:
+            yield 'chunk', text
+        
+        response = OnDemandService.remove_markdown(''.join(pieces))
+        if kind == 'end' and cacheable:
+            OnDemandService.chat_cache.add(user_message, response, time.perf_counter() - started)
+        # The session only saw this turn if its answer arrived in full
+        remember_turn(conversation_id, user_message, response, upstream.get('session_id') if kind == 'end' else None)
+        yield 'done', {'response': response, 'fallback': False, 'truncated': kind != 'end'}
+    finally:
+        # Also reached when the client disconnects; stop reading upstream either way
+        abandon()
+
+def get_fallback_response(user_message):
+    """Provide fallback responses when API is unavailable"""
+    return OnDemandService.responder.respond(user_message)
@@ -0,0 +1,104 @@
+import random
+import re
+import threading
+import unicodedata
+from utils.cache import TTLCache
+
+# Emoji presentation selectors, skin tone modifiers and zero-width joiners
+EMOJI_MODIFIERS = re.compile('[\ufe0e\ufe0f\u200d\U0001F3FB-\U0001F3FF]')
+REPEATED_PUNCTUATION = re.compile(r'([!?.,~])\1+')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_message(text):
+    """
+    Cache key for a chat message
+    
+    Case-folded, NFKC-normalized, with emoji modifiers dropped, repeated
+    punctuation collapsed and whitespace squeezed, so "Hi!!", "hi !" and
+    "HI" share a key.
+    """
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    text = EMOJI_MODIFIERS.sub('', text)
+    text = REPEATED_PUNCTUATION.sub(r'\1', text)
+    text = WHITESPACE.sub(' ', text)
+    return text.strip(' .!?,~')
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of chat replies with a pool of varied answers per message
+    
+    A message is answered from the cache only once `variants` different
+    answers have been collected for it, and then a random one of them is
+    returned, so frequent messages do not always get the same reply.
+    
+    Args:
+        max_entries: Messages kept before the least recently used is evicted
+        ttl: Seconds a message's answers stay valid
+        variants: Answers collected per message before it is served from cache
+        max_message_length: Longer (normalized) messages are never cached
+    """
+    
+    def __init__(self, max_entries=2000, ttl=86400, variants=3, max_message_length=120):
+        self.entries = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.variants = variants
+        self.max_message_length = max_message_length
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+    
+    def key(self, message):
+        """Normalized cache key, or None when the message is not cacheable"""
+        key = normalize_message(message)
+        if not key or len(key) > self.max_message_length:
+            return None
+        return key
+    
+    def get(self, message):
+        """Return a cached answer for message, or None"""
+        key = self.key(message)
+        entry = self.entries.get(key) if key else None
+        with self._lock:
+            if entry is None or len(entry['answers']) < self.variants:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.latency_saved += entry['latency']
+            return random.choice(entry['answers'])
+    
+    def add(self, message, answer, latency):
+        """
+        Remember an upstream answer for message
+        
+        Args:
+            message: The child's message
+            answer: Cleaned reply
+            latency: Seconds the upstream call took (averaged per message)
+        """
+        key = self.key(message)
+        if not key or not answer:
+            return
+        with self._lock:
+            entry = self.entries.get(key) or {'answers': [], 'latency': 0.0}
+            if answer not in entry['answers']:
+                if len(entry['answers']) >= self.variants:
+                    entry['answers'].pop(0)
+                entry['answers'].append(answer)
+            count = len(entry['answers'])
+            entry['latency'] += (latency - entry['latency']) / count
+            self.entries.set(key, entry)
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': self.entries.stats()['entries'],
+                'max_entries': self.entries.max_entries,
+                'variants': self.variants,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'latency_saved_ms': round(self.latency_saved * 1000, 1)
+            }
@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class SessionPool:
+    """
+    Reusable upstream chat sessions keyed by purpose and conversation
+    
+    A session is leased for one query at a time and handed back afterwards, so
+    a warm session costs a single upstream call per message instead of two.
+    Upstream sessions remember what they were asked, so a session is only
+    reused within its own conversation: sessions leased without a
+    conversation id, or with shared=False, serve a single query and are then
+    retired. Prewarmed sessions have seen nothing yet and go to the next
+    lease of their purpose, whatever its conversation; keep_warm() keeps a
+    number of them ready, refilling in the background after every lease
+    that took or missed one. Sessions are also
+    retired once they are older than the TTL, have served max_uses queries,
+    or their last query failed. The pool is per process and starts empty
+    again after fork().
+    
+    Args:
+        factory: Callable (purpose, conversation_id) -> (session_id, error)
+        ttl: Seconds a session may be reused after it was created
+        max_uses: Queries a session serves before it is retired
+        max_idle: Idle sessions kept per key
+        max_keys: Keys kept before the least recently used one is dropped
+    """
+    
+    def __init__(self, factory, ttl=1800, max_uses=25, max_idle=8, max_keys=1000):
+        self.factory = factory
+        self.ttl = ttl
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+        self.max_keys = max_keys
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        """Forget sessions inherited from a parent process (they must not be shared)"""
+        self._idle = OrderedDict()
+        self._fresh = {}
+        self._warm_targets = {}
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._counters = {'created': 0, 'reused': 0, 'prewarmed': 0, 'failed': 0}
+        self._evicted = {'ttl': 0, 'max_uses': 0, 'unhealthy': 0, 'overflow': 0, 'single_use': 0}
+    
+    def acquire(self, purpose, conversation_id=None, shared=True):
+        """
+        Lease a live session for purpose, creating one when none is idle
+        
+        Args:
+            purpose: Pool the session belongs to ('ice-breaker', 'report')
+            conversation_id: Conversation the session is kept for between leases
+            shared: False for a session that must not be reused after this lease
+        
+        Returns:
+            tuple: (session: dict, error: str) where session carries 'id',
+                   'key', 'created_at', 'uses', 'reused' and 'pooled'
+        """
+        key = (purpose, conversation_id)
+        pooled = shared and conversation_id is not None
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key) if pooled else None
+            while idle:
+                session = idle.pop()
+                if now - session['created_at'] > self.ttl:
+                    self._evicted['ttl'] += 1
+                    continue
+                self._counters['reused'] += 1
+                session['reused'] = True
+                return session, None
+            if pooled:
+                self._idle.pop(key, None)
+            
+            fresh = self._fresh.get(purpose)
+            while fresh:
+                session = fresh.popleft()
+                if now - session['created_at'] > self.ttl:
+                    self._evicted['ttl'] += 1
+                    continue
+                self._counters['prewarmed'] += 1
+                session.update({'key': key, 'pooled': pooled})
+                self._refill(purpose)
+                return session, None
+            self._refill(purpose)
+        
+        session_id, error = self.factory(purpose, conversation_id)
+        with self._lock:
+            self._counters['failed' if error else 'created'] += 1
+        if error:
+            return None, error
+        return {'id': session_id, 'key': key, 'created_at': now, 'uses': 0, 'reused': False, 'pooled': pooled}, None
+    
+    def release(self, session, healthy=True):
+        """Hand a leased session back, retiring it if it failed, expired, is used up or is not shared"""
+        session['uses'] += 1
+        if not healthy:
+            reason = 'unhealthy'
+        elif not session['pooled']:
+            reason = 'single_use'
+        elif session['uses'] >= self.max_uses:
+            reason = 'max_uses'
+        elif time.monotonic() - session['created_at'] > self.ttl:
+            reason = 'ttl'
+        else:
+            reason = None
+        
+        with self._lock:
+            if reason:
+                self._evicted[reason] += 1
+                return
+            idle = self._idle.setdefault(session['key'], deque())
+            self._idle.move_to_end(session['key'])
+            if len(idle) >= self.max_idle:
+                self._evicted['overflow'] += 1
+                return
+            idle.append(session)
+            while len(self._idle) > self.max_keys:
+                _, dropped = self._idle.popitem(last=False)
+                self._evicted['overflow'] += len(dropped)
+    
+    def keep_warm(self, purpose, count):
+        """Keep up to count unused sessions ready for purpose, creating them in the background"""
+        with self._lock:
+            self._warm_targets[purpose] = count
+            self._refill(purpose)
+    
+    def _refill(self, purpose):
+        # Called with the lock held; at most one refill thread per purpose
+        if not self._warm_targets.get(purpose) or purpose in self._refilling:
+            return
+        self._refilling.add(purpose)
+        
+        def refill():
+            try:
+                self.prewarm(purpose, self._warm_targets[purpose])
+            finally:
+                with self._lock:
+                    self._refilling.discard(purpose)
+        
+        threading.Thread(target=refill, name=f"session-refill-{purpose}", daemon=True).start()
+    
+    def prewarm(self, purpose, count):
+        """Create up to count unused sessions for purpose now; returns how many are waiting"""
+        with self._lock:
+            missing = count - len(self._fresh.get(purpose, ()))
+        for _ in range(max(0, missing)):
+            session_id, error = self.factory(purpose, None)
+            with self._lock:
+                self._counters['failed' if error else 'created'] += 1
+                if error:
+                    print(f"Session prewarm for {purpose} failed: {error}")
+                    break
+                self._fresh.setdefault(purpose, deque()).append({
+                    'id': session_id, 'key': (purpose, None), 'created_at': time.monotonic(), 'uses': 0,
+                    'reused': False, 'pooled': False
+                })
+        with self._lock:
+            return len(self._fresh.get(purpose, ()))
+    
+    def stats(self):
+        with self._lock:
+            idle = {}
+            for (purpose, conversation_id), sessions in self._idle.items():
+                bucket = idle.setdefault(purpose, {'keys': 0, 'sessions': 0})
+                bucket['keys'] += 1
+                bucket['sessions'] += len(sessions)
+            leased = self._counters['created'] + self._counters['reused']
+            return {
+                **self._counters,
+                'reuse_ratio': self._counters['reused'] / leased if leased else 0.0,
+                'evicted': dict(self._evicted),
+                'idle': idle,
+                'prewarmed_idle': {purpose: len(sessions) for purpose, sessions in self._fresh.items()}
+            }
@@ -0,0 +1,78 @@
+"""
+Login-burst benchmark for User.find_or_create
+
+Simulates concurrent Auth0 callbacks (new and returning users) against the
+database configured in .env and reports how many MongoDB commands each
+callback issued, plus per-call latency.
+
+Usage (from the backend directory):
+    python test/bench_login_upsert.py --users 200 --logins 5 --threads 16
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import monitoring
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+    
+    def started(self, event):
+        if event.command_name in ('findAndModify', 'find', 'insert', 'update'):
+            with self.lock:
+                self.counts[event.command_name] = self.counts.get(event.command_name, 0) + 1
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--logins', type=int, default=5, help='Logins per user')
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+    
+    counter = CommandCounter()
+    monitoring.register(counter)  # must happen before the client is created
+    
+    from models.user import User
+    
+    prefix = f"bench|{uuid.uuid4().hex[:8]}"
+    callbacks = [
+        (f"{prefix}-{i}", f"user{i}@example.com", f"User {i}", f"https://example.com/{i}-{n}.png")
+        for n in range(args.logins) for i in range(args.users)
+    ]
+    latencies = []
+    
+    def login(callback):
+        auth0_id, email, name, picture = callback
+        started = time.perf_counter()
+        User.find_or_create(auth0_id, email, name=name, picture=picture, email_verified=True)
+        latencies.append(time.perf_counter() - started)
+    
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(login, callbacks))
+    
+    total = sum(counter.counts.values())
+    latencies.sort()
+    print(f"callbacks={len(callbacks)} commands={total} per_callback={total / len(callbacks):.2f} {counter.counts}")
+    print(f"p50={latencies[len(latencies) // 2] * 1000:.1f}ms p99={latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms")
+    
+    User.collection.delete_many({'auth0_id': {'$regex': f"^{prefix.replace('|', '[|]')}"}})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Markdown stripping benchmark and golden-corpus check
+
+Checks that services.markdown.remove_markdown returns byte-identical output
+to the original per-call re.sub implementation (kept below as
+legacy_remove_markdown) and to the golden files in test/markdown_corpus
+(<name>.md -> <name>.txt), that MarkdownStream.flush agrees with it when the
+whole answer arrives at once, and that both implementations agree on
+--fuzz random strings (half random characters, half random markdown lines),
+both before and after the final strip(). It then reports throughput for
+both, measured alternately and keeping the best of --rounds runs, since
+single runs on a busy machine differ by more than the implementations do.
+
+Usage (from the backend directory):
+    python test/bench_markdown.py --repeat 200
+    python test/bench_markdown.py --fuzz 200000 --repeat 0   # equivalence checks only
+    python test/bench_markdown.py --write-golden   # regenerate the .txt files from the legacy implementation
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.markdown import MarkdownStream, remove_markdown, strip_markdown
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'markdown_corpus')
+
+# Fuzz input alphabet: every character the rules react to, plus filler
+FUZZ_ALPHABET = '*_`#[]()!>-+.1 \t\n\nab'
+# Pieces fuzz lines are built from: a line start, then inline fragments
+FUZZ_LINE_STARTS = ['', '', '', '- ', '* ', '+ ', '1. ', '10. ', '  - ', '   3. ', '> ', '>', '# ', '## ',
+                    '####### ', '---', '***', '___', ' -- -', '- 1. ', '> - ', '-', '1.', ' ', '\t', '#', '- - ']
+FUZZ_LINE_PIECES = ['word', 'two words', '**b**', '*i*', '***bi***', '__u__', '_u_', '`c`', '[l](u)', '![i](u)',
+                    '**', '*', '***', '****', '_', '#', '# ', ' ', '[', ']', '(', ')', '!', '`', '```', '1.', '-',
+                    '>', '\t', 'snake_case']
+
+
+def legacy_strip_markdown(text):
+    """OnDemandService.remove_markdown as it was before services/markdown.py, without the final strip()"""
+    # Remove code blocks
+    text = re.sub(r'```[\s\S]*?```', '', text)
+    text = re.sub(r'`[^`\n]+`', '', text)
+    
+    # Remove headers
+    text = re.sub(r'#{1,6}\s+', '', text)
+    
+    # Remove bold and italic
+    text = re.sub(r'\*\*\*(.+?)\*\*\*', r'\1', text)
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+    text = re.sub(r'\*(.+?)\*', r'\1', text)
+    text = re.sub(r'___(.+?)___', r'\1', text)
+    text = re.sub(r'__(.+?)__', r'\1', text)
+    text = re.sub(r'_(.+?)_', r'\1', text)
+    
+    # Remove links but keep text
+    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
+    
+    # Remove images
+    text = re.sub(r'!\[([^\]]*)\]\([^\)]+\)', '', text)
+    
+    # Remove horizontal rules
+    text = re.sub(r'^\s*[-*_]{3,}\s*$', '', text, flags=re.MULTILINE)
+    
+    # Remove blockquotes
+    text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
+    
+    # Remove list markers
+    text = re.sub(r'^\s*[-*+]\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
+    
+    # Clean up extra whitespace
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    
+    return text
+
+
+def legacy_remove_markdown(text):
+    """OnDemandService.remove_markdown as it was before services/markdown.py"""
+    if not text:
+        return text
+    return legacy_strip_markdown(text).strip()
+
+
+def load_corpus():
+    corpus = []
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if not name.endswith('.md'):
+            continue
+        with open(os.path.join(CORPUS_DIR, name), encoding='utf-8') as f:
+            corpus.append((name[:-3], f.read()))
+    return corpus
+
+
+def check(corpus):
+    failures = 0
+    for name, text in corpus:
+        expected_path = os.path.join(CORPUS_DIR, f"{name}.txt")
+        with open(expected_path, encoding='utf-8') as f:
+            expected = f.read()
+        stream = MarkdownStream()
+        results = {
+            'legacy': legacy_remove_markdown(text),
+            'remove_markdown': remove_markdown(text),
+            'stream (single chunk)': (stream.feed(text) + stream.flush()).strip()
+        }
+        for label, result in results.items():
+            if result != expected:
+                failures += 1
+                print(f"MISMATCH {name}: {label}")
+    print(f"{len(corpus)} corpus files checked, {failures} mismatches")
+    return failures == 0
+
+
+def random_lines(rng):
+    lines = []
+    for _ in range(rng.randint(0, 8)):
+        pieces = [rng.choice(FUZZ_LINE_PIECES) for _ in range(rng.randint(0, 4))]
+        lines.append(rng.choice(FUZZ_LINE_STARTS) + ''.join(pieces) + rng.choice(['', '', ' ', '#', '*']))
+    return '\n'.join(lines) + rng.choice(['', '\n', '\n\n'])
+
+
+def fuzz(count, seed=0):
+    """Compare strip_markdown and remove_markdown with the legacy implementation on random strings"""
+    rng = random.Random(seed)
+    for i in range(count):
+        if i % 2:
+            text = random_lines(rng)
+        else:
+            text = ''.join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 40)))
+        if strip_markdown(text) != legacy_strip_markdown(text) or remove_markdown(text) != legacy_remove_markdown(text):
+            print(f"FUZZ MISMATCH for {text!r}")
+            return False
+    print(f"{count} fuzz strings checked, 0 mismatches")
+    return True
+
+
+def throughput(fn, text, repeat):
+    """(MB/s, us/call) over repeat calls"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    elapsed = time.perf_counter() - started
+    return len(text.encode('utf-8')) * repeat / elapsed / 1e6, elapsed / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200, help='Calls per file per measurement (0 skips timing)')
+    parser.add_argument('--rounds', type=int, default=5, help='Measurements per implementation, best one kept')
+    parser.add_argument('--fuzz', type=int, default=20000, help='Random strings compared against the legacy implementation')
+    parser.add_argument('--write-golden', action='store_true', help='Rewrite the expected .txt files and exit')
+    args = parser.parse_args()
+    
+    corpus = load_corpus()
+    if args.write_golden:
+        for name, text in corpus:
+            with open(os.path.join(CORPUS_DIR, f"{name}.txt"), 'w', encoding='utf-8') as f:
+                f.write(legacy_remove_markdown(text))
+        print(f"Wrote {len(corpus)} golden files")
+        return
+    
+    if not check(corpus) or not fuzz(args.fuzz):
+        sys.exit(1)
+    if not args.repeat:
+        return
+    
+    print(f"{'corpus':<18}{'impl':<18}{'MB/s':>10}{'us/call':>12}")
+    implementations = (('legacy', legacy_remove_markdown), ('remove_markdown', remove_markdown))
+    for name, text in corpus:
+        best = {label: (0.0, float('inf')) for label, _ in implementations}
+        # Alternate the implementations so drift in machine load hits both alike
+        for _ in range(args.rounds):
+            for label, fn in implementations:
+                best[label] = max(best[label], throughput(fn, text, args.repeat))
+        for label, (rate, per_call) in best.items():
+            print(f"{name:<18}{label:<18}{rate:>10.2f}{per_call:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
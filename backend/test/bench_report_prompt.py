@@ -0,0 +1,95 @@
+"""
+Report prompt benchmark: full vs compact prompt against the live OnDemand API
+
+Sends the same sample assessment with the original full prompt and with the
+compact prompt (JHFT statistics computed locally), each on a fresh session,
+and reports measured query latency next to the estimated prompt and answer
+tokens. Needs ONDEMAND_API_KEY / ONDEMAND_ENDPOINT_ID from .env; every run
+spends real upstream calls (2 * --runs queries plus their sessions).
+
+Usage (from the backend directory):
+    python test/bench_report_prompt.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from services.jhft_scoring import score_test_results
+from services.ondemand_service import OnDemandService
+
+SAMPLE_ASSESSMENT = {
+    'child_info': {
+        'name': 'Sample Child',
+        'age': 8,
+        'dominantHand': 'right',
+        'previousAssessments': 'None',
+        'specificConcerns': 'Slow handwriting, avoids buttons'
+    },
+    'test_results': [
+        {'testName': 'Writing', 'timeInSeconds': 38.2},
+        {'testName': 'Card Turning', 'timeInSeconds': 9.1},
+        {'testName': 'Small Objects', 'timeInSeconds': 11.4},
+        {'testName': 'Simulated Feeding', 'timeInSeconds': 14.0},
+        {'testName': 'Stacking Checkers', 'timeInSeconds': 7.6},
+        {'testName': 'Large Light Objects', 'timeInSeconds': 6.2},
+        {'testName': 'Large Heavy Objects', 'timeInSeconds': 6.9}
+    ],
+    'observations': {
+        'motorSkills': 'Immature tripod grasp',
+        'concentration': 'Good',
+        'frustrationLevel': 'Mild',
+        'cooperationLevel': 'High',
+        'additionalNotes': 'None'
+    }
+}
+
+
+def run_once(query):
+    session, error = OnDemandService.create_session(f"bench-report-{time.time_ns()}")
+    if error:
+        raise SystemExit(f"Session creation failed: {error}")
+    started = time.perf_counter()
+    response, error = OnDemandService.submit_query(
+        session['data']['id'], query, read_timeout=Config.ONDEMAND_REPORT_READ_TIMEOUT
+    )
+    elapsed = time.perf_counter() - started
+    if error:
+        raise SystemExit(f"Query failed: {error}")
+    return elapsed, response.get('data', {}).get('answer') or ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Queries per prompt mode')
+    args = parser.parse_args()
+    
+    scores = score_test_results(SAMPLE_ASSESSMENT['test_results'], SAMPLE_ASSESSMENT['child_info']['age'])
+    queries = {
+        'full': OnDemandService.build_full_report_query(SAMPLE_ASSESSMENT),
+        'compact': OnDemandService.build_compact_report_query(SAMPLE_ASSESSMENT, scores)
+    }
+    
+    for mode, query in queries.items():
+        latencies = []
+        answer_tokens = []
+        # The first query of each mode is a discarded warm-up
+        run_once(query)
+        for _ in range(args.runs):
+            elapsed, answer = run_once(query)
+            latencies.append(elapsed)
+            answer_tokens.append(OnDemandService.estimate_tokens(answer))
+        latencies.sort()
+        print(
+            f"{mode:8} prompt_tokens~{OnDemandService.estimate_tokens(query):5} "
+            f"answer_tokens~{statistics.median(answer_tokens):6.0f} "
+            f"p50={statistics.median(latencies) * 1000:8.0f}ms max={latencies[-1] * 1000:8.0f}ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
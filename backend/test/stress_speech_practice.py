@@ -0,0 +1,52 @@
+"""
+Concurrency stress test for POST /api/speech-practice/
+
+Fires many simultaneous submissions for the same child and checks that exactly
+one is accepted (201) and every other one is rejected as ALREADY_COMPLETED (409).
+
+Usage (against a running server):
+    python test/stress_speech_practice.py --base-url http://localhost:5000 --requests 50
+"""
+import argparse
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--child-name', default=None, help='Defaults to a fresh random name')
+    args = parser.parse_args()
+    
+    child_name = args.child_name or f"stress-{uuid.uuid4().hex[:8]}"
+    url = f"{args.base_url}/api/speech-practice/"
+    payload = {'childName': child_name, 'score': 3, 'totalQuestions': 5, 'questionsAttempted': 5}
+    start = threading.Barrier(args.requests)
+    
+    def submit(_):
+        start.wait()
+        response = requests.post(url, json=payload, timeout=30)
+        body = response.json()
+        return response.status_code, body.get('code')
+    
+    with ThreadPoolExecutor(max_workers=args.requests) as pool:
+        results = list(pool.map(submit, range(args.requests)))
+    
+    created = sum(1 for status, _ in results if status == 201)
+    rejected = sum(1 for status, code in results if status == 409 and code == 'ALREADY_COMPLETED')
+    other = len(results) - created - rejected
+    
+    print(f"child={child_name} created={created} already_completed={rejected} other={other}")
+    if created != 1 or other:
+        print("FAIL: expected exactly one record per child per day")
+        sys.exit(1)
+    print("OK: exactly one record per child per day")
+
+
+if __name__ == '__main__':
+    main()
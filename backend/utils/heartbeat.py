@@ -0,0 +1,47 @@
+import threading
+
+
+class Heartbeat:
+    """
+    Call a renewal function at a fixed interval while a block of work runs
+    
+    Used as a context manager around work that holds an expiring lease, so
+    the lease is extended for as long as the work actually takes instead of
+    expiring mid-way and letting a second holder start the same work.
+    beat() returns False once the lease has been lost; renewals then stop and
+    `lost` is set. Exceptions from beat() are logged and retried on the next
+    interval.
+    
+    Args:
+        interval: Seconds between renewals (keep it well below the lease length)
+        beat: Callable () -> bool renewing the lease
+        name: Thread name
+    """
+    
+    def __init__(self, interval, beat, name='heartbeat'):
+        self.interval = interval
+        self.beat = beat
+        self.name = name
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        return False
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.beat() is False:
+                    self.lost = True
+                    print(f"{self.name}: lease lost")
+                    return
+            except Exception as e:
+                print(f"{self.name}: renewal failed: {str(e)}")
@@ -0,0 +1,103 @@
+import threading
+import time
+
+
+class Hedge:
+    """
+    Race a slow call against a latency budget and a cheap fallback
+    
+    The primary function runs on a background thread. If it returns within
+    the budget its result is used; otherwise (or when it fails, i.e. returns
+    None or raises) the fallback's result is returned at once and the primary
+    call is left to finish on its own, handing a late result to on_late.
+    
+    Args:
+        budget: Seconds to wait for the primary call (None or 0 waits for it without a fallback race)
+        name: Thread name for primary calls
+    """
+    
+    def __init__(self, budget, name='hedge'):
+        self.budget = budget
+        self.name = name
+        self._lock = threading.Lock()
+        self._counters = {
+            'primary_wins': 0,
+            'fallback_wins': 0,
+            'primary_failures': 0,
+            'late_answers': 0,
+            'late_failures': 0
+        }
+        self._in_flight = 0
+        self._primary_time = 0.0
+        self._primary_calls = 0
+    
+    def run(self, primary, fallback, on_late=None):
+        """
+        Returns:
+            tuple: (result, winner) where winner is 'primary' or 'fallback'
+        """
+        if not self.budget:
+            result = self._call(primary)
+            if result is None:
+                with self._lock:
+                    self._counters['primary_failures'] += 1
+                return fallback(), 'fallback'
+            with self._lock:
+                self._counters['primary_wins'] += 1
+            return result, 'primary'
+        
+        call = {'done': threading.Event(), 'result': None, 'abandoned': False}
+        
+        def target():
+            result = self._call(primary)
+            with self._lock:
+                call['result'] = result
+                late = call['abandoned']
+                if late:
+                    self._counters['late_answers' if result is not None else 'late_failures'] += 1
+                call['done'].set()
+            if late and result is not None and on_late is not None:
+                try:
+                    on_late(result)
+                except Exception as e:
+                    print(f"Handling late {self.name} result failed: {str(e)}")
+        
+        threading.Thread(target=target, name=self.name, daemon=True).start()
+        call['done'].wait(self.budget)
+        
+        with self._lock:
+            if not call['done'].is_set():
+                call['abandoned'] = True
+                self._counters['fallback_wins'] += 1
+            elif call['result'] is None:
+                self._counters['primary_failures'] += 1
+            else:
+                self._counters['primary_wins'] += 1
+                return call['result'], 'primary'
+        return fallback(), 'fallback'
+    
+    def _call(self, primary):
+        with self._lock:
+            self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            return primary()
+        except Exception as e:
+            print(f"{self.name} call failed: {str(e)}")
+            return None
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._primary_calls += 1
+                self._primary_time += time.perf_counter() - started
+    
+    def stats(self):
+        with self._lock:
+            decided = self._counters['primary_wins'] + self._counters['fallback_wins'] + self._counters['primary_failures']
+            return {
+                'budget': self.budget,
+                'in_flight': self._in_flight,
+                **self._counters,
+                'primary_win_rate': self._counters['primary_wins'] / decided if decided else 0.0,
+                'avg_primary_time_ms': self._primary_time / self._primary_calls * 1000 if self._primary_calls else 0.0
+            }
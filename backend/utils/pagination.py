@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+
+
+def encode_cursor(document):
+    """
+    Build an opaque keyset cursor pointing just after a document
+
+    Args:
+        document: Raw document with `created_at` and `_id`
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    payload = {
+        'c': document['created_at'].isoformat(),
+        'i': str(document['_id'])
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Returns:
+        tuple: (created_at: datetime, _id: ObjectId), or None if the cursor is invalid
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(payload['c']), ObjectId(payload['i'])
+    except Exception:
+        return None
+
+
+def keyset_filter(query, after):
+    """
+    Restrict a query to documents that sort after a decoded cursor
+
+    Pages are ordered by (created_at desc, _id desc). The top-level `$lte`
+    bound lets MongoDB scan a single bounded index range while the `$or`
+    breaks ties between documents sharing the same `created_at`.
+    """
+    if after is None:
+        return query
+    created_at, last_id = after
+    query = dict(query)
+    query['created_at'] = {'$lte': created_at}
+    query['$or'] = [
+        {'created_at': {'$lt': created_at}},
+        {'_id': {'$lt': last_id}}
+    ]
+    return query
+
+
+# Sort order shared by every keyset-paginated listing
+KEYSET_SORT = [('created_at', -1), ('_id', -1)]
@@ -0,0 +1,35 @@
+def build_projection(field_map, fields=None, view=None, summary=None, always=('created_at',)):
+    """
+    Translate a `fields=` list or a `view=` name into a MongoDB projection
+
+    Args:
+        field_map: Mapping of API field name to document field path
+        fields: Comma-separated string or list of API field names
+        view: 'summary' for the model's summary fields, 'full' (or None) for everything
+        summary: API field names making up the summary view
+        always: Document fields every projection keeps (e.g. for keyset cursors)
+
+    Returns:
+        tuple: (projection dict or None, selected API field names or None)
+
+    Raises:
+        ValueError: On an unknown field or view name
+    """
+    if fields:
+        selected = fields.split(',') if isinstance(fields, str) else list(fields)
+        selected = [field.strip() for field in selected if field.strip()]
+    elif view == 'summary':
+        selected = list(summary or [])
+    elif view in (None, '', 'full'):
+        return None, None
+    else:
+        raise ValueError(f"Unknown view: {view}")
+    
+    projection = {field: 1 for field in always}
+    for field in selected:
+        if field not in field_map:
+            raise ValueError(f"Unknown field: {field}")
+        paths = field_map[field]
+        for path in (paths if isinstance(paths, (list, tuple)) else [paths]):
+            projection[path] = 1
+    return projection, selected
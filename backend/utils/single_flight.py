@@ -0,0 +1,53 @@
+import threading
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into a single execution
+    
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and receive the same result (or exception). Nothing is
+    cached once the call returns.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.shared = 0
+    
+    def do(self, key, fn):
+        """Run fn() for key unless a call for key is already in flight, then share its outcome"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'event': threading.Event(), 'result': None, 'error': None}
+                self.executions += 1
+            else:
+                self.shared += 1
+        
+        if not leader:
+            call['event'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        
+        try:
+            call['result'] = fn()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['event'].set()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'shared': self.shared
+            }
@@ -0,0 +1,24 @@
+from flask import Response, current_app, stream_with_context
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event whose data is JSON (datetimes and ObjectIds as for jsonify)"""
+    return f"event: {event}\ndata: {current_app.json.dumps(data)}\n\n"
+
+
+def sse_response(events):
+    """
+    Stream (event, data) pairs to the client as text/event-stream
+    
+    Buffering is disabled for proxies (nginx / Cloudflare) so every event is
+    flushed as soon as it is produced.
+    """
+    def generate():
+        for event, data in events:
+            yield sse_event(event, data)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -23,6 +23,8 @@ const IceBreakerChat = () => {
   const [isTyping, setIsTyping] = useState(false);
   const [speakingMessageId, setSpeakingMessageId] = useState<string | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  // Lets the server remember recent turns of this chat as context
+  const conversationIdRef = useRef<string>(crypto.randomUUID());
   const speechSynthesisRef = useRef<SpeechSynthesisUtterance | null>(null);
 
   const scrollToBottom = () => {
@@ -111,30 +113,72 @@ const IceBreakerChat = () => {
     setIsTyping(true);
 
     try {
-      // Call AI API
+      // Call AI API, streaming the reply as it is written
       const response = await fetch('https://brainwaveapi.teamuxh.site/api/ondemand/chat', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Accept': 'text/event-stream',
         },
         body: JSON.stringify({
           message: inputMessage,
           context: 'ice_breaker',
+          conversation_id: conversationIdRef.current,
+          stream: true,
         }),
       });
 
-      const data = await response.json();
-      
-      setIsTyping(false);
+      if (!response.ok || !response.body) {
+        throw new Error('Failed to get a reply');
+      }
 
-      const botMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        text: data.response || "That's interesting! Tell me more about that! 😊",
-        sender: 'bot',
-        timestamp: new Date(),
+      const botMessageId = (Date.now() + 1).toString();
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let replyText = '';
+      let started = false;
+
+      const showReply = (text: string) => {
+        if (!started) {
+          started = true;
+          setIsTyping(false);
+          setMessages((prev) => [...prev, { id: botMessageId, text, sender: 'bot', timestamp: new Date() }]);
+        } else {
+          setMessages((prev) => prev.map((message) => (message.id === botMessageId ? { ...message, text } : message)));
+        }
       };
 
-      setMessages((prev) => [...prev, botMessage]);
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Server-Sent Events are separated by a blank line
+        let boundary = buffer.indexOf('\n\n');
+        while (boundary !== -1) {
+          const rawEvent = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          boundary = buffer.indexOf('\n\n');
+
+          const eventName = rawEvent.match(/^event: (.*)$/m)?.[1];
+          const eventData = rawEvent.match(/^data: (.*)$/m)?.[1];
+          if (!eventData) continue;
+          const payload = JSON.parse(eventData);
+
+          if (eventName === 'chunk') {
+            replyText += payload.text;
+            showReply(replyText);
+          } else if (eventName === 'done') {
+            replyText = payload.response || replyText;
+            showReply(replyText || "That's interesting! Tell me more about that! 😊");
+          }
+        }
+      }
+
+      if (!started) {
+        showReply("That's interesting! Tell me more about that! 😊");
+      }
     } catch (error) {
       console.error('Error sending message:', error);
       setIsTyping(false);
@@ -180,7 +180,34 @@ const JebsenTest = ({ assessmentId }: JebsenTestProps = {}) => {
         throw new Error('Failed to generate report');
       }
 
-      const result = await response.json();
+      let result = await response.json();
+
+      // 202: generation was queued, wait for the job to finish (but not forever:
+      // a job whose worker died stays queued/running until its lease runs out)
+      const deadline = Date.now() + 5 * 60 * 1000;
+      while (response.status === 202 && result.status !== 'succeeded') {
+        if (result.status === 'failed') {
+          throw new Error(result.error || 'Failed to generate report');
+        }
+        if (Date.now() > deadline) {
+          throw new Error('Report generation is taking too long');
+        }
+        const jobResponse = await fetch(
+          `https://brainwaveapi.teamuxh.site${result.status_url}?wait=20`,
+          { credentials: 'include' }
+        );
+        if (!jobResponse.ok) {
+          throw new Error('Failed to generate report');
+        }
+        result = await jobResponse.json();
+      }
+      if (response.status === 202) {
+        result = result.report;
+      }
+      if (!result?.report_content) {
+        throw new Error('The finished job has no report');
+      }
+
       setReportContent(result.report_content);
       setShowReport(true);
     } catch (error) {